@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark: how long a fresh interpreter takes to import the
+app (src.main - what every pod start and every pytest collection pays),
+with the kubeapi backend left to load lazily versus loaded up front, as
+it was when src/executor.py imported the kubernetes client itself.
+
+Usage (from the repo root): python benchmarks/startup_time.py [--runs N]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = {
+    "lazy (SSH/Ansible-only deployment)": "import src.main",
+    "kubeapi backend loaded": "import src.main, src.kubeapi",
+}
+
+
+def time_import(statement: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", statement], cwd=ROOT, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    baseline = statistics.median(time_import("pass") for _ in range(args.runs))
+    print(f"bare interpreter: {baseline * 1000:.0f} ms (median of {args.runs})")
+    for name, statement in CASES.items():
+        time_import(statement)  # warm the bytecode cache
+        median = statistics.median(time_import(statement) for _ in range(args.runs))
+        print(
+            f"{name}: {median * 1000:.0f} ms, "
+            f"{(median - baseline) * 1000:.0f} ms over bare"
+        )
+
+
+if __name__ == "__main__":
+    main()
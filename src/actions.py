@@ -1,42 +1,27 @@
-import yaml
 import os
 
-# Populated at startup by src.main's lifespan via set_merged_actions() with
-# discovered playbooks/scripts merged under config/actions.yaml. Kept as
-# module state (rather than rebinding get_action_config itself) so that
-# callers who did `from src.actions import get_action_config` still see
-# the merged data once it's set - reassigning the module attribute after
-# import does not affect names already bound elsewhere.
-_merged_actions = None
-
-
-def set_merged_actions(merged):
-    global _merged_actions
-    _merged_actions = merged
-
-
-def load_actions_config():
-    with open(os.path.join(os.path.dirname(__file__), "../config/actions.yaml")) as f:
-        return yaml.safe_load(f)
+from src.config import config_registry
 
 
 def get_action_config(action_name):
-    if _merged_actions is not None:
-        return _merged_actions.get(action_name)
-    config = load_actions_config()
-    return config["actions"].get(action_name)
+    """
+    The action's config from the current config snapshot (src/config.py):
+    config/actions.yaml merged over the playbooks/scripts discover_actions()
+    finds, explicit entries winning.
+    """
+    return config_registry.snapshot().actions.get(action_name)
 
 
-def load_controllers_config():
-    with open(
-        os.path.join(os.path.dirname(__file__), "../config/controllers.yaml")
-    ) as f:
-        return yaml.safe_load(f)
+def get_controller_config(controller_name):
+    return config_registry.snapshot().controllers.get(controller_name)
 
 
-def get_controller_config(controller_name):
-    config = load_controllers_config()
-    return config["controllers"].get(controller_name)
+def get_controller_group(group_name):
+    """
+    The controller names in controllers.yaml's `controller_groups` entry
+    `group_name`, or None if there's no such group.
+    """
+    return config_registry.snapshot().controller_groups.get(group_name)
 
 
 def discover_actions():
@@ -0,0 +1,68 @@
+import logging
+from typing import Any, Dict, Optional
+
+from src.config import load_config_file
+
+logger = logging.getLogger("autoheal.alertmanager")
+
+RESOLVED = "resolved"
+
+# Route keys copied onto the resulting /webhook payload as-is, when set.
+PASSTHROUGH_FIELDS = (
+    "controller_override",
+    "dry_run",
+    "approval_required",
+    "async_mode",
+)
+
+
+class AlertmanagerMapper:
+    """
+    Turns the alerts in an Alertmanager webhook notification (or a Grafana
+    unified-alerting one, which uses the same shape) into /webhook
+    payloads, per config/alertmanager.yaml:
+      - `routes`, tried in order: the first whose `match` labels all equal
+        the alert's names the `event_type`, with `parameters` mapping
+        action parameter -> alert label;
+      - otherwise, if the alert carries an `event_type_label` label, that
+        label's value is the event_type.
+    Either way, labels starting with `parameter_label_prefix` become
+    parameters too (prefix stripped), below any a route maps explicitly.
+    Alerts that match nothing map to None.
+    """
+
+    def __init__(self, config_path: str):
+        self.config = load_config_file(config_path, "alertmanager config")
+
+    @staticmethod
+    def is_resolved(alert: dict) -> bool:
+        return alert.get("status") == RESOLVED
+
+    def map_alert(self, alert: dict) -> Optional[Dict[str, Any]]:
+        labels = alert.get("labels") or {}
+        for route in self.config.get("routes") or []:
+            match = route.get("match") or {}
+            if route.get("event_type") and all(
+                labels.get(name) == str(value) for name, value in match.items()
+            ):
+                return self._payload(route["event_type"], route, labels)
+        event_type_label = self.config.get("event_type_label")
+        if event_type_label and labels.get(event_type_label):
+            return self._payload(labels[event_type_label], {}, labels)
+        return None
+
+    def _payload(self, event_type: str, route: dict, labels: dict) -> Dict[str, Any]:
+        parameters = {}
+        prefix = self.config.get("parameter_label_prefix")
+        if prefix:
+            for name, value in labels.items():
+                if name.startswith(prefix) and len(name) > len(prefix):
+                    parameters[name.removeprefix(prefix)] = value
+        for parameter, label in (route.get("parameters") or {}).items():
+            if label in labels:
+                parameters[parameter] = labels[label]
+        payload = {"event_type": event_type, "parameters": parameters}
+        for field in PASSTHROUGH_FIELDS:
+            if field in route:
+                payload[field] = route[field]
+        return payload
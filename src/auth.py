@@ -1,22 +1,41 @@
+import asyncio
+import hashlib
+import hmac
 import logging
 import os
-import yaml
-from fastapi import Request
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+import jwt
 
+from src.config import config_registry
+from src.jwks import JWKSUnavailableError, token_needs_fetch, verify_token
+from src.ratelimit import PreAuthGuard
 from src.vault import vault_client, VaultUnavailableError
 
 logger = logging.getLogger("autoheal.auth")
 
 PUBLIC_PATHS = {"/health", "/live", "/ready"}
 
-AUTH_CONFIG_PATH = os.path.join(os.path.dirname(__file__), "../config/auth.yaml")
+# api_keys entries may name a key by its hash (see hash_api_key) rather
+# than the key itself; those start with this prefix.
+HASHED_KEY_PREFIX = "sha256:"
+# Per-deployment secret mixed into every key hash, so hashes copied out of
+# one deployment's config (or Vault) are useless against another's.
+API_KEY_PEPPER_ENV = "AUTOHEAL_API_KEY_PEPPER"
+# A bearer-token caller's identity - what API key callers are known by in
+# audit entries, approvals and job ownership - is its `sub` claim under
+# this prefix, so it can never collide with a static API key.
+TOKEN_IDENTITY_PREFIX = "jwt:"
 
 
 def _load_auth_config() -> dict:
-    with open(AUTH_CONFIG_PATH) as f:
-        return yaml.safe_load(f)
+    """config/auth.yaml, from the current config snapshot (src/config.py)."""
+    return config_registry.snapshot().auth
 
 
 def _resolve_api_keys(config: dict) -> dict:
@@ -34,34 +53,400 @@ def _resolve_api_keys(config: dict) -> dict:
     Auth silently staying open because a secrets backend hiccupped is far
     worse than a legitimate caller getting a 401 they can retry.
     """
-    api_keys = config.get("api_keys") or {}
-    vault_path = api_keys.get("vault_path") if isinstance(api_keys, dict) else None
-    if not vault_path:
-        return api_keys
     try:
-        return vault_client.get_secret(vault_path)
+        return _api_keys(config)
     except VaultUnavailableError as e:
-        logger.error(
-            f"Vault-backed api_keys unavailable ({e}); failing closed - "
-            "all API keys rejected until Vault recovers"
-        )
+        _log_api_keys_unavailable(e)
         return {}
 
 
-class APIKeyAuthMiddleware(BaseHTTPMiddleware):
-    def get_valid_api_keys(self):
-        return set(_resolve_api_keys(_load_auth_config()).keys())
+def _api_keys(config: dict) -> dict:
+    """_resolve_api_keys, raising VaultUnavailableError instead of failing closed."""
+    vault_path = _api_keys_vault_path(config)
+    if not vault_path:
+        return config.get("api_keys") or {}
+    return vault_client.get_secret(vault_path)
+
+
+def _api_keys_vault_path(config: dict) -> Optional[str]:
+    """The Vault path config's api_keys are read from, if they are."""
+    api_keys = config.get("api_keys")
+    return api_keys.get("vault_path") if isinstance(api_keys, dict) else None
+
+
+def _log_api_keys_unavailable(e: VaultUnavailableError):
+    logger.error(
+        f"Vault-backed api_keys unavailable ({e}); failing closed - "
+        "all API keys rejected until Vault recovers"
+    )
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Everything authorization needs to know about one API key, resolved
+    once per request by APIKeyAuthMiddleware and attached to it as
+    `request.state.principal` - so a handler checks permissions and
+    scope against this instead of re-reading config/auth.yaml (and
+    possibly Vault) for every check. Immutable: it's a snapshot of the
+    config as of when the request arrived.
+
+    A bearer-token caller (see resolve_token_principal) gets the same
+    Principal, with its "jwt:<sub>" identity in `api_key` - everything
+    downstream treats that as the caller's key.
+
+    `permissions` is the role's permission list compiled to the set it
+    grants (see has_permission for how entries are read);
+    `allowed_actions`/`allowed_controllers` are the key's scope (see
+    _normalize_key_entry), None meaning unrestricted.
+    """
+
+    api_key: str
+    role: Optional[str]
+    permissions: FrozenSet[str]
+    allowed_actions: Optional[FrozenSet[str]] = None
+    allowed_controllers: Optional[FrozenSet[str]] = None
+
+    def has_permission(self, permission: str) -> bool:
+        return permission in self.permissions
+
+    def allows_action(self, event_type: str) -> bool:
+        """is_action_allowed_for_key, for this principal."""
+        return self.allowed_actions is None or event_type in self.allowed_actions
+
+    def allows_controller(self, controller_name: str) -> bool:
+        """is_controller_allowed_for_key, for this principal."""
+        return (
+            self.allowed_controllers is None
+            or controller_name in self.allowed_controllers
+        )
+
+    @property
+    def is_token(self) -> bool:
+        """Whether this caller authenticated with a bearer token."""
+        return self.api_key.startswith(TOKEN_IDENTITY_PREFIX)
+
+    def scope(self) -> dict:
+        """{role, allowed_actions, allowed_controllers}, JSON-serializable."""
+        return {
+            "role": self.role,
+            "allowed_actions": _optional_sorted(self.allowed_actions),
+            "allowed_controllers": _optional_sorted(self.allowed_controllers),
+        }
+
+
+def resolve_principal(api_key: Optional[str]) -> Optional[Principal]:
+    """
+    The Principal for `api_key`, from one read of the auth config - or
+    None if it isn't a valid key, or can't be checked because the
+    Vault-backed api_keys are unavailable (see _resolve_api_keys).
+    """
+    try:
+        return _authenticate_api_key(api_key)
+    except VaultUnavailableError as e:
+        _log_api_keys_unavailable(e)
+        return None
+
+
+def _authenticate_api_key(
+    api_key: Optional[str], digest: Optional[str] = None
+) -> Optional[Principal]:
+    """
+    resolve_principal, raising VaultUnavailableError when the key can't
+    be checked - so None always means the key is definitely not valid.
+    `digest` is the key's hash_api_key(), if the caller already has it.
+    """
+    if not api_key or api_key.startswith(TOKEN_IDENTITY_PREFIX):
+        return None
+    config = _load_auth_config()
+    found, entry = _lookup_api_key(_key_index(config), api_key, digest)
+    if not found:
+        return None
+    return _principal_for_scope(config, api_key, _normalize_key_entry(entry))
+
+
+def resolve_token_principal(token: Optional[str]) -> Optional[Principal]:
+    """
+    The Principal for a bearer token, or None if tokens aren't enabled
+    (no `jwt` section in config/auth.yaml) or this one doesn't verify.
+    The token is checked locally against the issuer's cached signing
+    keys (src/jwks.py), and its claims map onto a role and scope exactly
+    like an api_keys entry - see _token_scope. The Principal's `api_key`
+    is the caller's identity, "jwt:<sub>", not the token.
+    """
+    try:
+        return _authenticate_token(token)
+    except JWKSUnavailableError as e:
+        logger.error(f"Bearer token rejected, signing keys unavailable: {e}")
+        return None
+
+
+def _authenticate_token(token: Optional[str]) -> Optional[Principal]:
+    """
+    resolve_token_principal, raising JWKSUnavailableError when the
+    issuer's signing keys can't be had - so None always means the token
+    is definitely not acceptable.
+    """
+    if not token:
+        return None
+    config = _load_auth_config()
+    jwt_config = config.get("jwt")
+    if not jwt_config:
+        return None
+    try:
+        claims = verify_token(token, jwt_config)
+    except jwt.InvalidTokenError as e:
+        logger.info(f"Rejected bearer token: {e}")
+        return None
+    scope = _token_scope(config, jwt_config, claims)
+    if scope["role"] is None:
+        logger.info(f"Bearer token for '{claims['sub']}' maps to no configured role")
+        return None
+    identity = TOKEN_IDENTITY_PREFIX + str(claims["sub"])
+    return _principal_for_scope(config, identity, scope)
+
+
+async def _authenticate_token_async(token: Optional[str]) -> Optional[Principal]:
+    """
+    _authenticate_token for the event loop: when the issuer's keys have
+    to be fetched first (see src/jwks.py::token_needs_fetch), it runs in
+    a worker thread, so a slow issuer never stalls other requests.
+    """
+    jwt_config = _load_auth_config().get("jwt") if token else None
+    if jwt_config and token_needs_fetch(token, jwt_config):
+        return await asyncio.to_thread(_authenticate_token, token)
+    return _authenticate_token(token)
+
+
+def resolve_requester(identity: str, scope: Optional[dict]) -> Optional[Principal]:
+    """
+    The Principal an approval entry's requester has now, for re-checking
+    at approve time. An API key is simply resolved again; a token
+    caller's token has usually expired by then, so its role and scope as
+    recorded at queue time (Principal.scope()) are re-evaluated against
+    the current roles instead.
+    """
+    if not identity.startswith(TOKEN_IDENTITY_PREFIX):
+        return resolve_principal(identity)
+    config = _load_auth_config()
+    if not scope or scope.get("role") not in (config.get("roles") or {}):
+        return None
+    return _principal_for_scope(config, identity, scope)
+
 
-    async def dispatch(self, request: Request, call_next):
+def _principal_for_scope(config: dict, identity: str, scope: dict) -> Principal:
+    return Principal(
+        api_key=identity,
+        role=scope["role"],
+        permissions=_compile_permissions(config, scope["role"]),
+        allowed_actions=_optional_frozenset(scope["allowed_actions"]),
+        allowed_controllers=_optional_frozenset(scope["allowed_controllers"]),
+    )
+
+
+def _token_scope(config: dict, jwt_config: dict, claims: dict) -> dict:
+    """
+    {role, allowed_actions, allowed_controllers} from a token's claims,
+    per the `jwt.claims` mapping. The role claim may be a string or a
+    list (e.g. OIDC `groups`); each value is translated through the
+    optional `jwt.role_map` and the first naming a configured role wins.
+    The scope claims work like an api_keys dict entry's lists: absent
+    means unrestricted, empty means nothing.
+    """
+    claim_names = jwt_config.get("claims") or {}
+    role_map = jwt_config.get("role_map") or {}
+    roles = config.get("roles") or {}
+    values = claims.get(claim_names.get("role", "role"))
+    if isinstance(values, str):
+        values = [values]
+    role = None
+    for value in values if isinstance(values, list) else []:
+        candidate = role_map.get(value, value)
+        if candidate in roles:
+            role = candidate
+            break
+    scope = {"role": role}
+    for name in ("allowed_actions", "allowed_controllers"):
+        value = claims.get(claim_names.get(name, name))
+        if isinstance(value, str):
+            value = [value]
+        elif value is not None and not isinstance(value, list):
+            value = []
+        scope[name] = value
+    return scope
+
+
+def _optional_frozenset(values) -> Optional[FrozenSet[str]]:
+    return frozenset(values) if values is not None else None
+
+
+def _optional_sorted(values) -> Optional[list]:
+    return sorted(values) if values is not None else None
+
+
+def hash_api_key(api_key: str, pepper: Optional[str] = None) -> str:
+    """
+    The form an api_keys entry can name a key by instead of the key
+    itself: "sha256:" + hex HMAC-SHA256 of the key, keyed with the
+    deployment's pepper (AUTOHEAL_API_KEY_PEPPER, empty if unset). Every
+    key is matched in this form, plaintext entries included.
+    """
+    if pepper is None:
+        pepper = os.environ.get(API_KEY_PEPPER_ENV, "")
+    digest = hmac.new(pepper.encode(), api_key.encode(), hashlib.sha256)
+    return HASHED_KEY_PREFIX + digest.hexdigest()
+
+
+def build_key_index(api_keys: dict) -> Dict[str, Any]:
+    """
+    {hash: entry} for every entry in api_keys, hashed or not. Built once
+    per config snapshot (see src/config.py::AuthConfig) or, for
+    Vault-backed keys, once per fetch of the secret - not per request.
+    """
+    pepper = os.environ.get(API_KEY_PEPPER_ENV, "")
+    index = {}
+    for key, entry in api_keys.items():
+        key = str(key)
+        if key.startswith(HASHED_KEY_PREFIX):
+            digest = HASHED_KEY_PREFIX + key.removeprefix(HASHED_KEY_PREFIX).lower()
+        else:
+            digest = hash_api_key(key, pepper)
+        index[digest] = entry
+    return index
+
+
+def _key_index(config: dict) -> Dict[str, Any]:
+    """
+    build_key_index() of config's api_keys: the one its snapshot was
+    loaded with, or the one built for the current fetch of Vault-backed
+    keys. Raises VaultUnavailableError like _api_keys.
+    """
+    vault_path = _api_keys_vault_path(config)
+    if vault_path:
+        return vault_client.get_derived(vault_path, build_key_index)
+    index = getattr(config, "api_key_index", None)
+    if index is None:
+        index = build_key_index(config.get("api_keys") or {})
+    return index
+
+
+def _lookup_api_key(
+    index: Dict[str, Any], api_key: str, digest: Optional[str] = None
+) -> Tuple[bool, Any]:
+    """
+    (found, api_keys entry) for `api_key` in a build_key_index() `index`,
+    where `digest` is the key's hash_api_key() if the caller already has
+    it. One hash and one dict lookup however many keys there are. The raw
+    key is never compared, only its hash, so even a hash learned from
+    lookup timing wouldn't give away the key behind it.
+    """
+    if not api_key:
+        return False, None
+    digest = digest or hash_api_key(api_key)
+    if digest not in index:
+        return False, None
+    return True, index[digest]
+
+
+class APIKeyAuthMiddleware:
+    """
+    Rejects any HTTP request without a valid x-api-key (or, when the
+    `jwt` section of config/auth.yaml enables it, a valid
+    `Authorization: Bearer` token) with 401, before routing, and attaches
+    the caller's Principal as `request.state.principal` for everything
+    else.
+
+    Plain ASGI rather than Starlette's BaseHTTPMiddleware, which runs
+    every request in an extra task and pipes every response through a
+    memory stream - overhead the probes pay on every hit, and a buffer
+    between a StreamingResponse (GET /jobs/{id}/stream) and its client.
+    This just checks the scope and hands the untouched receive/send on.
+
+    With a PreAuthGuard, the client's network is rate limited and keys
+    that just failed are turned away before any of that - see
+    src/ratelimit.py::PreAuthGuard. Only a credential that was checked
+    and found invalid counts as failed: one rejected because Vault or
+    the token issuer's keys were unavailable is just answered 401, and
+    works again as soon as they're back.
+    """
+
+    def __init__(self, app: ASGIApp, pre_auth: Optional[PreAuthGuard] = None):
+        self.app = app
+        self.pre_auth = pre_auth
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         # Allow health/liveness/readiness probes without auth - these are
         # hit by kubelet/Docker healthchecks, which don't send API keys.
-        if request.url.path in PUBLIC_PATHS:
-            return await call_next(request)
-        api_key = request.headers.get("x-api-key")
-        valid_api_keys = self.get_valid_api_keys()
-        if not api_key or api_key not in valid_api_keys:
-            return JSONResponse(status_code=401, content={"detail": "Unauthorized"})
-        return await call_next(request)
+        if scope["type"] != "http" or scope["path"] in PUBLIC_PATHS:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        api_key = headers.get("x-api-key")
+        token = None
+        if api_key is None:
+            scheme, _, value = headers.get("authorization", "").partition(" ")
+            if scheme.lower() == "bearer":
+                token = value.strip() or None
+        credential = api_key or token
+        guard = self.pre_auth
+        credential_hash = None
+        if guard is not None:
+            client = scope.get("client")
+            retry_after = guard.check_client(client[0] if client else None)
+            if retry_after is not None:
+                response = JSONResponse(
+                    status_code=429,
+                    content={"detail": "Too many requests"},
+                    headers={"Retry-After": str(int(retry_after) + 1)},
+                )
+                await response(scope, receive, send)
+                return
+            # Remembered by hash, so the guard never holds a credential.
+            credential_hash = hash_api_key(credential) if credential else None
+            if credential_hash and guard.recently_rejected(
+                credential_hash, _key_set_version()
+            ):
+                await _unauthorized(scope, receive, send)
+                return
+        try:
+            if token is not None:
+                principal = await _authenticate_token_async(token)
+            else:
+                principal = _authenticate_api_key(api_key, credential_hash)
+        except JWKSUnavailableError as e:
+            logger.error(f"Bearer token rejected, signing keys unavailable: {e}")
+            await _unauthorized(scope, receive, send)
+            return
+        except VaultUnavailableError as e:
+            _log_api_keys_unavailable(e)
+            await _unauthorized(scope, receive, send)
+            return
+        if principal is None:
+            if credential_hash:
+                # Taken after the lookup, which may have fetched the keys.
+                guard.record_rejected(credential_hash, _key_set_version())
+            await _unauthorized(scope, receive, send)
+            return
+        scope.setdefault("state", {})["principal"] = principal
+        await self.app(scope, receive, send)
+
+
+def _key_set_version() -> Tuple[int, Optional[int]]:
+    """
+    What a PreAuthGuard rejection stays valid for: the config version,
+    plus - for Vault-backed api_keys, which gain and lose keys without it
+    changing - which fetch of them the key was checked against, so a key
+    added in Vault is looked up again once the keys are next refreshed.
+    """
+    snapshot = config_registry.snapshot()
+    vault_path = _api_keys_vault_path(snapshot.auth)
+    fetch = vault_client.fetch_generation(vault_path) if vault_path else None
+    return snapshot.version, fetch
+
+
+async def _unauthorized(scope: Scope, receive: Receive, send: Send):
+    response = JSONResponse(status_code=401, content={"detail": "Unauthorized"})
+    await response(scope, receive, send)
 
 
 def _normalize_key_entry(entry) -> dict:
@@ -95,7 +480,12 @@ def _normalize_key_entry(entry) -> dict:
 
 def get_key_scope(api_key: str) -> dict:
     """Returns {role, allowed_actions, allowed_controllers} for api_key."""
-    entry = _resolve_api_keys(_load_auth_config()).get(api_key)
+    try:
+        index = _key_index(_load_auth_config())
+    except VaultUnavailableError as e:
+        _log_api_keys_unavailable(e)
+        index = {}
+    _, entry = _lookup_api_key(index, api_key)
     return _normalize_key_entry(entry)
 
 
@@ -109,8 +499,7 @@ def is_action_allowed_for_key(api_key: str, event_type: str) -> bool:
     independent of whether its role has execute_actions permission in
     the first place, which callers must check separately.
     """
-    allowed = get_key_scope(api_key)["allowed_actions"]
-    return allowed is None or event_type in allowed
+    return scope_allows_action(get_key_scope(api_key), event_type)
 
 
 def is_controller_allowed_for_key(api_key: str, controller_name: str) -> bool:
@@ -119,16 +508,47 @@ def is_controller_allowed_for_key(api_key: str, controller_name: str) -> bool:
     independent of the separate controller_override role permission,
     which gates whether a role may pick a non-default controller at all.
     """
-    allowed = get_key_scope(api_key)["allowed_controllers"]
+    return scope_allows_controller(get_key_scope(api_key), controller_name)
+
+
+def scope_allows_action(scope: dict, event_type: str) -> bool:
+    """is_action_allowed_for_key, against an already-resolved get_key_scope()."""
+    allowed = scope["allowed_actions"]
+    return allowed is None or event_type in allowed
+
+
+def scope_allows_controller(scope: dict, controller_name: str) -> bool:
+    """is_controller_allowed_for_key, against an already-resolved get_key_scope()."""
+    allowed = scope["allowed_controllers"]
     return allowed is None or controller_name in allowed
 
 
 def has_permission(role: str, permission: str) -> bool:
-    config = _load_auth_config()
-    role_perms = config["roles"].get(role, {}).get("permissions", [])
+    return _role_permission(_load_auth_config(), role, permission)
+
+
+def _role_permission(config: dict, role: str, permission: str) -> bool:
+    """
+    Whether `role` has `permission`: the first entry in its permission
+    list naming it decides - a plain string grants it, a {name: bool}
+    mapping sets it either way.
+    """
+    role_perms = _role_permission_list(config, role)
     for perm in role_perms:
         if isinstance(perm, dict) and permission in perm:
             return perm[permission]
         if perm == permission:
             return True
     return False
+
+
+def _compile_permissions(config: dict, role: str) -> FrozenSet[str]:
+    """Every permission `role` has, per _role_permission."""
+    names = set()
+    for perm in _role_permission_list(config, role):
+        names.update(perm if isinstance(perm, dict) else [perm])
+    return frozenset(name for name in names if _role_permission(config, role, name))
+
+
+def _role_permission_list(config: dict, role: str) -> list:
+    return ((config.get("roles") or {}).get(role) or {}).get("permissions") or []
@@ -0,0 +1,111 @@
+import importlib
+import logging
+from threading import Lock
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger("autoheal.backends")
+
+# Controller type -> "module:factory" of the backend that runs actions on
+# controllers of that type. Controller types not listed here (local,
+# ansible, oc, ... - anything run as a local process or over SSH) use
+# ActionExecutor's built-in process backends, which need nothing beyond
+# the standard library and so have no import worth deferring.
+BUILTIN_BACKENDS = {
+    "kubeapi": "src.kubeapi:KubeAPIBackend",
+}
+
+
+class BackendUnavailableError(Exception):
+    """
+    Raised when a controller type's backend can't be loaded - its module
+    (or a dependency of it, e.g. the kubernetes client) isn't installed,
+    or fails to import.
+    """
+
+
+class BackendRegistry:
+    """
+    Execution backends for controller types, as plugins: each is named by
+    a "module:factory" string and its module is only imported - and the
+    backend built, by calling factory(executor) - the first time a
+    controller of that type is used, or preload()ed because one is
+    configured. A process that never sees a kubeapi controller never
+    imports the kubernetes client at all.
+
+    Built-ins are BUILTIN_BACKENDS; `backends` in config/execution.yaml
+    adds (or replaces) entries, so a new controller type can be plugged
+    in without touching this package. A backend is any object with
+    run(controller, action, params, dry_run, controller_name) returning
+    an ActionExecutionResult, and optionally close(), called at shutdown.
+    """
+
+    def __init__(self, extra: Optional[Dict[str, str]] = None):
+        self.lock = Lock()
+        self._factories: Dict[str, str] = {**BUILTIN_BACKENDS, **(extra or {})}
+        self._backends: Dict[str, Any] = {}
+
+    def register(self, controller_type: str, target: str):
+        with self.lock:
+            self._factories[controller_type] = target
+
+    def handles(self, controller_type: Optional[str]) -> bool:
+        return controller_type in self._factories
+
+    def get(self, controller_type: str, executor) -> Any:
+        """
+        The backend for `controller_type`, loading it on first use. Raises
+        KeyError for a type with no registered backend, or
+        BackendUnavailableError if it can't be loaded.
+        """
+        backend = self._backends.get(controller_type)
+        if backend is not None:
+            return backend
+        target = self._factories[controller_type]
+        # Held across the import, so concurrent first uses build it once.
+        with self.lock:
+            backend = self._backends.get(controller_type)
+            if backend is None:
+                backend = self._backends[controller_type] = _load(
+                    controller_type, target
+                )(executor)
+                logger.info(f"Loaded '{controller_type}' backend from {target}")
+        return backend
+
+    def preload(self, controller_types: Iterable[Optional[str]], executor):
+        """
+        Loads the backends for `controller_types` (the configured
+        controllers' types, at startup) now, so the first action on one
+        doesn't pay for the import. A backend that can't be loaded is
+        logged, not raised - actions on its controllers will fail, others
+        are unaffected.
+        """
+        for controller_type in set(controller_types):
+            if not self.handles(controller_type):
+                continue
+            try:
+                self.get(controller_type, executor)
+            except BackendUnavailableError as e:
+                logger.error(str(e))
+
+    def loaded(self) -> Dict[str, str]:
+        """Controller type -> backend class name, for those loaded so far."""
+        return {t: type(b).__name__ for t, b in self._backends.items()}
+
+    def close(self):
+        with self.lock:
+            backends = list(self._backends.values())
+        for backend in backends:
+            close = getattr(backend, "close", None)
+            if close is not None:
+                close()
+
+
+def _load(controller_type: str, target: str):
+    module_name, _, attribute = target.partition(":")
+    try:
+        return getattr(importlib.import_module(module_name), attribute)
+    except (ImportError, AttributeError) as e:
+        raise BackendUnavailableError(
+            f"Backend '{target}' for controller type '{controller_type}' "
+            f"could not be loaded: {e}"
+        ) from e
@@ -0,0 +1,402 @@
+import datetime
+import hashlib
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import yaml
+
+logger = logging.getLogger("autoheal.config")
+
+CONFIG_DIR = os.path.join(os.path.dirname(__file__), "../config")
+PLAYBOOK_DIR = os.path.join(os.path.dirname(__file__), "../playbooks")
+SCRIPT_DIR = os.path.join(os.path.dirname(__file__), "../scripts")
+
+# How often the watcher started from src.main's lifespan checks the
+# config files for changes.
+DEFAULT_RELOAD_INTERVAL_SECONDS = 5.0
+
+# Config files whose consumers are built once, at startup, from what they
+# read then (the execution pool, rate limits, alertmanager mapping, audit
+# chain/shipper, notifiers). ConfigRegistry doesn't reload these; it only
+# warns when one changes, since the change needs a restart to apply.
+RESTART_ONLY_CONFIGS = (
+    "execution.yaml",
+    "rate_limits.yaml",
+    "alertmanager.yaml",
+    "audit.yaml",
+    "notifications.yaml",
+)
+
+
+class ConfigError(ValueError):
+    """A config file that can't be parsed or doesn't have the expected shape."""
+
+
+class FrozenDict(dict):
+    """
+    A dict that refuses to be modified. Still a real dict - `isinstance`
+    checks, `json.dumps` and `{**d}` / `d.copy()` (which return plain,
+    mutable dicts) all work as before - so code written against the
+    plain-dict config can read a snapshot unchanged, but can't alter the
+    snapshot every other request is reading too.
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("config snapshots are read-only; copy() before modifying")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+def freeze(value):
+    """Recursively converts dicts to FrozenDicts and lists to tuples."""
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+class AuthConfig(FrozenDict):
+    """
+    auth.yaml as a snapshot holds it: a FrozenDict, plus `api_key_index`,
+    its api_keys compiled to {hash: entry} (src/auth.py::build_key_index) once,
+    when the snapshot is loaded. None when the keys come from Vault -
+    those are indexed once per fetch instead - or the registry wasn't
+    given an indexer.
+    """
+
+    def __init__(self, auth: dict, api_key_index: Optional[dict] = None):
+        super().__init__(auth)
+        self.api_key_index = api_key_index
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """
+    One consistent, compiled view of config/auth.yaml, controllers.yaml
+    and actions.yaml (merged over the playbooks/scripts discovered on
+    disk). `version` counts successful loads in this process; `checksum`
+    identifies the content itself, so it matches across replicas running
+    the same config.
+    """
+
+    version: int
+    checksum: str
+    loaded_at: str
+    auth: AuthConfig
+    controllers: FrozenDict
+    actions: FrozenDict
+    # group name -> tuple of controller names (controllers.yaml
+    # `controller_groups`)
+    controller_groups: FrozenDict
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "checksum": self.checksum,
+            "loaded_at": self.loaded_at,
+            "actions": len(self.actions),
+            "controllers": len(self.controllers),
+            "controller_groups": len(self.controller_groups),
+        }
+
+
+class ConfigRegistry:
+    """
+    Owns the config the request path reads - auth, controllers and
+    actions - as one immutable ConfigSnapshot. snapshot() just returns
+    the current one: no disk access, no parsing, no locking, so a handler
+    can call it as often as it likes.
+
+    reload() re-reads everything when any source changed, validates it,
+    and swaps the new snapshot in with a single reference assignment;
+    readers see either the whole old config or the whole new one, never a
+    mix. A change that fails to parse or validate is logged and ignored -
+    the last good snapshot stays in effect - except on the very first
+    load, which raises, since there's nothing to fall back to.
+
+    Changes are detected by stat()ing the sources (following symlinks, so
+    the atomic `..data` symlink swap Kubernetes does when a ConfigMap
+    volume updates counts as a change too); start_watching() does that on
+    a background thread every few seconds.
+
+    Configs whose consumers are sized at construction - the execution
+    pool, rate limits, notifications, audit, alertmanager mapping (see
+    RESTART_ONLY_CONFIGS) - stay read once at startup, as each of those
+    classes documents. A change to one of them is logged as a warning
+    rather than applied, so it isn't mistaken for a live one.
+    """
+
+    def __init__(
+        self,
+        config_dir: str,
+        playbook_dir: str,
+        script_dir: str,
+        discover: Callable[[], dict],
+        index_api_keys: Optional[Callable[[dict], dict]] = None,
+    ):
+        self.auth_path = os.path.join(config_dir, "auth.yaml")
+        self.controllers_path = os.path.join(config_dir, "controllers.yaml")
+        self.actions_path = os.path.join(config_dir, "actions.yaml")
+        self.watched_dirs = (playbook_dir, script_dir)
+        self.restart_only_paths = tuple(
+            os.path.join(config_dir, name) for name in RESTART_ONLY_CONFIGS
+        )
+        self._restart_only_signatures: Optional[Dict[str, Any]] = None
+        self.discover = discover
+        self.index_api_keys = index_api_keys
+        self.lock = Lock()
+        self._snapshot: Optional[ConfigSnapshot] = None
+        self._signature = None
+        self._version = 0
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    def snapshot(self) -> ConfigSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            self.reload()
+            snapshot = self._snapshot
+        return snapshot
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Loads a new snapshot if any source changed since the last one (or
+        `force`). Returns whether a new snapshot was swapped in.
+        """
+        with self.lock:
+            self._warn_on_restart_only_changes()
+            signature = self._source_signature()
+            if not force and self._snapshot is not None:
+                if signature == self._signature:
+                    return False
+            try:
+                snapshot = self._load(self._version + 1)
+            except ConfigError as e:
+                if self._snapshot is None:
+                    raise
+                logger.error(
+                    f"Config reload failed, keeping version "
+                    f"{self._snapshot.version}: {e}"
+                )
+                # Don't retry the same broken files every poll.
+                self._signature = signature
+                return False
+            self._snapshot, self._signature = snapshot, signature
+            self._version = snapshot.version
+        logger.info(
+            f"Config version {snapshot.version} loaded (checksum {snapshot.checksum})"
+        )
+        return True
+
+    def start_watching(self, interval: float = DEFAULT_RELOAD_INTERVAL_SECONDS):
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval,), name="config-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watching(self):
+        if self._watcher is None:
+            return
+        self._stop.set()
+        self._watcher.join(timeout=5)
+        self._watcher = None
+
+    def _watch(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.reload()
+            except Exception as e:
+                logger.error(f"Config watcher error: {e}")
+
+    def _source_signature(self) -> Tuple:
+        paths = (self.auth_path, self.controllers_path, self.actions_path)
+        return tuple(_stat_signature(path) for path in paths + self.watched_dirs)
+
+    def _warn_on_restart_only_changes(self):
+        signatures = {p: _stat_signature(p) for p in self.restart_only_paths}
+        previous = self._restart_only_signatures
+        if previous is not None:
+            for path, signature in signatures.items():
+                if signature != previous[path]:
+                    logger.warning(
+                        f"{path} changed; it's only read at startup, so the "
+                        f"change takes effect on the next restart"
+                    )
+        self._restart_only_signatures = signatures
+
+    def _load(self, version: int) -> ConfigSnapshot:
+        digest = hashlib.sha256()
+        auth = _read_yaml(self.auth_path, digest)
+        controllers_file = _read_yaml(self.controllers_path, digest)
+        actions_file = _read_yaml(self.actions_path, digest)
+        discovered = self.discover()
+        digest.update(repr(sorted(discovered.items())).encode())
+
+        if not isinstance(auth.get("roles"), dict):
+            raise ConfigError(f"{self.auth_path}: 'roles' must be a mapping")
+        if not isinstance(auth.get("api_keys"), dict):
+            raise ConfigError(f"{self.auth_path}: 'api_keys' must be a mapping")
+        jwt_config = auth.get("jwt")
+        if jwt_config is not None and not (
+            isinstance(jwt_config, dict) and jwt_config.get("jwks_url")
+        ):
+            raise ConfigError(
+                f"{self.auth_path}: 'jwt' must be a mapping with jwks_url"
+            )
+        controllers = _section(controllers_file, "controllers", self.controllers_path)
+        groups = _controller_groups(
+            controllers_file, controllers, self.controllers_path
+        )
+        explicit_actions = _section(actions_file, "actions", self.actions_path)
+        # Explicit entries in config/actions.yaml win over discovered ones.
+        actions = {**discovered, **explicit_actions}
+        for name, action in actions.items():
+            controller = action.get("default_controller")
+            if (
+                controller is not None
+                and controller not in controllers
+                and controller not in groups
+            ):
+                logger.warning(
+                    f"Action '{name}' defaults to unknown controller '{controller}'"
+                )
+
+        return ConfigSnapshot(
+            version=version,
+            checksum=digest.hexdigest()[:16],
+            loaded_at=datetime.datetime.now(datetime.UTC)
+            .isoformat()
+            .replace("+00:00", "Z"),
+            auth=self._compile_auth(freeze(auth)),
+            controllers=freeze(controllers),
+            actions=freeze(actions),
+            controller_groups=freeze(groups),
+        )
+
+    def _compile_auth(self, auth: FrozenDict) -> AuthConfig:
+        api_keys = auth["api_keys"]
+        if self.index_api_keys is None or api_keys.get("vault_path"):
+            return AuthConfig(auth)
+        return AuthConfig(auth, FrozenDict(self.index_api_keys(api_keys)))
+
+
+def load_config_file(path: Optional[str], description: str) -> dict:
+    """
+    The YAML mapping in `path`, for the config files a component reads
+    once, when it's built (rate_limits.yaml, execution.yaml,
+    alertmanager.yaml) rather than through ConfigRegistry. {} if there's
+    no such file; also {} - logged, naming it as `description` - if it
+    can't be read or parsed, so the component runs on its defaults
+    instead of failing startup.
+    """
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            data = yaml.safe_load(f) or {}
+    except (yaml.YAMLError, OSError) as e:
+        logger.error(f"Failed to load {description}, using defaults: {e}")
+        return {}
+    if not isinstance(data, dict):
+        logger.error(f"Failed to load {description}, using defaults: not a mapping")
+        return {}
+    return data
+
+
+def _stat_signature(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _read_yaml(path: str, digest) -> dict:
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except OSError as e:
+        raise ConfigError(f"{path}: {e}") from e
+    digest.update(raw)
+    try:
+        data = yaml.safe_load(raw)
+    except yaml.YAMLError as e:
+        raise ConfigError(f"{path}: {e}") from e
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        raise ConfigError(f"{path}: expected a mapping at the top level")
+    return data
+
+
+def _section(data: dict, key: str, path: str) -> Dict[str, dict]:
+    section = data.get(key) or {}
+    if not isinstance(section, dict):
+        raise ConfigError(f"{path}: '{key}' must be a mapping")
+    for name, entry in section.items():
+        if not isinstance(entry, dict):
+            raise ConfigError(f"{path}: {key}.{name} must be a mapping")
+    return section
+
+
+def _controller_groups(data: dict, controllers: dict, path: str) -> Dict[str, list]:
+    """
+    controllers.yaml's `controller_groups`: each a non-empty list of known
+    controllers, under a name that isn't itself a controller's. A group
+    naming a controller that doesn't exist is an error rather than
+    skipped - a fleet-wide fix silently missing one DC is worse than a
+    rejected config change.
+    """
+    groups = data.get("controller_groups") or {}
+    if not isinstance(groups, dict):
+        raise ConfigError(f"{path}: 'controller_groups' must be a mapping")
+    for name, members in groups.items():
+        if name in controllers:
+            raise ConfigError(
+                f"{path}: controller_groups.{name} has the name of a controller"
+            )
+        if not isinstance(members, list) or not members:
+            raise ConfigError(
+                f"{path}: controller_groups.{name} must be a non-empty list"
+            )
+        unknown = [m for m in members if m not in controllers]
+        if unknown:
+            raise ConfigError(
+                f"{path}: controller_groups.{name} names unknown controller(s) "
+                f"{unknown}"
+            )
+    return groups
+
+
+def _discover_actions() -> dict:
+    # Imported here: src.actions reads its config through this module.
+    from src.actions import discover_actions
+
+    return discover_actions()
+
+
+def _index_api_keys(api_keys: dict) -> dict:
+    # Imported here: src.auth reads its config through this module.
+    from src.auth import build_key_index
+
+    return build_key_index(api_keys)
+
+
+config_registry = ConfigRegistry(
+    CONFIG_DIR, PLAYBOOK_DIR, SCRIPT_DIR, _discover_actions, _index_api_keys
+)
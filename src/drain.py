@@ -0,0 +1,65 @@
+import itertools
+from concurrent.futures import Future
+from threading import Event, Lock
+from typing import Dict, List
+
+from src.pool import PoolClosedError
+
+
+class ShutdownDrain:
+    """
+    Shutdown state for the API process, and the executions it still has
+    to account for when it stops.
+
+    Once begin() is called the process is draining: /ready reports not
+    ready and nothing new is admitted, while ExecutionPool.drain() gives
+    running work its grace period. Every admitted execution is track()ed
+    with the audit entry it would have written, and forgotten when it
+    completes - unless the pool failed it with PoolClosedError, never
+    having started it - so whatever interrupted() returns after the
+    grace period is exactly the work a rolling update would otherwise
+    cut off with no audit record at all.
+
+    Like CooldownTracker, in-memory and per-process.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self._draining = Event()
+        self._ids = itertools.count()
+        self._in_flight: Dict[int, dict] = {}
+
+    @property
+    def draining(self) -> bool:
+        return self._draining.is_set()
+
+    def begin(self) -> bool:
+        """Starts draining; returns False if it already had."""
+        with self.lock:
+            if self._draining.is_set():
+                return False
+            self._draining.set()
+            return True
+
+    def track(self, future: Future, audit_entry: dict):
+        with self.lock:
+            entry_id = next(self._ids)
+            self._in_flight[entry_id] = audit_entry
+        future.add_done_callback(lambda done: self._forget(entry_id, done))
+
+    def _forget(self, entry_id: int, future: Future):
+        if not future.cancelled() and isinstance(future.exception(), PoolClosedError):
+            # Cut off by shutdown before it ever ran: still interrupted().
+            return
+        with self.lock:
+            self._in_flight.pop(entry_id, None)
+
+    def interrupted(self) -> List[dict]:
+        """
+        Audit entries of the tracked executions that haven't completed,
+        in admission order. Each is returned once.
+        """
+        with self.lock:
+            entries = [self._in_flight[i] for i in sorted(self._in_flight)]
+            self._in_flight.clear()
+            return entries
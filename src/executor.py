@@ -1,16 +1,18 @@
-import datetime
 import json
 import os
 import shlex
 import subprocess
 import tempfile
+import time
 import logging
-from typing import Dict, Any, List, Optional, Tuple
-
-import kubernetes
-import kubernetes.config
-from kubernetes.client.exceptions import ApiException
-
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from src.backends import BackendRegistry, BackendUnavailableError
+from src.config import load_config_file
+from src.process import AsyncProcessRunner, DEFAULT_MAX_OUTPUT_BYTES, output_sink
+from src.retry import RetryPolicy, SSH_CONNECTION, VAULT_UNAVAILABLE
+from src.pool import slot_released, sleep_without_slot
+from src.sshmux import SSHConnectError, SSHMultiplexer
 from src.vault import resolve_vault_ref, VaultUnavailableError
 
 logger = logging.getLogger("autoheal.executor")
@@ -19,21 +21,22 @@ logger = logging.getLogger("autoheal.executor")
 # remote command that ran and returned this code itself.
 SSH_CONNECTION_FAILURE_EXIT_CODE = 255
 
-KUBE_RESTART_ANNOTATION = "kubectl.kubernetes.io/restartedAt"
+SSH_OPTIONS = [
+    "-o",
+    "BatchMode=yes",
+    "-o",
+    "StrictHostKeyChecking=accept-new",
+    "-o",
+    "ConnectTimeout=10",
+]
+
+# How long a playbook/script/command/remote run may take before it's killed.
+PROCESS_TIMEOUT_SECONDS = 600
 
-# The closed set of kube_action verbs this executor knows how to run.
-# Deliberately narrow: each one is one specific, reviewed API operation,
-# not a generic "patch arbitrary JSON" escape hatch - new verbs get added
-# here on purpose, not opened up by config alone.
-KUBE_ACTION_VERBS = {
-    "rollout_restart",
-    "delete_pod",
-    "scale",
-    "cordon_node",
-    "uncordon_node",
-    "drain_node",
-    "patch_configmap",
-}
+# Process backends for run_playbook/run_script/run_command/run_remote,
+# selected by `executor.backend` in config/execution.yaml.
+SUBPROCESS_BACKEND = "subprocess"
+ASYNCIO_BACKEND = "asyncio"
 
 
 class ActionExecutionResult:
@@ -44,24 +47,114 @@ class ActionExecutionResult:
         stderr: str,
         exit_code: int,
         error: Optional[str] = None,
+        error_class: Optional[str] = None,
     ):
         self.success = success
         self.stdout = stdout
         self.stderr = stderr
         self.exit_code = exit_code
         self.error = error
+        # For a transient failure, which kind (see src/retry.py) - what a
+        # retry policy decides on.
+        self.error_class = error_class
+        # Set by ActionExecutor.run_with_retries: one record per attempt.
+        self.attempts: Optional[List[dict]] = None
 
     def as_dict(self):
-        return {
+        result = {
             "success": self.success,
             "stdout": self.stdout,
             "stderr": self.stderr,
             "exit_code": self.exit_code,
             "error": self.error,
         }
+        if self.attempts is not None:
+            result["attempts"] = self.attempts
+        return result
 
 
 class ActionExecutor:
+    """
+    Runs actions. Playbooks, scripts, commands and remote (SSH) actions
+    are all external processes, run by one of two interchangeable
+    backends (`executor.backend` in config/execution.yaml):
+    - "subprocess" (the default): subprocess.run(capture_output=True),
+      which buffers each process's whole output until it exits.
+    - "asyncio": src/process.py::AsyncProcessRunner - output read
+      incrementally into bounded buffers (`executor.max_output_bytes` per
+      stream), timeouts enforced on one shared event loop.
+    Both produce the same ActionExecutionResult for the same outcome.
+
+    Remote actions can share one persistent SSH connection per
+    controller (src/sshmux.py, the `ssh` section).
+
+    Controller types with a backend of their own - kubeapi's kube_actions
+    (src/kubeapi.py), or anything plugged in through `backends` - go
+    through src/backends.py::BackendRegistry, which imports each one only
+    once it's needed. close() releases SSH connections and whatever the
+    loaded backends hold.
+
+    run_with_retries() retries transient failures (src/retry.py) under
+    the `retry` policy of execution.yaml, the controller and the action.
+    """
+
+    def __init__(self, config_path: Optional[str] = None):
+        full_config = load_config_file(config_path, "executor config")
+        self.config = full_config
+        config = full_config.get("executor") or {}
+        self.backend = config.get("backend", SUBPROCESS_BACKEND)
+        if self.backend not in (SUBPROCESS_BACKEND, ASYNCIO_BACKEND):
+            logger.error(
+                f"Unknown executor backend '{self.backend}', "
+                f"using '{SUBPROCESS_BACKEND}'"
+            )
+            self.backend = SUBPROCESS_BACKEND
+        self._async_runner = (
+            AsyncProcessRunner(
+                int(config.get("max_output_bytes", DEFAULT_MAX_OUTPUT_BYTES))
+            )
+            if self.backend == ASYNCIO_BACKEND
+            else None
+        )
+        self.ssh_mux = SSHMultiplexer(full_config.get("ssh"))
+        self.controller_backends = BackendRegistry(full_config.get("backends"))
+        self.retry_defaults = full_config.get("retry") or {}
+
+    def close(self):
+        """
+        Closes SSH master connections, the loaded backends' resources
+        (e.g. cached Kubernetes API clients) and the asyncio backend's
+        event loop and its thread; call once, at shutdown.
+        """
+        self.controller_backends.close()
+        self.ssh_mux.close()
+        if self._async_runner is not None:
+            self._async_runner.close()
+
+    def _run_process(self, cmd: List[str]) -> subprocess.CompletedProcess:
+        """
+        Runs `cmd` to completion on the configured backend. Raises
+        subprocess.TimeoutExpired past PROCESS_TIMEOUT_SECONDS, either way.
+
+        If an output_sink is set (see src/process.py), the asyncio backend
+        feeds it each line live; subprocess.run only hands output back once
+        the process has exited, so with that backend the lines are replayed
+        to the sink then, stdout before stderr.
+        """
+        sink = output_sink.get()
+        if self._async_runner is not None:
+            return self._async_runner.run(cmd, PROCESS_TIMEOUT_SECONDS, on_line=sink)
+        proc = subprocess.run(
+            cmd, capture_output=True, text=True, timeout=PROCESS_TIMEOUT_SECONDS
+        )
+        if sink is not None:
+            for stream in ("stdout", "stderr"):
+                text = getattr(proc, stream, None)
+                if isinstance(text, str):
+                    for line in text.splitlines():
+                        sink(stream, line)
+        return proc
+
     def run_playbook(
         self,
         playbook_path: str,
@@ -87,7 +180,7 @@ class ActionExecutor:
             cmd += ["--extra-vars", extra_vars_str]
         try:
             logger.info(f"Running playbook: {cmd}")
-            proc = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
+            proc = self._run_process(cmd)
             return ActionExecutionResult(
                 success=proc.returncode == 0,
                 stdout=proc.stdout,
@@ -116,7 +209,7 @@ class ActionExecutor:
             cmd += args
         try:
             logger.info(f"Running script: {cmd}")
-            proc = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
+            proc = self._run_process(cmd)
             return ActionExecutionResult(
                 success=proc.returncode == 0,
                 stdout=proc.stdout,
@@ -155,7 +248,7 @@ class ActionExecutor:
         try:
             cmd = shlex.split(rendered)
             logger.info(f"Running command: {cmd}")
-            proc = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
+            proc = self._run_process(cmd)
             return ActionExecutionResult(
                 success=proc.returncode == 0,
                 stdout=proc.stdout,
@@ -287,190 +380,218 @@ class ActionExecutor:
                 success=True, stdout=msg, stderr="", exit_code=0, error=None
             )
 
+        key = _LazySSHKey(self._resolve_ssh_key, ssh_key)
         try:
-            resolved_ssh_key, ssh_key_tmp_path = self._resolve_ssh_key(ssh_key)
-        except VaultUnavailableError as e:
-            logger.error(f"Failed to resolve SSH key from Vault: {e}")
-            return ActionExecutionResult(
-                False, "", "", 1, error=f"Failed to resolve SSH key from Vault: {e}"
+            return self._run_remote_command(
+                f"{ssh_user}@{host}", remote_cmd, ssh_key, key
             )
+        finally:
+            key.close()
 
-        try:
-            ssh_cmd = [
-                "ssh",
-                "-o",
-                "BatchMode=yes",
-                "-o",
-                "StrictHostKeyChecking=accept-new",
-                "-o",
-                "ConnectTimeout=10",
-            ]
-            if resolved_ssh_key:
-                ssh_cmd += ["-i", resolved_ssh_key]
-            ssh_cmd += [f"{ssh_user}@{host}", remote_cmd]
-
+    def _run_remote_command(
+        self,
+        destination: str,
+        remote_cmd: str,
+        ssh_key: Optional[str],
+        key: "_LazySSHKey",
+    ) -> ActionExecutionResult:
+        if self.ssh_mux.enabled:
             try:
-                logger.info(
-                    f"Running remote command on {ssh_user}@{host}: {remote_cmd}"
+                control_path = self.ssh_mux.master(
+                    destination, ssh_key, SSH_OPTIONS, key
                 )
-                proc = subprocess.run(
-                    ssh_cmd, capture_output=True, text=True, timeout=600
-                )
-                if proc.returncode == SSH_CONNECTION_FAILURE_EXIT_CODE:
-                    detail = proc.stderr.strip() or "SSH exited with code 255"
-                    logger.error(
-                        f"SSH connection to {ssh_user}@{host} failed: {detail}"
-                    )
-                    return ActionExecutionResult(
-                        False,
-                        proc.stdout,
-                        proc.stderr,
-                        proc.returncode,
-                        error=f"SSH connection to {ssh_user}@{host} failed: {detail}",
-                    )
+            except VaultUnavailableError as e:
+                logger.error(f"Failed to resolve SSH key from Vault: {e}")
                 return ActionExecutionResult(
-                    success=proc.returncode == 0,
-                    stdout=proc.stdout,
-                    stderr=proc.stderr,
-                    exit_code=proc.returncode,
+                    False,
+                    "",
+                    "",
+                    1,
+                    error=f"Failed to resolve SSH key from Vault: {e}",
+                    error_class=VAULT_UNAVAILABLE,
                 )
-            except subprocess.TimeoutExpired as e:
-                logger.error(f"Remote execution on {host} timed out: {e}")
+            except SSHConnectError as e:
+                logger.error(str(e))
                 return ActionExecutionResult(
-                    False, "", "", 1, error=f"Remote execution timed out: {e}"
+                    False,
+                    "",
+                    "",
+                    SSH_CONNECTION_FAILURE_EXIT_CODE,
+                    error=str(e),
+                    error_class=SSH_CONNECTION,
                 )
-            except Exception as e:
-                logger.error(f"Remote execution on {host} failed: {e}")
-                return ActionExecutionResult(False, "", "", 1, error=str(e))
-        finally:
-            if ssh_key_tmp_path:
-                try:
-                    os.unlink(ssh_key_tmp_path)
-                except OSError:
-                    pass
-
-    # ---------------------------------------------------------------
-    # Direct Kubernetes API execution (kube_action). Unlike everything
-    # above, this never shells out or SSHes anywhere - it talks to the
-    # cluster's API server directly using the official kubernetes client,
-    # with credentials scoped as narrowly as a RBAC Role allows rather
-    # than a full kubeconfig with implicit broader access.
-    # ---------------------------------------------------------------
-
-    def _build_kube_configuration(
-        self, controller: dict
-    ) -> Tuple["kubernetes.client.Configuration", List[str]]:
-        """
-        Builds a kubernetes.client.Configuration for `controller`, plus a
-        list of tempfile paths the caller must delete once done with it.
-        Precedence: in_cluster > kubeconfig > api_server+token(+ca_cert).
-
-        Raises VaultUnavailableError if a vault: reference can't be
-        resolved, or ValueError if the controller has none of the above
-        configured. Either way, whatever tempfiles were already created
-        before the failure are cleaned up here - the caller never has to
-        clean up after a raised exception from this method.
-        """
-        cleanup_paths: List[str] = []
+            if control_path is not None:
+                # Sessions on the master don't need the key file.
+                key.close()
+                ssh_cmd = ["ssh", *SSH_OPTIONS]
+                # Should the master die this very moment ssh connects
+                # directly instead, which needs the key - only a plain file
+                # is worth passing for that.
+                if ssh_key and not ssh_key.startswith("vault:"):
+                    ssh_cmd += ["-i", ssh_key]
+                ssh_cmd += [
+                    "-o",
+                    "ControlMaster=no",
+                    "-o",
+                    f"ControlPath={control_path}",
+                    destination,
+                    remote_cmd,
+                ]
+                result = self._run_ssh(ssh_cmd, destination, remote_cmd)
+                if result.exit_code == SSH_CONNECTION_FAILURE_EXIT_CODE:
+                    # Never retryable (the command may have run), but the
+                    # next action checks the master instead of trusting it.
+                    self.ssh_mux.forget(control_path)
+                return result
+
         try:
-            if controller.get("in_cluster"):
-                configuration = kubernetes.client.Configuration()
-                kubernetes.config.load_incluster_config(
-                    client_configuration=configuration
-                )
-                return configuration, cleanup_paths
-
-            kubeconfig = controller.get("kubeconfig")
-            if kubeconfig:
-                resolved_path, tmp = self._resolve_secret_file(kubeconfig, "kubeconfig")
-                if tmp:
-                    cleanup_paths.append(tmp)
-                configuration = kubernetes.client.Configuration()
-                kubernetes.config.load_kube_config(
-                    config_file=resolved_path, client_configuration=configuration
+            resolved_ssh_key, _ = key()
+        except VaultUnavailableError as e:
+            logger.error(f"Failed to resolve SSH key from Vault: {e}")
+            return ActionExecutionResult(
+                False,
+                "",
+                "",
+                1,
+                error=f"Failed to resolve SSH key from Vault: {e}",
+                error_class=VAULT_UNAVAILABLE,
+            )
+
+        ssh_cmd = ["ssh", *SSH_OPTIONS]
+        if resolved_ssh_key:
+            ssh_cmd += ["-i", resolved_ssh_key]
+        ssh_cmd += [destination, remote_cmd]
+        return self._run_ssh(ssh_cmd, destination, remote_cmd)
+
+    def _run_ssh(
+        self, ssh_cmd: List[str], destination: str, remote_cmd: str
+    ) -> ActionExecutionResult:
+        try:
+            logger.info(f"Running remote command on {destination}: {remote_cmd}")
+            proc = self._run_process(ssh_cmd)
+            if proc.returncode == SSH_CONNECTION_FAILURE_EXIT_CODE:
+                detail = proc.stderr.strip() or "SSH exited with code 255"
+                logger.error(f"SSH connection to {destination} failed: {detail}")
+                return ActionExecutionResult(
+                    False,
+                    proc.stdout,
+                    proc.stderr,
+                    proc.returncode,
+                    error=f"SSH connection to {destination} failed: {detail}",
                 )
-                return configuration, cleanup_paths
-
-            api_server = controller.get("api_server")
-            token_ref = controller.get("token")
-            if api_server and token_ref:
-                token_path, token_tmp = self._resolve_secret_file(token_ref, "token")
-                if token_tmp:
-                    cleanup_paths.append(token_tmp)
-                with open(token_path) as f:
-                    token_value = f.read().strip()
-
-                configuration = kubernetes.client.Configuration()
-                configuration.host = api_server
-                configuration.api_key = {"authorization": token_value}
-                configuration.api_key_prefix = {"authorization": "Bearer"}
-
-                ca_cert_ref = controller.get("ca_cert")
-                if ca_cert_ref:
-                    ca_path, ca_tmp = self._resolve_secret_file(ca_cert_ref, "ca_cert")
-                    if ca_tmp:
-                        cleanup_paths.append(ca_tmp)
-                    configuration.ssl_ca_cert = ca_path
-                else:
-                    logger.warning(
-                        "kubeapi controller has no ca_cert configured; "
-                        "TLS verification will be disabled for this call."
-                    )
-                    configuration.verify_ssl = False
-                return configuration, cleanup_paths
-        except Exception:
-            for p in cleanup_paths:
-                try:
-                    os.unlink(p)
-                except OSError:
-                    pass
-            raise
+            return ActionExecutionResult(
+                success=proc.returncode == 0,
+                stdout=proc.stdout,
+                stderr=proc.stderr,
+                exit_code=proc.returncode,
+            )
+        except subprocess.TimeoutExpired as e:
+            logger.error(f"Remote execution on {destination} timed out: {e}")
+            return ActionExecutionResult(
+                False, "", "", 1, error=f"Remote execution timed out: {e}"
+            )
+        except Exception as e:
+            logger.error(f"Remote execution on {destination} failed: {e}")
+            return ActionExecutionResult(False, "", "", 1, error=str(e))
 
-        raise ValueError(
-            "Controller has no usable kubeapi credentials configured "
-            "(need one of: in_cluster, kubeconfig, or api_server+token)."
+    def retry_policy(self, controller: dict, action: dict) -> RetryPolicy:
+        """
+        The retry policy for `action` on `controller`: `retry` in
+        config/execution.yaml, overridden key by key by the controller's
+        own `retry`, then the action's.
+        """
+        return RetryPolicy.from_config(
+            self.retry_defaults, controller.get("retry"), action.get("retry")
         )
 
-    @staticmethod
-    def _render_kube_action_fields(
-        action: dict, params: Dict[str, Any]
-    ) -> Dict[str, Any]:
+    def run_with_retries(
+        self,
+        controller: dict,
+        action: dict,
+        attempt_fn: Callable[[], Optional[ActionExecutionResult]],
+        dry_run: bool = False,
+    ):
         """
-        Renders {param} templates in a kube_action's name/namespace/
-        node_name/data fields. `resource` is a fixed choice (deployment,
-        statefulset, ...), not user data, so it's passed through as-is.
-        Raises KeyError/IndexError for a missing parameter, same
-        convention as _build_remote_command/run_command.
+        Runs `attempt_fn` - one attempt at `action` on `controller` - and,
+        while it fails with an error class its retry_policy retries, runs
+        it again after the policy's backoff. Returns the last attempt's
+        result with every attempt recorded in its `attempts` (so in the
+        execution's one audit entry), or whatever attempt_fn returned if
+        that isn't a result at all. Dry runs get exactly one attempt, and
+        so does one that gave up its pool slot to wait (a kube_action's
+        `wait`) - it got well past starting.
+
+        During the backoff the execution gives its worker and controller
+        slots back to queued work and queues for them again afterwards
+        (see src/pool.py::sleep_without_slot), so a throttling controller
+        gets no more concurrent work than before and a sleeping retry
+        holds up nobody. If the pool starts draining meanwhile, the last
+        failure is final.
         """
-        rendered: Dict[str, Any] = {}
-        if "resource" in action:
-            rendered["resource"] = action["resource"]
-        if "name" in action:
-            rendered["name"] = action["name"].format(**params)
-        if "namespace" in action:
-            rendered["namespace"] = action["namespace"].format(**params)
-        if "node_name" in action:
-            rendered["node_name"] = action["node_name"].format(**params)
-        if "data" in action:
-            rendered["data"] = {
-                k: str(v).format(**params) for k, v in action["data"].items()
+        policy = self.retry_policy(controller, action)
+        if dry_run or policy.max_attempts == 1:
+            return attempt_fn()
+        attempts = []
+        attempt = 0
+        while True:
+            attempt += 1
+            started = time.monotonic()
+            result = attempt_fn()
+            if not isinstance(result, ActionExecutionResult):
+                return result
+            record = {
+                "attempt": attempt,
+                "success": result.success,
+                "exit_code": result.exit_code,
+                "error": result.error,
+                "error_class": result.error_class,
+                "duration_seconds": round(time.monotonic() - started, 3),
             }
-        return rendered
-
-    @staticmethod
-    def _describe_kube_action(verb: str, rendered: Dict[str, Any]) -> str:
-        if verb in ("cordon_node", "uncordon_node", "drain_node"):
-            return f"{verb} node '{rendered.get('node_name')}'"
-        if verb == "patch_configmap":
-            return (
-                f"patch_configmap '{rendered.get('name')}' in namespace "
-                f"'{rendered.get('namespace')}' with {rendered.get('data')}"
+            attempts.append(record)
+            result.attempts = attempts
+            if (
+                result.success
+                or slot_released()
+                or not policy.should_retry(result.error_class, attempt)
+            ):
+                return result
+            delay = policy.backoff_seconds(attempt)
+            record["retry_in_seconds"] = round(delay, 3)
+            logger.warning(
+                f"Attempt {attempt}/{policy.max_attempts} failed "
+                f"({result.error_class}: {result.error}); retrying in {delay:.1f}s"
             )
-        resource = rendered.get("resource", "deployment")
-        return (
-            f"{verb} {resource} '{rendered.get('name')}' in namespace "
-            f"'{rendered.get('namespace')}'"
-        )
+            if not sleep_without_slot(delay):
+                record.pop("retry_in_seconds")
+                return result
+
+    def controller_backend(self, controller_type: str):
+        """
+        The backend for `controller_type` (see BackendRegistry.get),
+        imported and built on first use.
+        """
+        return self.controller_backends.get(controller_type, self)
+
+    def run_on_backend(
+        self,
+        controller_type: str,
+        controller: dict,
+        action: dict,
+        params: Optional[Dict[str, Any]] = None,
+        dry_run: bool = False,
+        controller_name: Optional[str] = None,
+    ) -> ActionExecutionResult:
+        """
+        Runs `action` on `controller` through its type's registered
+        backend. A backend that can't be loaded fails the action, like
+        any other execution error.
+        """
+        try:
+            backend = self.controller_backend(controller_type)
+        except BackendUnavailableError as e:
+            logger.error(str(e))
+            return ActionExecutionResult(False, "", "", 1, error=str(e))
+        return backend.run(controller, action, params or {}, dry_run, controller_name)
 
     def run_kube_action(
         self,
@@ -478,223 +599,40 @@ class ActionExecutor:
         action: dict,
         params: Optional[Dict[str, Any]] = None,
         dry_run: bool = False,
+        controller_name: Optional[str] = None,
     ) -> ActionExecutionResult:
         """
         Execute a structured Kubernetes API operation (`kube_action` in
-        config/actions.yaml) directly against the cluster's API server -
-        no SSH, no shelling out to oc/kubectl. See KUBE_ACTION_VERBS for
-        the full set of supported operations.
+        config/actions.yaml) - see src/kubeapi.py::KubeAPIBackend.run.
         """
-        params = params or {}
-        verb = action.get("kube_action")
-        if verb not in KUBE_ACTION_VERBS:
-            return ActionExecutionResult(
-                False, "", "", 1, error=f"Unknown kube_action '{verb}'"
-            )
+        return self.run_on_backend(
+            "kubeapi", controller, action, params, dry_run, controller_name
+        )
 
-        try:
-            rendered = self._render_kube_action_fields(action, params)
-        except (KeyError, IndexError) as e:
-            return ActionExecutionResult(
-                False, "", "", 1, error=f"Missing parameter {e} for kube_action"
-            )
 
-        if dry_run:
-            msg = f"[DRY-RUN] Would {self._describe_kube_action(verb, rendered)}"
-            logger.info(msg)
-            return ActionExecutionResult(
-                success=True, stdout=msg, stderr="", exit_code=0, error=None
-            )
+class _LazySSHKey:
+    """
+    One run_remote call's SSH key: resolved (fetched from Vault, for a
+    vault: reference) on first use and then reused, so a master that
+    fails to start hands its key straight on to the direct connection.
+    close() deletes its tempfile, if it made one.
+    """
 
-        try:
-            configuration, cleanup_paths = self._build_kube_configuration(controller)
-        except VaultUnavailableError as e:
-            return ActionExecutionResult(
-                False,
-                "",
-                "",
-                1,
-                error=f"Failed to resolve kube credentials from Vault: {e}",
-            )
-        except Exception as e:
-            return ActionExecutionResult(
-                False, "", "", 1, error=f"Failed to build Kubernetes client config: {e}"
-            )
+    def __init__(self, resolve, ssh_key: Optional[str]):
+        self._resolve = resolve
+        self._ssh_key = ssh_key
+        self._resolved: Optional[Tuple[Optional[str], Optional[str]]] = None
 
-        try:
-            api_client = kubernetes.client.ApiClient(configuration)
-            handler = getattr(self, f"_kube_{verb}")
-            logger.info(
-                f"Running kube_action: {self._describe_kube_action(verb, rendered)}"
-            )
-            return handler(api_client, rendered)
-        except ApiException as e:
-            logger.error(f"Kubernetes API error for kube_action '{verb}': {e}")
-            return ActionExecutionResult(
-                False,
-                "",
-                str(e.body or ""),
-                e.status or 1,
-                error=f"Kubernetes API error: {e.reason or e}",
-            )
-        except Exception as e:
-            logger.error(f"kube_action '{verb}' failed: {e}")
-            return ActionExecutionResult(False, "", "", 1, error=str(e))
-        finally:
-            for p in cleanup_paths:
-                try:
-                    os.unlink(p)
-                except OSError:
-                    pass
-
-    def _kube_rollout_restart(
-        self, api_client, rendered: dict
-    ) -> ActionExecutionResult:
-        apps = kubernetes.client.AppsV1Api(api_client)
-        resource = rendered.get("resource", "deployment")
-        name = rendered["name"]
-        namespace = rendered["namespace"]
-        restarted_at = datetime.datetime.now(datetime.UTC).isoformat()
-        patch_body = {
-            "spec": {
-                "template": {
-                    "metadata": {"annotations": {KUBE_RESTART_ANNOTATION: restarted_at}}
-                }
-            }
-        }
-        patch_fn = {
-            "deployment": apps.patch_namespaced_deployment,
-            "statefulset": apps.patch_namespaced_stateful_set,
-            "daemonset": apps.patch_namespaced_daemon_set,
-        }.get(resource)
-        if patch_fn is None:
-            return ActionExecutionResult(
-                False,
-                "",
-                "",
-                1,
-                error=f"Unsupported resource '{resource}' for rollout_restart",
-            )
-        patch_fn(name, namespace, patch_body)
-        summary = {
-            "resource": resource,
-            "name": name,
-            "namespace": namespace,
-            "restarted_at": restarted_at,
-        }
-        return ActionExecutionResult(True, json.dumps(summary), "", 0, error=None)
-
-    def _kube_delete_pod(self, api_client, rendered: dict) -> ActionExecutionResult:
-        core = kubernetes.client.CoreV1Api(api_client)
-        name = rendered["name"]
-        namespace = rendered["namespace"]
-        core.delete_namespaced_pod(name, namespace)
-        summary = {"pod": name, "namespace": namespace, "action": "deleted"}
-        return ActionExecutionResult(True, json.dumps(summary), "", 0, error=None)
-
-    def _kube_scale(self, api_client, rendered: dict) -> ActionExecutionResult:
-        apps = kubernetes.client.AppsV1Api(api_client)
-        resource = rendered.get("resource", "deployment")
-        name = rendered["name"]
-        namespace = rendered["namespace"]
-        try:
-            replicas = int(rendered["data"]["replicas"])
-        except (KeyError, TypeError, ValueError):
-            return ActionExecutionResult(
-                False, "", "", 1, error="scale requires an integer 'replicas' in data"
-            )
-        patch_fn = {
-            "deployment": apps.patch_namespaced_deployment_scale,
-            "statefulset": apps.patch_namespaced_stateful_set_scale,
-            "replicaset": apps.patch_namespaced_replica_set_scale,
-        }.get(resource)
-        if patch_fn is None:
-            return ActionExecutionResult(
-                False, "", "", 1, error=f"Unsupported resource '{resource}' for scale"
-            )
-        patch_fn(name, namespace, {"spec": {"replicas": replicas}})
-        summary = {
-            "resource": resource,
-            "name": name,
-            "namespace": namespace,
-            "replicas": replicas,
-        }
-        return ActionExecutionResult(True, json.dumps(summary), "", 0, error=None)
-
-    def _kube_cordon_node(self, api_client, rendered: dict) -> ActionExecutionResult:
-        core = kubernetes.client.CoreV1Api(api_client)
-        node_name = rendered["node_name"]
-        core.patch_node(node_name, {"spec": {"unschedulable": True}})
-        summary = {"node": node_name, "unschedulable": True}
-        return ActionExecutionResult(True, json.dumps(summary), "", 0, error=None)
-
-    def _kube_uncordon_node(self, api_client, rendered: dict) -> ActionExecutionResult:
-        core = kubernetes.client.CoreV1Api(api_client)
-        node_name = rendered["node_name"]
-        core.patch_node(node_name, {"spec": {"unschedulable": False}})
-        summary = {"node": node_name, "unschedulable": False}
-        return ActionExecutionResult(True, json.dumps(summary), "", 0, error=None)
-
-    def _kube_drain_node(self, api_client, rendered: dict) -> ActionExecutionResult:
-        """
-        Cordons the node, then evicts every pod on it that isn't owned by
-        a DaemonSet (DaemonSet pods are pinned to the node and re-created
-        there regardless, so evicting them is pointless - this matches
-        `kubectl drain`'s default behavior of skipping them). Eviction
-        goes through the Eviction API so PodDisruptionBudgets are
-        respected; a pod blocked by its PDB is reported as a failure for
-        this call rather than silently ignored, since "drained" should
-        mean actually drained.
-        """
-        core = kubernetes.client.CoreV1Api(api_client)
-        node_name = rendered["node_name"]
-        core.patch_node(node_name, {"spec": {"unschedulable": True}})
+    def __call__(self) -> Tuple[Optional[str], Optional[str]]:
+        if self._resolved is None:
+            self._resolved = self._resolve(self._ssh_key)
+        return self._resolved
 
-        pods = core.list_pod_for_all_namespaces(
-            field_selector=f"spec.nodeName={node_name}"
-        )
-        evicted, skipped, failed = [], [], []
-        for pod in pods.items:
-            owners = pod.metadata.owner_references or []
-            if any(o.kind == "DaemonSet" for o in owners):
-                skipped.append(pod.metadata.name)
-                continue
-            eviction = kubernetes.client.V1Eviction(
-                metadata=kubernetes.client.V1ObjectMeta(
-                    name=pod.metadata.name, namespace=pod.metadata.namespace
-                )
-            )
+    def close(self):
+        tmp_path = self._resolved[1] if self._resolved else None
+        if tmp_path:
             try:
-                core.create_namespaced_pod_eviction(
-                    pod.metadata.name, pod.metadata.namespace, eviction
-                )
-                evicted.append(pod.metadata.name)
-            except ApiException as e:
-                failed.append({"pod": pod.metadata.name, "error": e.reason or str(e)})
-
-        summary = {
-            "node": node_name,
-            "evicted": evicted,
-            "skipped_daemonset_pods": skipped,
-            "failed": failed,
-        }
-        if failed:
-            return ActionExecutionResult(
-                False,
-                json.dumps(summary),
-                "",
-                1,
-                error=f"{len(failed)} pod(s) could not be evicted from '{node_name}'",
-            )
-        return ActionExecutionResult(True, json.dumps(summary), "", 0, error=None)
-
-    def _kube_patch_configmap(
-        self, api_client, rendered: dict
-    ) -> ActionExecutionResult:
-        core = kubernetes.client.CoreV1Api(api_client)
-        name = rendered["name"]
-        namespace = rendered["namespace"]
-        data = rendered.get("data") or {}
-        core.patch_namespaced_config_map(name, namespace, {"data": data})
-        summary = {"configmap": name, "namespace": namespace, "data": data}
-        return ActionExecutionResult(True, json.dumps(summary), "", 0, error=None)
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            self._resolved = (None, None)
@@ -0,0 +1,224 @@
+import asyncio
+import datetime
+import itertools
+import uuid
+from collections import OrderedDict, deque
+from threading import Lock
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# Finished/failed jobs beyond this count are dropped, oldest first - their
+# permanent record already lives in the audit log, so the store only needs
+# to keep recent history bounded rather than growing forever (same
+# reasoning as MAX_PROCESSED_APPROVALS in src/main.py). Queued and running
+# jobs are never dropped.
+MAX_FINISHED_JOBS = 500
+
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+
+TERMINAL_STATUSES = {FINISHED, FAILED}
+
+# Per job, the most recent output lines kept for GET /jobs/{id}/stream
+# readers, and the longest line kept in full. Together they bound a job's
+# streaming memory however much it prints and however many readers watch.
+MAX_OUTPUT_LINES = 1000
+MAX_OUTPUT_LINE_CHARS = 8192
+
+
+def _now() -> str:
+    return datetime.datetime.now(datetime.UTC).isoformat().replace("+00:00", "Z")
+
+
+class JobOutput:
+    """
+    Live output feed of one job: the lines its process has printed so far,
+    for GET /jobs/{id}/stream.
+
+    The executor side (append) never waits on readers - it takes a lock
+    for a deque append and returns. Only the newest `max_lines` lines are
+    kept; every reader tracks its own position (a line sequence number)
+    and reads at its own pace, so a slow or stalled reader costs nothing
+    but falling behind: once the lines it hasn't read yet are rotated out,
+    read() tells it how many it missed and moves it forward.
+    """
+
+    def __init__(self, max_lines: int = MAX_OUTPUT_LINES):
+        self._lines: Deque[Tuple[str, str]] = deque(maxlen=max_lines)
+        self._next_seq = 0
+        self.closed = False
+        self._lock = Lock()
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+
+    def append(self, stream: str, text: str):
+        with self._lock:
+            if self.closed:
+                return
+            self._lines.append((stream, text[:MAX_OUTPUT_LINE_CHARS]))
+            self._next_seq += 1
+            waiters, self._waiters = self._waiters, []
+        self._wake(waiters)
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            waiters, self._waiters = self._waiters, []
+        self._wake(waiters)
+
+    def read(self, cursor: int) -> Tuple[List[Tuple[str, str]], int, int, bool]:
+        """
+        Lines from sequence number `cursor` on. Returns (lines, next
+        cursor, number of lines missed because they were already rotated
+        out, whether the feed is closed).
+        """
+        with self._lock:
+            first = self._next_seq - len(self._lines)
+            missed = max(first - cursor, 0)
+            start = max(cursor, first)
+            lines = list(itertools.islice(self._lines, start - first, None))
+            return lines, self._next_seq, missed, self.closed
+
+    async def wait(self, cursor: int, timeout: float) -> bool:
+        """
+        Waits (without blocking the event loop) until there's something
+        past `cursor` or the feed closes. False if `timeout` ran out first.
+        """
+        entry = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            if self._next_seq > cursor or self.closed:
+                return True
+            self._waiters.append(entry)
+        try:
+            await asyncio.wait_for(entry[1].wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            with self._lock:
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+            return False
+
+    @staticmethod
+    def _wake(waiters):
+        # append()/close() run on worker or process-loop threads, readers
+        # wait on the API server's loop.
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # that reader's loop is already closed
+
+
+class JobStore:
+    """
+    In-memory registry of asynchronous /webhook executions (async_mode),
+    so a caller that got `202 Accepted` back can poll GET /jobs/{id} for
+    the outcome instead of holding its HTTP connection open for the whole
+    execution.
+
+    Deliberately NOT persisted, unlike the approval queue: a job is a
+    handle on work already admitted and running on this process, not a
+    pending decision that has to survive a restart. The audit log remains
+    the durable record of what actually ran.
+
+    Every accessor returns a copy, so callers can serialize or mutate what
+    they get back without racing the worker thread that updates the job.
+    The exception is output(), the job's shared JobOutput feed, which is
+    thread-safe itself and lives (and is pruned) alongside the job.
+    """
+
+    def __init__(self, max_finished: int = MAX_FINISHED_JOBS):
+        self.max_finished = max_finished
+        self.lock = Lock()
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._outputs: Dict[str, JobOutput] = {}
+
+    def create(self, **fields) -> Dict[str, Any]:
+        job = {
+            "id": str(uuid.uuid4()),
+            "status": QUEUED,
+            "created_at": _now(),
+            "started_at": None,
+            "finished_at": None,
+            "execution": None,
+            "error": None,
+            **fields,
+        }
+        with self.lock:
+            self._jobs[job["id"]] = job
+            self._outputs[job["id"]] = JobOutput()
+            self._prune_locked()
+            return dict(job)
+
+    def mark_running(self, job_id: str):
+        with self.lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job["status"] = RUNNING
+                job["started_at"] = _now()
+
+    def mark_finished(
+        self,
+        job_id: str,
+        execution: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+        **fields,
+    ):
+        """
+        Records the outcome. A job with an ActionExecutionResult is
+        "finished" (whether the action itself succeeded or not - see
+        execution.success); one that never produced a result is "failed".
+        """
+        with self.lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job["status"] = FINISHED if execution is not None else FAILED
+            job["finished_at"] = _now()
+            job["execution"] = execution
+            job["error"] = error
+            job.update(fields)
+            # Closed after the job is updated, so a stream reader that sees
+            # the feed end also sees the job's final status.
+            self._outputs[job_id].close()
+            self._prune_locked()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def output(self, job_id: str) -> Optional[JobOutput]:
+        with self.lock:
+            return self._outputs.get(job_id)
+
+    def list(
+        self,
+        requested_by: Optional[str] = None,
+        status: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """Newest first, optionally filtered by requester and/or status."""
+        with self.lock:
+            jobs = list(self._jobs.values())
+        results = []
+        for job in reversed(jobs):
+            if requested_by is not None and job.get("requested_by") != requested_by:
+                continue
+            if status is not None and job["status"] != status:
+                continue
+            results.append(dict(job))
+            if len(results) >= limit:
+                break
+        return results
+
+    def _prune_locked(self):
+        """Caller must hold self.lock."""
+        terminal = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job["status"] in TERMINAL_STATUSES
+        ]
+        for job_id in terminal[: max(len(terminal) - self.max_finished, 0)]:
+            del self._jobs[job_id]
+            del self._outputs[job_id]
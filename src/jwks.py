@@ -0,0 +1,216 @@
+import logging
+import time
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+
+import jwt
+import requests
+
+logger = logging.getLogger("autoheal.jwks")
+
+DEFAULT_REFRESH_SECONDS = 300
+DEFAULT_TIMEOUT_SECONDS = 5
+DEFAULT_LEEWAY_SECONDS = 30
+DEFAULT_ALGORITHMS = ("RS256", "ES256")
+# A token naming a key id the cached set doesn't have triggers an early
+# refetch (the issuer may just have rotated) - but at most this often, so
+# a stream of tokens with made-up key ids can't turn into a stream of
+# requests to the issuer. Also how often a set that has never been
+# fetched successfully is retried while its issuer is down.
+MIN_REFETCH_INTERVAL_SECONDS = 30
+
+
+class JWKSUnavailableError(Exception):
+    """
+    Raised when an issuer's JWKS document can't be fetched or parsed and
+    there's no previously fetched copy to fall back to.
+    """
+
+
+class JWKSCache:
+    """
+    In-memory cache of issuers' JSON Web Key Sets (their published token
+    signing keys), so verifying a bearer token is purely local: one dict
+    lookup for the key, then a signature check - no network call per
+    request, unlike an API key looked up in Vault.
+
+    A set is refetched once it's older than the configured refresh
+    interval, or early when a token names a key id it doesn't contain
+    (see MIN_REFETCH_INTERVAL_SECONDS). If a refetch fails the last good
+    set keeps being used, and retried on the next refresh - the keys in
+    it are public and were valid a moment ago, and rejecting every token
+    because the issuer's discovery endpoint blipped would take the whole
+    API down with it.
+
+    One fetch at a time: requests that all find the set stale (or all
+    name the same new key id) wait for a single fetch and share it.
+    Fetching blocks, so async callers should check needs_fetch() and
+    verify in a worker thread when it's true - see verify_token.
+    """
+
+    def __init__(self, timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS):
+        self.timeout_seconds = timeout_seconds
+        self.lock = Lock()
+        self._fetch_lock = Lock()
+        # url -> (fetched_at, {kid: PyJWK})
+        self._sets: Dict[str, Tuple[float, Dict[Optional[str], jwt.PyJWK]]] = {}
+        # url -> when fetching a set there's no copy of yet last failed.
+        self._failed_at: Dict[str, float] = {}
+
+    def signing_key(
+        self,
+        jwks_url: str,
+        kid: Optional[str],
+        refresh_seconds: float = DEFAULT_REFRESH_SECONDS,
+    ) -> Optional[jwt.PyJWK]:
+        """
+        The key with id `kid` from the JWKS at `jwks_url`, or None if the
+        issuer doesn't publish it. A token without a `kid` header only
+        matches a set holding a single key.
+        """
+        with self.lock:
+            cached = self._sets.get(jwks_url)
+        now = time.monotonic()
+        if cached is None or now - cached[0] >= refresh_seconds:
+            cached = self._refresh(jwks_url, cached)
+        key = _find_key(cached[1], kid)
+        if key is None and now - cached[0] >= MIN_REFETCH_INTERVAL_SECONDS:
+            cached = self._refresh(jwks_url, cached)
+            key = _find_key(cached[1], kid)
+        return key
+
+    def needs_fetch(
+        self,
+        jwks_url: str,
+        kid: Optional[str],
+        refresh_seconds: float = DEFAULT_REFRESH_SECONDS,
+    ) -> bool:
+        """Whether signing_key() with these arguments would fetch first."""
+        with self.lock:
+            cached = self._sets.get(jwks_url)
+        now = time.monotonic()
+        if cached is None or now - cached[0] >= refresh_seconds:
+            return True
+        return (
+            _find_key(cached[1], kid) is None
+            and now - cached[0] >= MIN_REFETCH_INTERVAL_SECONDS
+        )
+
+    def invalidate(self, jwks_url: Optional[str] = None):
+        with self.lock:
+            if jwks_url is None:
+                self._sets.clear()
+            else:
+                self._sets.pop(jwks_url, None)
+
+    def _refresh(self, jwks_url: str, cached):
+        with self._fetch_lock:
+            with self.lock:
+                current = self._sets.get(jwks_url)
+            if current is not None and current is not cached:
+                # Refreshed by another request while this one waited.
+                return current
+            if cached is None:
+                with self.lock:
+                    failed_at = self._failed_at.get(jwks_url)
+                if (
+                    failed_at is not None
+                    and time.monotonic() - failed_at < MIN_REFETCH_INTERVAL_SECONDS
+                ):
+                    raise JWKSUnavailableError(
+                        f"JWKS from {jwks_url} unavailable; next fetch attempt "
+                        f"within {MIN_REFETCH_INTERVAL_SECONDS}s"
+                    )
+            try:
+                keys = self._fetch(jwks_url)
+            except JWKSUnavailableError as e:
+                if cached is None:
+                    with self.lock:
+                        self._failed_at[jwks_url] = time.monotonic()
+                    raise
+                logger.warning(f"{e}; keeping the previously fetched keys")
+                # Don't retry on every request until the next refresh is due.
+                cached = (time.monotonic(), cached[1])
+            else:
+                cached = (time.monotonic(), keys)
+            with self.lock:
+                self._sets[jwks_url] = cached
+                self._failed_at.pop(jwks_url, None)
+            return cached
+
+    def _fetch(self, jwks_url: str) -> Dict[Optional[str], jwt.PyJWK]:
+        try:
+            resp = requests.get(jwks_url, timeout=self.timeout_seconds)
+        except requests.RequestException as e:
+            raise JWKSUnavailableError(
+                f"Failed to fetch JWKS from {jwks_url}: {e}"
+            ) from e
+        if resp.status_code != 200:
+            raise JWKSUnavailableError(
+                f"JWKS endpoint {jwks_url} returned {resp.status_code}"
+            )
+        try:
+            key_set = jwt.PyJWKSet.from_dict(resp.json())
+        except (ValueError, jwt.PyJWTError) as e:
+            raise JWKSUnavailableError(f"Invalid JWKS from {jwks_url}: {e}") from e
+        keys = {key.key_id: key for key in key_set.keys}
+        logger.info(f"Fetched {len(keys)} signing key(s) from {jwks_url}")
+        return keys
+
+
+def _find_key(keys: Dict[Optional[str], jwt.PyJWK], kid: Optional[str]):
+    if kid is None and len(keys) == 1:
+        return next(iter(keys.values()))
+    return keys.get(kid)
+
+
+def verify_token(token: str, jwt_config: dict) -> Dict[str, Any]:
+    """
+    Checks `token`'s signature against its issuer's cached JWKS and its
+    standard claims (exp/nbf/iat, plus iss and aud when configured)
+    against the auth.yaml `jwt` section, and returns its claims. Raises
+    jwt.InvalidTokenError if the token isn't acceptable, or
+    JWKSUnavailableError if the issuer's keys can't be had at all.
+    Blocks while the keys are fetched, if they must be first - see
+    token_needs_fetch.
+    """
+    header = jwt.get_unverified_header(token)
+    key = jwks_cache.signing_key(
+        jwt_config["jwks_url"],
+        header.get("kid"),
+        jwt_config.get("jwks_refresh_seconds", DEFAULT_REFRESH_SECONDS),
+    )
+    if key is None:
+        raise jwt.InvalidTokenError(f"Unknown signing key {header.get('kid')!r}")
+    return jwt.decode(
+        token,
+        key=key.key,
+        algorithms=list(jwt_config.get("algorithms") or DEFAULT_ALGORITHMS),
+        audience=jwt_config.get("audience"),
+        issuer=jwt_config.get("issuer"),
+        leeway=jwt_config.get("leeway_seconds", DEFAULT_LEEWAY_SECONDS),
+        options={"require": ["exp", "sub"]},
+    )
+
+
+def token_needs_fetch(token: str, jwt_config: dict) -> bool:
+    """
+    Whether verify_token(token, jwt_config) would have to fetch the
+    issuer's keys - the one part of it that isn't local and quick - so
+    an async caller knows to run it in a worker thread.
+    """
+    try:
+        header = jwt.get_unverified_header(token)
+    except jwt.InvalidTokenError:
+        return False
+    return jwks_cache.needs_fetch(
+        jwt_config["jwks_url"],
+        header.get("kid"),
+        jwt_config.get("jwks_refresh_seconds", DEFAULT_REFRESH_SECONDS),
+    )
+
+
+# Module-level singleton, like src.vault.vault_client: nothing is fetched
+# until the first bearer token arrives, so deployments that only use API
+# keys never touch it.
+jwks_cache = JWKSCache()
@@ -0,0 +1,896 @@
+"""
+The kubeapi execution backend: kube_actions, run directly against a
+cluster's API server with the official kubernetes client. Unlike the
+process backends in src/executor.py this never shells out or SSHes
+anywhere, and credentials can be scoped as narrowly as an RBAC Role
+allows rather than a full kubeconfig with implicit broader access.
+
+Imported through src/backends.py only once a kubeapi controller is
+configured or used - the kubernetes client is by far the heaviest import
+in the process, and deployments with only SSH/Ansible controllers never
+need it.
+"""
+
+import contextvars
+import datetime
+import json
+import logging
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import kubernetes
+import kubernetes.config
+import kubernetes.watch
+from kubernetes.client.exceptions import ApiException
+
+from src.executor import ActionExecutionResult
+from src.kubeclients import DEFAULT_CLIENT_TTL_SECONDS, KubeClientCache
+from src.pool import release_slot
+from src.retry import kube_api_error_class, VAULT_UNAVAILABLE
+from src.vault import invalidate_vault_ref, VaultUnavailableError
+
+logger = logging.getLogger("autoheal.executor")
+
+KUBE_RESTART_ANNOTATION = "kubectl.kubernetes.io/restartedAt"
+
+# Set by a kube_action's handler once it has changed something and goes
+# on to make more API calls (a rollout to wait for, pods to evict): an
+# API error from then on isn't retryable - see src/retry.py. One list
+# per run() call, shared with the threads it fans out to.
+_changes: contextvars.ContextVar = contextvars.ContextVar(
+    "autoheal_kube_changes", default=None
+)
+
+# drain_node: how many evictions run at once, and how long the whole
+# drain may take - `executor.drain_concurrency` /
+# `executor.drain_timeout_seconds` in config/execution.yaml.
+DEFAULT_DRAIN_CONCURRENCY = 10
+DEFAULT_DRAIN_TIMEOUT_SECONDS = 300
+# An eviction refused with 429 (the pod's PodDisruptionBudget allows no
+# more disruptions right now) is retried after this long, doubling up to
+# the max, until the drain deadline.
+DRAIN_RETRY_INITIAL_BACKOFF_SECONDS = 1.0
+DRAIN_RETRY_MAX_BACKOFF_SECONDS = 16.0
+# rollout_restart/drain_node with `wait: true`: how long to follow the
+# rollout (or the evicted pods' deletion) before calling it a failure,
+# unless the action's `wait_timeout_seconds` or
+# `executor.kube_wait_timeout_seconds` says otherwise.
+DEFAULT_KUBE_WAIT_TIMEOUT_SECONDS = 600
+# kube_actions with a label_selector/field_selector instead of a name:
+# how many matched objects the verb runs against at once, and the most
+# objects one action may touch (its blast radius) - past it, nothing is
+# touched at all. `executor.kube_selector_concurrency` /
+# `executor.kube_selector_max_targets`; an action's own `max_targets`
+# overrides the latter.
+DEFAULT_KUBE_SELECTOR_CONCURRENCY = 5
+DEFAULT_KUBE_SELECTOR_MAX_TARGETS = 10
+
+# The closed set of kube_action verbs this executor knows how to run.
+# Deliberately narrow: each one is one specific, reviewed API operation,
+# not a generic "patch arbitrary JSON" escape hatch - new verbs get added
+# here on purpose, not opened up by config alone.
+KUBE_ACTION_VERBS = {
+    "rollout_restart",
+    "delete_pod",
+    "scale",
+    "cordon_node",
+    "uncordon_node",
+    "drain_node",
+    "patch_configmap",
+}
+
+# Verbs acting on Nodes (cluster-scoped, addressed by `node_name`).
+NODE_VERBS = ("cordon_node", "uncordon_node", "drain_node")
+# What a selector matches for verbs that always act on one kind of object;
+# the rest act on their action's `resource`.
+_SELECTOR_KINDS = {"delete_pod": "pod", "patch_configmap": "configmap"}
+
+
+class KubeAPIBackend:
+    """
+    Runs kube_actions for kubeapi controllers, through one cached
+    ApiClient per controller (src/kubeclients.py::KubeClientCache,
+    `executor.kube_client_ttl_seconds`). Reads its settings from the
+    `executor` section of config/execution.yaml, like the ActionExecutor
+    it's created for; close() closes the cached clients.
+    """
+
+    def __init__(self, executor):
+        self.executor = executor
+        config = executor.config.get("executor") or {}
+        self.kube_clients = KubeClientCache(
+            self._build_kube_configuration,
+            float(config.get("kube_client_ttl_seconds", DEFAULT_CLIENT_TTL_SECONDS)),
+        )
+        self.drain_concurrency = max(
+            1, int(config.get("drain_concurrency", DEFAULT_DRAIN_CONCURRENCY))
+        )
+        self.drain_timeout_seconds = float(
+            config.get("drain_timeout_seconds", DEFAULT_DRAIN_TIMEOUT_SECONDS)
+        )
+        self.kube_wait_timeout_seconds = float(
+            config.get("kube_wait_timeout_seconds", DEFAULT_KUBE_WAIT_TIMEOUT_SECONDS)
+        )
+        self.kube_selector_concurrency = max(
+            1,
+            int(
+                config.get(
+                    "kube_selector_concurrency", DEFAULT_KUBE_SELECTOR_CONCURRENCY
+                )
+            ),
+        )
+        self.kube_selector_max_targets = int(
+            config.get("kube_selector_max_targets", DEFAULT_KUBE_SELECTOR_MAX_TARGETS)
+        )
+
+    def close(self):
+        self.kube_clients.close()
+
+    def _build_kube_configuration(
+        self, controller: dict
+    ) -> Tuple["kubernetes.client.Configuration", List[str]]:
+        """
+        Builds a kubernetes.client.Configuration for `controller`, plus a
+        list of tempfile paths the caller must delete once done with it.
+        Precedence: in_cluster > kubeconfig > api_server+token(+ca_cert).
+
+        Raises VaultUnavailableError if a vault: reference can't be
+        resolved, or ValueError if the controller has none of the above
+        configured. Either way, whatever tempfiles were already created
+        before the failure are cleaned up here - the caller never has to
+        clean up after a raised exception from this method.
+        """
+        cleanup_paths: List[str] = []
+        try:
+            if controller.get("in_cluster"):
+                configuration = kubernetes.client.Configuration()
+                kubernetes.config.load_incluster_config(
+                    client_configuration=configuration
+                )
+                return configuration, cleanup_paths
+
+            kubeconfig = controller.get("kubeconfig")
+            if kubeconfig:
+                resolved_path, tmp = self.executor._resolve_secret_file(
+                    kubeconfig, "kubeconfig"
+                )
+                if tmp:
+                    cleanup_paths.append(tmp)
+                configuration = kubernetes.client.Configuration()
+                kubernetes.config.load_kube_config(
+                    config_file=resolved_path, client_configuration=configuration
+                )
+                return configuration, cleanup_paths
+
+            api_server = controller.get("api_server")
+            token_ref = controller.get("token")
+            if api_server and token_ref:
+                token_path, token_tmp = self.executor._resolve_secret_file(
+                    token_ref, "token"
+                )
+                if token_tmp:
+                    cleanup_paths.append(token_tmp)
+                with open(token_path) as f:
+                    token_value = f.read().strip()
+
+                configuration = kubernetes.client.Configuration()
+                configuration.host = api_server
+                configuration.api_key = {"authorization": token_value}
+                configuration.api_key_prefix = {"authorization": "Bearer"}
+
+                ca_cert_ref = controller.get("ca_cert")
+                if ca_cert_ref:
+                    ca_path, ca_tmp = self.executor._resolve_secret_file(
+                        ca_cert_ref, "ca_cert"
+                    )
+                    if ca_tmp:
+                        cleanup_paths.append(ca_tmp)
+                    configuration.ssl_ca_cert = ca_path
+                else:
+                    logger.warning(
+                        "kubeapi controller has no ca_cert configured; "
+                        "TLS verification will be disabled for this call."
+                    )
+                    configuration.verify_ssl = False
+                return configuration, cleanup_paths
+        except Exception:
+            for p in cleanup_paths:
+                try:
+                    os.unlink(p)
+                except OSError:
+                    pass
+            raise
+
+        raise ValueError(
+            "Controller has no usable kubeapi credentials configured "
+            "(need one of: in_cluster, kubeconfig, or api_server+token)."
+        )
+
+    @staticmethod
+    def _render_kube_action_fields(
+        action: dict, params: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Renders {param} templates in a kube_action's name/namespace/
+        node_name/label_selector/field_selector/data fields. `resource` is
+        a fixed choice (deployment, statefulset, ...), not user data, so
+        it's passed through as-is, as are `wait`/`wait_timeout_seconds`
+        and `max_targets`.
+        Raises KeyError/IndexError for a missing parameter, same
+        convention as _build_remote_command/run_command.
+        """
+        rendered: Dict[str, Any] = {}
+        if "resource" in action:
+            rendered["resource"] = action["resource"]
+        if action.get("wait"):
+            rendered["wait"] = True
+        if "wait_timeout_seconds" in action:
+            rendered["wait_timeout_seconds"] = float(action["wait_timeout_seconds"])
+        if "name" in action:
+            rendered["name"] = action["name"].format(**params)
+        if "namespace" in action:
+            rendered["namespace"] = action["namespace"].format(**params)
+        if "node_name" in action:
+            rendered["node_name"] = action["node_name"].format(**params)
+        for selector in ("label_selector", "field_selector"):
+            if selector in action:
+                rendered[selector] = action[selector].format(**params)
+        if "max_targets" in action:
+            rendered["max_targets"] = int(action["max_targets"])
+        if "data" in action:
+            rendered["data"] = {
+                k: str(v).format(**params) for k, v in action["data"].items()
+            }
+        return rendered
+
+    @staticmethod
+    def _describe_kube_action(verb: str, rendered: Dict[str, Any]) -> str:
+        if _selectors(rendered):
+            kind = (
+                "node"
+                if verb in NODE_VERBS
+                else _SELECTOR_KINDS.get(verb, rendered.get("resource", "deployment"))
+            )
+            selectors = " ".join(f"{k}='{v}'" for k, v in _selectors(rendered).items())
+            where = (
+                f" in namespace '{rendered['namespace']}'"
+                if rendered.get("namespace") and verb not in NODE_VERBS
+                else ""
+            )
+            return f"{verb} every {kind} matching {selectors}{where}"
+        if verb in NODE_VERBS:
+            return f"{verb} node '{rendered.get('node_name')}'"
+        if verb == "patch_configmap":
+            return (
+                f"patch_configmap '{rendered.get('name')}' in namespace "
+                f"'{rendered.get('namespace')}' with {rendered.get('data')}"
+            )
+        resource = rendered.get("resource", "deployment")
+        description = (
+            f"{verb} {resource} '{rendered.get('name')}' in namespace "
+            f"'{rendered.get('namespace')}'"
+        )
+        if rendered.get("wait"):
+            description += " and wait for the rollout"
+        return description
+
+    def run(
+        self,
+        controller: dict,
+        action: dict,
+        params: Optional[Dict[str, Any]] = None,
+        dry_run: bool = False,
+        controller_name: Optional[str] = None,
+    ) -> ActionExecutionResult:
+        """
+        Execute a structured Kubernetes API operation (`kube_action` in
+        config/actions.yaml) directly against the cluster's API server -
+        no SSH, no shelling out to oc/kubectl. See KUBE_ACTION_VERBS for
+        the full set of supported operations.
+
+        With a label_selector/field_selector instead of a name, the verb
+        runs against every object matching it - see _kube_fan_out.
+
+        The API client is reused across calls for the same controller
+        (`controller_name`); if the server answers 401 it's rebuilt with
+        freshly resolved credentials and the call retried once.
+        """
+        params = params or {}
+        verb = action.get("kube_action")
+        if verb not in KUBE_ACTION_VERBS:
+            return ActionExecutionResult(
+                False, "", "", 1, error=f"Unknown kube_action '{verb}'"
+            )
+
+        try:
+            rendered = self._render_kube_action_fields(action, params)
+        except (KeyError, IndexError) as e:
+            return ActionExecutionResult(
+                False, "", "", 1, error=f"Missing parameter {e} for kube_action"
+            )
+        if _selectors(rendered) and ("name" in rendered or "node_name" in rendered):
+            return ActionExecutionResult(
+                False,
+                "",
+                "",
+                1,
+                error="kube_action takes either a name/node_name or a "
+                "label_selector/field_selector, not both",
+            )
+
+        if dry_run:
+            msg = f"[DRY-RUN] Would {self._describe_kube_action(verb, rendered)}"
+            logger.info(msg)
+            return ActionExecutionResult(
+                success=True, stdout=msg, stderr="", exit_code=0, error=None
+            )
+
+        for attempt in (1, 2):
+            try:
+                cached = self.kube_clients.acquire(controller, controller_name)
+            except VaultUnavailableError as e:
+                return ActionExecutionResult(
+                    False,
+                    "",
+                    "",
+                    1,
+                    error=f"Failed to resolve kube credentials from Vault: {e}",
+                    error_class=VAULT_UNAVAILABLE,
+                )
+            except Exception as e:
+                return ActionExecutionResult(
+                    False,
+                    "",
+                    "",
+                    1,
+                    error=f"Failed to build Kubernetes client config: {e}",
+                )
+
+            changes = []
+            changes_token = _changes.set(changes)
+            try:
+                handler = getattr(self, f"_kube_{verb}")
+                logger.info(
+                    f"Running kube_action: {self._describe_kube_action(verb, rendered)}"
+                )
+                if _selectors(rendered):
+                    return self._kube_fan_out(
+                        verb, handler, cached.api_client, rendered
+                    )
+                return handler(cached.api_client, rendered)
+            except ApiException as e:
+                if e.status == 401:
+                    # The credentials behind the cached client were rotated
+                    # or revoked: rebuild it (fetching any Vault-backed
+                    # secrets afresh). The verb is only rerun if it hadn't
+                    # changed anything yet - rerunning a drain or a rollout
+                    # restart that got part-way would repeat its changes.
+                    self.kube_clients.invalidate(cached)
+                    for ref in ("kubeconfig", "token", "ca_cert"):
+                        invalidate_vault_ref(controller.get(ref))
+                    if attempt == 1 and not changes:
+                        logger.warning(
+                            f"Kubernetes API rejected cached credentials for "
+                            f"kube_action '{verb}'; rebuilding the client"
+                        )
+                        continue
+                logger.error(f"Kubernetes API error for kube_action '{verb}': {e}")
+                return ActionExecutionResult(
+                    False,
+                    "",
+                    str(e.body or ""),
+                    e.status or 1,
+                    error=f"Kubernetes API error: {e.reason or e}",
+                    error_class=kube_api_error_class(e.status, bool(changes)),
+                )
+            except Exception as e:
+                logger.error(f"kube_action '{verb}' failed: {e}")
+                return ActionExecutionResult(False, "", "", 1, error=str(e))
+            finally:
+                _changes.reset(changes_token)
+                self.kube_clients.release(cached)
+
+    def _kube_fan_out(
+        self, verb: str, handler, api_client, rendered: dict
+    ) -> ActionExecutionResult:
+        """
+        Resolves the action's label_selector/field_selector with one LIST,
+        then runs `handler` against each matching object - up to
+        `kube_selector_concurrency` at once - and reports on all of them.
+        More matches than `max_targets` (default
+        `kube_selector_max_targets`) fails the whole action before anything
+        is touched: a selector that turned out broader than intended
+        shouldn't restart half a cluster. Succeeds only if every object
+        did; none matching is a success with nothing to do.
+        """
+        max_targets = rendered.get("max_targets", self.kube_selector_max_targets)
+        list_fn, args = self._selector_list_call(verb, api_client, rendered)
+        if list_fn is None:
+            return ActionExecutionResult(
+                False,
+                "",
+                "",
+                1,
+                error=f"Unsupported resource '{rendered.get('resource')}' "
+                f"for {verb}",
+            )
+        matched = list_fn(*args, **_selectors(rendered)).items
+        summary: Dict[str, Any] = {
+            "verb": verb,
+            **_selectors(rendered),
+            "matched": len(matched),
+        }
+        if len(matched) > max_targets:
+            return ActionExecutionResult(
+                False,
+                json.dumps(summary),
+                "",
+                1,
+                error=f"Selector matched {len(matched)} objects, more than "
+                f"max_targets ({max_targets}); nothing was changed",
+            )
+
+        base = {
+            k: v
+            for k, v in rendered.items()
+            if k not in ("label_selector", "field_selector", "max_targets")
+        }
+        targets = []
+        for obj in matched:
+            if verb in NODE_VERBS:
+                targets.append({**base, "node_name": obj.metadata.name})
+            else:
+                targets.append(
+                    {
+                        **base,
+                        "name": obj.metadata.name,
+                        "namespace": obj.metadata.namespace,
+                    }
+                )
+
+        def run_one(target: dict) -> Dict[str, Any]:
+            label = target.get("node_name") or (
+                f"{target['namespace']}/{target['name']}"
+            )
+            try:
+                result = handler(api_client, target)
+            except ApiException as e:
+                return {"target": label, "success": False, "error": e.reason or str(e)}
+            except Exception as e:
+                return {"target": label, "success": False, "error": str(e)}
+            outcome = {"target": label, "success": result.success}
+            try:
+                outcome["result"] = json.loads(result.stdout)
+            except ValueError:
+                outcome["result"] = result.stdout
+            if not result.success:
+                outcome["error"] = result.error
+            return outcome
+
+        results = []
+        if targets:
+            workers = min(self.kube_selector_concurrency, len(targets))
+            # Each target runs in this execution's context (a copy per
+            # target: one Context can't be entered by two threads at once),
+            # so a waiting verb can still release its pool slot.
+            contexts = [contextvars.copy_context() for _ in targets]
+            with ThreadPoolExecutor(workers, thread_name_prefix="fanout") as pool:
+                results = list(
+                    pool.map(
+                        lambda ctx, target: ctx.run(run_one, target),
+                        contexts,
+                        targets,
+                    )
+                )
+        failed = [r for r in results if not r["success"]]
+        summary.update({"succeeded": len(results) - len(failed), "failed": len(failed)})
+        summary["targets"] = results
+        if failed:
+            return ActionExecutionResult(
+                False,
+                json.dumps(summary),
+                "",
+                1,
+                error=f"{verb} failed for {len(failed)} of {len(results)} "
+                "matching object(s)",
+            )
+        return ActionExecutionResult(True, json.dumps(summary), "", 0, error=None)
+
+    @staticmethod
+    def _selector_list_call(verb: str, api_client, rendered: dict):
+        """
+        (list function, positional args) that finds the objects `verb`
+        would act on - namespaced if the action has a namespace, across
+        all namespaces otherwise - or (None, ()) for a resource `verb`
+        doesn't support.
+        """
+        core = kubernetes.client.CoreV1Api(api_client)
+        if verb in NODE_VERBS:
+            return core.list_node, ()
+        namespace = rendered.get("namespace")
+        kind = _SELECTOR_KINDS.get(verb) or rendered.get("resource", "deployment")
+        if kind in ("pod", "configmap"):
+            api, plural = core, {"pod": "pod", "configmap": "config_map"}[kind]
+        else:
+            supported = (
+                ("deployment", "statefulset", "daemonset")
+                if verb == "rollout_restart"
+                else ("deployment", "statefulset", "replicaset")
+            )
+            if kind not in supported:
+                return None, ()
+            api = kubernetes.client.AppsV1Api(api_client)
+            plural = {
+                "deployment": "deployment",
+                "statefulset": "stateful_set",
+                "daemonset": "daemon_set",
+                "replicaset": "replica_set",
+            }[kind]
+        if namespace:
+            return getattr(api, f"list_namespaced_{plural}"), (namespace,)
+        return getattr(api, f"list_{plural}_for_all_namespaces"), ()
+
+    def _kube_rollout_restart(
+        self, api_client, rendered: dict
+    ) -> ActionExecutionResult:
+        apps = kubernetes.client.AppsV1Api(api_client)
+        resource = rendered.get("resource", "deployment")
+        name = rendered["name"]
+        namespace = rendered["namespace"]
+        restarted_at = datetime.datetime.now(datetime.UTC).isoformat()
+        patch_body = {
+            "spec": {
+                "template": {
+                    "metadata": {"annotations": {KUBE_RESTART_ANNOTATION: restarted_at}}
+                }
+            }
+        }
+        patch_fn = {
+            "deployment": apps.patch_namespaced_deployment,
+            "statefulset": apps.patch_namespaced_stateful_set,
+            "daemonset": apps.patch_namespaced_daemon_set,
+        }.get(resource)
+        if patch_fn is None:
+            return ActionExecutionResult(
+                False,
+                "",
+                "",
+                1,
+                error=f"Unsupported resource '{resource}' for rollout_restart",
+            )
+        patched = patch_fn(name, namespace, patch_body)
+        _record_change()
+        summary = {
+            "resource": resource,
+            "name": name,
+            "namespace": namespace,
+            "restarted_at": restarted_at,
+        }
+        if not rendered.get("wait"):
+            return ActionExecutionResult(True, json.dumps(summary), "", 0, error=None)
+
+        list_fn = {
+            "deployment": apps.list_namespaced_deployment,
+            "statefulset": apps.list_namespaced_stateful_set,
+            "daemonset": apps.list_namespaced_daemon_set,
+        }[resource]
+        generation = patched.metadata.generation or 0
+        return self._wait_result(
+            rendered,
+            summary,
+            f"rollout of {resource} '{name}' in namespace '{namespace}'",
+            list_fn,
+            lambda objects: any(
+                _rollout_complete(resource, obj, generation) for obj in objects.values()
+            ),
+            namespace,
+            field_selector=f"metadata.name={name}",
+        )
+
+    def _kube_delete_pod(self, api_client, rendered: dict) -> ActionExecutionResult:
+        core = kubernetes.client.CoreV1Api(api_client)
+        name = rendered["name"]
+        namespace = rendered["namespace"]
+        core.delete_namespaced_pod(name, namespace)
+        summary = {"pod": name, "namespace": namespace, "action": "deleted"}
+        return ActionExecutionResult(True, json.dumps(summary), "", 0, error=None)
+
+    def _kube_scale(self, api_client, rendered: dict) -> ActionExecutionResult:
+        apps = kubernetes.client.AppsV1Api(api_client)
+        resource = rendered.get("resource", "deployment")
+        name = rendered["name"]
+        namespace = rendered["namespace"]
+        try:
+            replicas = int(rendered["data"]["replicas"])
+        except (KeyError, TypeError, ValueError):
+            return ActionExecutionResult(
+                False, "", "", 1, error="scale requires an integer 'replicas' in data"
+            )
+        patch_fn = {
+            "deployment": apps.patch_namespaced_deployment_scale,
+            "statefulset": apps.patch_namespaced_stateful_set_scale,
+            "replicaset": apps.patch_namespaced_replica_set_scale,
+        }.get(resource)
+        if patch_fn is None:
+            return ActionExecutionResult(
+                False, "", "", 1, error=f"Unsupported resource '{resource}' for scale"
+            )
+        patch_fn(name, namespace, {"spec": {"replicas": replicas}})
+        summary = {
+            "resource": resource,
+            "name": name,
+            "namespace": namespace,
+            "replicas": replicas,
+        }
+        return ActionExecutionResult(True, json.dumps(summary), "", 0, error=None)
+
+    def _kube_cordon_node(self, api_client, rendered: dict) -> ActionExecutionResult:
+        core = kubernetes.client.CoreV1Api(api_client)
+        node_name = rendered["node_name"]
+        core.patch_node(node_name, {"spec": {"unschedulable": True}})
+        summary = {"node": node_name, "unschedulable": True}
+        return ActionExecutionResult(True, json.dumps(summary), "", 0, error=None)
+
+    def _kube_uncordon_node(self, api_client, rendered: dict) -> ActionExecutionResult:
+        core = kubernetes.client.CoreV1Api(api_client)
+        node_name = rendered["node_name"]
+        core.patch_node(node_name, {"spec": {"unschedulable": False}})
+        summary = {"node": node_name, "unschedulable": False}
+        return ActionExecutionResult(True, json.dumps(summary), "", 0, error=None)
+
+    def _kube_drain_node(self, api_client, rendered: dict) -> ActionExecutionResult:
+        """
+        Cordons the node, then evicts every pod on it that isn't owned by
+        a DaemonSet (DaemonSet pods are pinned to the node and re-created
+        there regardless, so evicting them is pointless - this matches
+        `kubectl drain`'s default behavior of skipping them). Eviction
+        goes through the Eviction API so PodDisruptionBudgets are
+        respected.
+
+        Up to `drain_concurrency` evictions run at once. One refused with
+        429 - its PDB allows no disruption right now, typically until a
+        replacement pod elsewhere becomes ready - is retried with backoff
+        (see _evict_pod) until `drain_timeout_seconds` after the drain
+        started. A pod still not evicted by then is reported as a failure
+        for this call rather than silently ignored, since "drained"
+        should mean actually drained.
+        """
+        core = kubernetes.client.CoreV1Api(api_client)
+        node_name = rendered["node_name"]
+        core.patch_node(node_name, {"spec": {"unschedulable": True}})
+        _record_change()
+
+        pods = core.list_pod_for_all_namespaces(
+            field_selector=f"spec.nodeName={node_name}"
+        )
+        to_evict, skipped = [], []
+        for pod in pods.items:
+            owners = pod.metadata.owner_references or []
+            if any(o.kind == "DaemonSet" for o in owners):
+                skipped.append(pod.metadata.name)
+            else:
+                to_evict.append(pod)
+
+        started = time.monotonic()
+        deadline = started + self.drain_timeout_seconds
+        errors = []
+        if to_evict:
+            workers = min(self.drain_concurrency, len(to_evict))
+            with ThreadPoolExecutor(workers, thread_name_prefix="drain") as pool:
+                errors = list(
+                    pool.map(lambda pod: self._evict_pod(core, pod, deadline), to_evict)
+                )
+        evicted, failed = [], []
+        for pod, error in zip(to_evict, errors):
+            if error is None:
+                evicted.append(pod.metadata.name)
+            else:
+                failed.append({"pod": pod.metadata.name, "error": error})
+
+        summary = {
+            "node": node_name,
+            "evicted": evicted,
+            "skipped_daemonset_pods": skipped,
+            "failed": failed,
+        }
+        if rendered.get("wait") and not failed:
+            # An accepted eviction only starts the pod's graceful shutdown;
+            # wait until every evicted pod is actually gone from the node.
+            evicted_uids = {
+                pod.metadata.uid
+                for pod, error in zip(to_evict, errors)
+                if error is None
+            }
+            return self._wait_result(
+                rendered,
+                summary,
+                f"evicted pods to leave node '{node_name}'",
+                core.list_pod_for_all_namespaces,
+                lambda objects: not evicted_uids.intersection(objects),
+                field_selector=f"spec.nodeName={node_name}",
+                started=started,
+            )
+        if failed:
+            return ActionExecutionResult(
+                False,
+                json.dumps(summary),
+                "",
+                1,
+                error=f"{len(failed)} pod(s) could not be evicted from '{node_name}'",
+            )
+        return ActionExecutionResult(True, json.dumps(summary), "", 0, error=None)
+
+    def _wait_result(
+        self,
+        rendered: dict,
+        summary: dict,
+        what: str,
+        list_fn,
+        converged,
+        *args,
+        started: Optional[float] = None,
+        **kwargs,
+    ) -> ActionExecutionResult:
+        """
+        The `wait: true` half of rollout_restart/drain_node: follows
+        list_fn's objects until `converged` (see _watch_until) and adds
+        `converged`/`converged_seconds` - measured from `started`, the
+        moment the action began changing things (default: now) - to the
+        summary. Not converging within the wait timeout is a failure.
+
+        The wait itself is all blocking reads on a watch stream, so the
+        execution first hands its pool slot back (src.pool.release_slot)
+        for queued work to use meanwhile.
+        """
+        if started is None:
+            started = time.monotonic()
+        timeout = rendered.get("wait_timeout_seconds", self.kube_wait_timeout_seconds)
+        release_slot()
+        done = self._watch_until(list_fn, converged, started + timeout, *args, **kwargs)
+        elapsed = round(time.monotonic() - started, 3)
+        summary = {
+            **summary,
+            "converged": done,
+            "converged_seconds": elapsed if done else None,
+        }
+        if not done:
+            return ActionExecutionResult(
+                False,
+                json.dumps(summary),
+                "",
+                1,
+                error=f"Timed out after {elapsed}s waiting for {what}",
+            )
+        logger.info(f"Waited {elapsed}s for {what}")
+        return ActionExecutionResult(True, json.dumps(summary), "", 0, error=None)
+
+    @staticmethod
+    def _watch_until(list_fn, converged, deadline: float, *args, **kwargs) -> bool:
+        """
+        Lists list_fn(*args, **kwargs) - a Kubernetes list call - then
+        follows changes to it over the watch API, keeping a view of the
+        current objects keyed by uid, until `converged(view)` is true
+        (returns True) or `deadline` (time.monotonic()) passes (False).
+        No polling: between events this blocks on the stream. A watch
+        that expires (410 Gone) is recovered by listing again.
+        """
+        objects: Dict[str, Any] = {}
+        resource_version = None
+        while True:
+            if resource_version is None:
+                listing = list_fn(*args, **kwargs)
+                objects = {obj.metadata.uid: obj for obj in listing.items}
+                resource_version = listing.metadata.resource_version
+                if converged(objects):
+                    return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            watch = kubernetes.watch.Watch()
+            try:
+                for event in watch.stream(
+                    list_fn,
+                    *args,
+                    resource_version=resource_version,
+                    timeout_seconds=max(1, int(remaining)),
+                    **kwargs,
+                ):
+                    obj = event["object"]
+                    resource_version = obj.metadata.resource_version
+                    if event["type"] == "DELETED":
+                        objects.pop(obj.metadata.uid, None)
+                    elif event["type"] in ("ADDED", "MODIFIED"):
+                        objects[obj.metadata.uid] = obj
+                    if converged(objects):
+                        return True
+                    if time.monotonic() >= deadline:
+                        return False
+            except ApiException as e:
+                if e.status != 410:
+                    raise
+                resource_version = None
+            finally:
+                watch.stop()
+
+    @staticmethod
+    def _evict_pod(core, pod, deadline: float) -> Optional[str]:
+        """
+        Evicts `pod`, retrying while its PodDisruptionBudget refuses (429)
+        and there's time left before `deadline` (time.monotonic()).
+        Returns None once evicted, or why it wasn't.
+        """
+        name, namespace = pod.metadata.name, pod.metadata.namespace
+        eviction = kubernetes.client.V1Eviction(
+            metadata=kubernetes.client.V1ObjectMeta(name=name, namespace=namespace)
+        )
+        backoff = DRAIN_RETRY_INITIAL_BACKOFF_SECONDS
+        while True:
+            try:
+                core.create_namespaced_pod_eviction(name, namespace, eviction)
+                return None
+            except ApiException as e:
+                reason = e.reason or str(e)
+                if e.status != 429:
+                    return reason
+            # Jittered, so pods sharing one PDB don't all retry in lockstep.
+            delay = backoff * random.uniform(0.5, 1.0)
+            if time.monotonic() + delay >= deadline:
+                return f"{reason} (still refused at the drain deadline)"
+            time.sleep(delay)
+            backoff = min(backoff * 2, DRAIN_RETRY_MAX_BACKOFF_SECONDS)
+
+    def _kube_patch_configmap(
+        self, api_client, rendered: dict
+    ) -> ActionExecutionResult:
+        core = kubernetes.client.CoreV1Api(api_client)
+        name = rendered["name"]
+        namespace = rendered["namespace"]
+        data = rendered.get("data") or {}
+        core.patch_namespaced_config_map(name, namespace, {"data": data})
+        summary = {"configmap": name, "namespace": namespace, "data": data}
+        return ActionExecutionResult(True, json.dumps(summary), "", 0, error=None)
+
+
+def _record_change():
+    changes = _changes.get()
+    if changes is not None:
+        changes.append(True)
+
+
+def _rollout_complete(resource: str, obj, generation: int) -> bool:
+    """
+    Whether the rollout of `obj` (a Deployment/StatefulSet/DaemonSet) that
+    started at `generation` has finished - the same checks as
+    `kubectl rollout status`.
+    """
+    status = obj.status
+    if status is None or (status.observed_generation or 0) < generation:
+        return False
+    if resource == "daemonset":
+        desired = status.desired_number_scheduled or 0
+        return (status.updated_number_scheduled or 0) >= desired and (
+            status.number_available or 0
+        ) >= desired
+    replicas = obj.spec.replicas if obj.spec.replicas is not None else 1
+    updated = status.updated_replicas or 0
+    if resource == "statefulset":
+        return (
+            updated >= replicas
+            and (status.ready_replicas or 0) >= replicas
+            and status.current_revision == status.update_revision
+        )
+    # deployment: every replica updated and available, no old ones left.
+    return (
+        updated >= replicas
+        and (status.replicas or 0) <= updated
+        and (status.available_replicas or 0) >= updated
+    )
+
+
+def _selectors(rendered: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        k: rendered[k] for k in ("label_selector", "field_selector") if rendered.get(k)
+    }
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Tuple
+
+import kubernetes
+
+logger = logging.getLogger("autoheal.kubeclients")
+
+# How long one controller's ApiClient is reused before it's rebuilt from
+# scratch - re-reading its token/kubeconfig (and any Vault references)
+# so rotated credentials are picked up even if nothing ever returns 401.
+# Matches src.vault's default cache TTL.
+DEFAULT_CLIENT_TTL_SECONDS = 300
+
+
+@dataclass
+class CachedClient:
+    key: str
+    api_client: "kubernetes.client.ApiClient"
+    fingerprint: str
+    expires_at: float
+    cleanup_paths: List[str]
+    users: int = 0
+    retired: bool = False
+    closed: bool = False
+
+
+class KubeClientCache:
+    """
+    One warm kubernetes ApiClient per kubeapi controller, so back-to-back
+    kube_actions against the same cluster reuse its connection pool (and
+    TLS sessions) instead of building a Configuration, materializing its
+    Vault secrets to tempfiles and handshaking all over again each time.
+
+    Callers acquire() a client for the duration of one action and
+    release() it afterwards. A client is retired - no longer handed out,
+    closed (connection pool, thread pool, credential tempfiles) once its
+    last user releases it - when:
+    - its controller's config changes (the entry is keyed by controller
+      name, and compared by a fingerprint of the controller's config);
+    - it's older than `ttl_seconds`;
+    - invalidate() is called for it, e.g. after the API server answered
+      401 because the credentials behind it rotated.
+    close() retires everything, for shutdown.
+
+    `build` turns a controller config into (Configuration, tempfile paths
+    to delete when the client is closed) - ActionExecutor's
+    _build_kube_configuration.
+    """
+
+    def __init__(
+        self,
+        build: Callable[[dict], Tuple["kubernetes.client.Configuration", List[str]]],
+        ttl_seconds: float = DEFAULT_CLIENT_TTL_SECONDS,
+    ):
+        self.build = build
+        self.ttl_seconds = ttl_seconds
+        self.lock = Lock()
+        self._clients: Dict[str, CachedClient] = {}
+        self._built = 0
+        self._reused = 0
+
+    def acquire(self, controller: dict, key: Optional[str] = None) -> CachedClient:
+        """
+        A client for `controller`, cached under `key` (its name) - or,
+        for a controller without one, under its config alone. Raises
+        whatever `build` raises if a new one is needed and can't be made.
+        """
+        fingerprint = _fingerprint(controller)
+        key = key or fingerprint
+        with self.lock:
+            cached = self._clients.get(key)
+            if cached is not None and self._usable(cached, fingerprint):
+                cached.users += 1
+                self._reused += 1
+                return cached
+        configuration, cleanup_paths = self.build(controller)
+        fresh = CachedClient(
+            key=key,
+            api_client=kubernetes.client.ApiClient(configuration),
+            fingerprint=fingerprint,
+            expires_at=time.monotonic() + self.ttl_seconds,
+            cleanup_paths=cleanup_paths,
+            users=1,
+        )
+        with self.lock:
+            self._built += 1
+            previous = self._clients.get(key)
+            self._clients[key] = fresh
+            if previous is not None:
+                self._retire_locked(previous)
+        return fresh
+
+    def release(self, cached: CachedClient):
+        with self.lock:
+            cached.users -= 1
+            if cached.retired:
+                self._close_if_unused_locked(cached)
+
+    def invalidate(self, cached: CachedClient):
+        """
+        Stops handing out `cached` - e.g. the API server just rejected
+        its credentials - so the next acquire() builds a new client.
+        """
+        with self.lock:
+            if self._clients.get(cached.key) is cached:
+                del self._clients[cached.key]
+            self._retire_locked(cached)
+
+    def close(self):
+        """Retires every client; in-use ones close when released."""
+        with self.lock:
+            for cached in self._clients.values():
+                self._retire_locked(cached)
+            self._clients.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                "clients": len(self._clients),
+                "built": self._built,
+                "reused": self._reused,
+            }
+
+    def _usable(self, cached: CachedClient, fingerprint: str) -> bool:
+        return (
+            cached.fingerprint == fingerprint and time.monotonic() < cached.expires_at
+        )
+
+    def _retire_locked(self, cached: CachedClient):
+        cached.retired = True
+        self._close_if_unused_locked(cached)
+
+    @staticmethod
+    def _close_if_unused_locked(cached: CachedClient):
+        if cached.users > 0 or cached.closed:
+            return
+        cached.closed = True
+        try:
+            cached.api_client.close()
+        except Exception as e:
+            logger.warning(f"Failed to close Kubernetes API client: {e}")
+        for path in cached.cleanup_paths:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+def _fingerprint(controller: dict) -> str:
+    encoded = json.dumps(controller, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
@@ -1,27 +1,41 @@
+import asyncio
 import logging
 from fastapi import FastAPI, Request, HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.exceptions import RequestValidationError
 from pydantic import BaseModel, Field, ValidationError
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
+from concurrent.futures import Future
 from contextlib import asynccontextmanager
 import datetime
 import os
 import sys
 import json
+import signal
+import threading
 from threading import Lock
 
 from src.auth import (
     APIKeyAuthMiddleware,
-    get_role_from_api_key,
-    has_permission,
-    is_action_allowed_for_key,
-    is_controller_allowed_for_key,
+    Principal,
+    resolve_requester,
 )
-from src.actions import get_action_config, get_controller_config, discover_actions
+from src.alertmanager import AlertmanagerMapper
+from src.actions import (
+    get_action_config,
+    get_controller_config,
+    get_controller_group,
+)
+from src.config import config_registry
 from src.executor import ActionExecutor
+from src.pool import ExecutionPool, PoolClosedError
+from src.jobs import JobStore
+from src.singleflight import SingleFlight
+from src.resultcache import DEFAULT_CACHE_TTL_SECONDS, ResultCache
+from src.drain import ShutdownDrain
+from src.process import output_sink
 from src.cooldown import CooldownTracker
-from src.ratelimit import RateLimiter
+from src.ratelimit import PreAuthGuard, RateLimiter
 import logging.handlers
 from src.notifications import notification_sender
 from src.audit import AuditChain, AuditShipper, verify_chain
@@ -65,7 +79,15 @@ file_handler = logging.handlers.RotatingFileHandler(
 file_handler.setFormatter(JsonFormatter())
 logger.addHandler(file_handler)
 
-executor = ActionExecutor()
+EXECUTION_CONFIG_PATH = os.path.join(
+    os.path.dirname(__file__), "../config/execution.yaml"
+)
+executor = ActionExecutor(EXECUTION_CONFIG_PATH)
+execution_pool = ExecutionPool(EXECUTION_CONFIG_PATH)
+job_store = JobStore()
+single_flight = SingleFlight()
+result_cache = ResultCache(EXECUTION_CONFIG_PATH)
+shutdown_drain = ShutdownDrain()
 
 COOLDOWN_STATE_PATH = os.path.join(os.path.dirname(__file__), "../logs/cooldowns.json")
 cooldown_tracker = CooldownTracker(COOLDOWN_STATE_PATH)
@@ -74,6 +96,12 @@ RATE_LIMIT_CONFIG_PATH = os.path.join(
     os.path.dirname(__file__), "../config/rate_limits.yaml"
 )
 rate_limiter = RateLimiter(RATE_LIMIT_CONFIG_PATH)
+pre_auth_guard = PreAuthGuard(RATE_LIMIT_CONFIG_PATH)
+
+ALERTMANAGER_CONFIG_PATH = os.path.join(
+    os.path.dirname(__file__), "../config/alertmanager.yaml"
+)
+alertmanager_mapper = AlertmanagerMapper(ALERTMANAGER_CONFIG_PATH)
 
 AUDIT_LOG_PATH = os.path.join(os.path.dirname(__file__), "../logs/audit.log")
 AUDIT_CONFIG_PATH = os.path.join(os.path.dirname(__file__), "../config/audit.yaml")
@@ -92,6 +120,21 @@ def write_audit_log(entry: dict):
     computed them); `status`/`error` are derived from `execution` for
     convenient top-level querying, same as before.
     """
+    finalized = audit_chain.append(_prepare_audit_entry(entry))
+    audit_shipper.ship(finalized)
+
+
+def write_audit_logs(entries: List[dict]):
+    """
+    write_audit_log for a group of entries - one grouped append to the
+    chain (see AuditChain.append_many) instead of one per entry.
+    """
+    prepared = [_prepare_audit_entry(entry) for entry in entries]
+    for finalized in audit_chain.append_many(prepared):
+        audit_shipper.ship(finalized)
+
+
+def _prepare_audit_entry(entry: dict) -> dict:
     execution = entry.get("execution") or {}
     audit_entry = dict(entry)
     audit_entry["timestamp"] = (
@@ -101,35 +144,123 @@ def write_audit_log(entry: dict):
     audit_entry["execution"] = execution
     audit_entry["status"] = execution.get("success")
     audit_entry["error"] = execution.get("error")
-    finalized = audit_chain.append(audit_entry)
-    audit_shipper.ship(finalized)
+    return audit_entry
 
 
 # Replace deprecated @app.on_event("startup") with lifespan event
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("API server starting up")
-    # Merge discovered actions with config/actions.yaml
-    discovered = discover_actions()
-    # Load existing actions config
-    import yaml
+    # Fail fast on broken config, then pick up changes as they land - see
+    # src/config.py::ConfigRegistry.
+    config_registry.reload(force=True)
+    config_registry.start_watching()
+    # Import the backends the configured controllers need (the kubernetes
+    # client, for kubeapi ones) now rather than on their first action. A
+    # controller type added by a later config reload is loaded on first use.
+    executor.controller_backends.preload(
+        (c.get("type") for c in config_registry.snapshot().controllers.values()),
+        executor,
+    )
+    _load_approval_queue()
+    _install_drain_signal_handlers()
+    yield
+    await begin_shutdown_drain()
+    config_registry.stop_watching()
+    executor.close()
+    logger.info("API server shut down")
 
-    actions_path = os.path.join(os.path.dirname(__file__), "../config/actions.yaml")
-    with open(actions_path) as f:
-        config_actions = yaml.safe_load(f) or {}
-    # Merge, giving priority to the explicit entries in config/actions.yaml
-    merged = {**discovered, **config_actions.get("actions", {})}
 
-    import src.actions
+INTERRUPTED_ERROR = "Interrupted by shutdown before the execution finished"
 
-    src.actions.set_merged_actions(merged)
-    _load_approval_queue()
-    yield
-    # Place any shutdown logic here
+# The drain_executions task, once shutdown has begun.
+_drain_task: Optional[asyncio.Future] = None
+
+
+def begin_shutdown_drain() -> asyncio.Future:
+    """
+    Starts shutting down, if that hasn't started already: /ready goes
+    false and new work is refused at once, and drain_executions runs in
+    the background. Returns its task. Must be called on the event loop.
+    """
+    global _drain_task
+    if _drain_task is None:
+        shutdown_drain.begin()
+        logger.warning("Shutdown requested: not ready, draining in-flight executions")
+        _drain_task = asyncio.ensure_future(drain_executions())
+    return _drain_task
+
+
+async def drain_executions():
+    """
+    Gives running executions up to pool.shutdown_grace_seconds to finish
+    (see ExecutionPool.drain), then audits every admitted request whose
+    execution still hasn't as interrupted, and fails its job if it has
+    one - so a pod killed mid-rollout leaves a record of what it cut off
+    instead of nothing.
+    """
+    drained = await asyncio.to_thread(execution_pool.drain)
+    interrupted = shutdown_drain.interrupted()
+    if not interrupted:
+        logger.info("Execution pool drained")
+        return
+    logger.warning(
+        f"{len(interrupted)} execution(s) interrupted by shutdown "
+        f"(pool drained within grace period: {drained})"
+    )
+    entries = []
+    for entry in interrupted:
+        entries.append(
+            {
+                **entry,
+                "execution": {"success": False, "error": INTERRUPTED_ERROR},
+                "interrupted": True,
+            }
+        )
+        if entry.get("job_id") is not None:
+            job_store.mark_finished(
+                entry["job_id"], error=INTERRUPTED_ERROR, interrupted=True
+            )
+    write_audit_logs(entries)
+
+
+def _install_drain_signal_handlers():
+    """
+    Uvicorn only runs the lifespan shutdown once every open request has
+    finished, which for a synchronous /webhook can be the whole length of
+    a playbook - long past the point a rolling update has stopped waiting.
+    So SIGTERM/SIGINT start the drain immediately, then carry on to
+    whatever handler (uvicorn's) was installed before. Signal handlers
+    can only be installed from the main thread; elsewhere (TestClient)
+    this does nothing and the drain starts at lifespan shutdown.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        previous = signal.getsignal(signum)
+
+        def on_signal(signum, frame, previous=previous):
+            loop.call_soon_threadsafe(begin_shutdown_drain)
+            if callable(previous):
+                previous(signum, frame)
+            elif previous == signal.SIG_DFL:
+                signal.signal(signum, signal.SIG_DFL)
+                signal.raise_signal(signum)
+
+        signal.signal(signum, on_signal)
+
+
+def draining_response() -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Shutting down; not accepting new executions"},
+        headers={"Retry-After": "5"},
+    )
 
 
 app = FastAPI(lifespan=lifespan)
-app.add_middleware(APIKeyAuthMiddleware)
+app.add_middleware(APIKeyAuthMiddleware, pre_auth=pre_auth_guard)
 
 
 @app.get("/health")
@@ -146,9 +277,44 @@ async def liveness_probe():
 
 @app.get("/ready")
 async def readiness_probe():
-    """Kubernetes/Swarm readiness probe endpoint (no auth)."""
-    # Optionally, add checks for DB, config, etc. For now, always ready.
-    return {"status": "ready", "version": os.getenv("API_VERSION", "0.1.0")}
+    """
+    Kubernetes/Swarm readiness probe endpoint (no auth). Not ready from
+    the moment shutdown begins, so the pod leaves the Service while its
+    in-flight executions drain.
+    """
+    version = os.getenv("API_VERSION", "0.1.0")
+    if shutdown_drain.draining:
+        return JSONResponse(
+            status_code=503, content={"status": "draining", "version": version}
+        )
+    return {"status": "ready", "version": version}
+
+
+@app.get("/execution/stats")
+async def execution_stats():
+    """
+    Current execution pool load - running/queued counts, saturation and
+    queue wait times, plus how many identical executions are in flight
+    and how many requests were coalesced onto one or answered from the
+    result cache. Any authenticated caller may read it; it exposes
+    capacity, not action details.
+    """
+    return {
+        **execution_pool.stats(),
+        "single_flight": single_flight.stats(),
+        "result_cache": result_cache.stats(),
+    }
+
+
+@app.get("/config/version")
+async def config_version():
+    """
+    Which config snapshot this process is serving (see src/config.py):
+    its version, content checksum and when it was loaded. Compare the
+    checksum across replicas to confirm a ConfigMap change reached all of
+    them.
+    """
+    return config_registry.snapshot().describe()
 
 
 @app.get("/protected")
@@ -158,10 +324,9 @@ async def protected():
 
 @app.get("/can-override-controller")
 async def can_override_controller(request: Request):
-    api_key = request.headers.get("x-api-key")
-    role = get_role_from_api_key(api_key)
-    allowed = has_permission(role, "controller_override")
-    if allowed:
+    principal: Principal = request.state.principal
+    role = principal.role
+    if principal.has_permission("controller_override"):
         return {"allowed": True, "role": role}
     return JSONResponse(
         status_code=403, content={"allowed": False, "role": role, "detail": "Forbidden"}
@@ -173,6 +338,13 @@ class WebhookPayload(BaseModel):
     controller_override: Optional[str] = Field(
         None, description="Override controller name"
     )
+    controllers: Optional[List[str]] = Field(
+        None,
+        description=(
+            "Run on each of these controllers (or controller groups) "
+            "concurrently, instead of one controller"
+        ),
+    )
     parameters: Optional[Dict[str, Any]] = Field(
         default_factory=dict, description="Action parameters"
     )
@@ -182,6 +354,13 @@ class WebhookPayload(BaseModel):
     approval_required: Optional[bool] = Field(
         default=False, description="If true, require approval before execution"
     )
+    async_mode: Optional[bool] = Field(
+        default=False,
+        description=(
+            "If true, return 202 with a job id as soon as the request is "
+            "admitted, instead of waiting for execution to finish"
+        ),
+    )
 
 
 # Approval queue. Kept in memory for fast reads, but persisted to disk on
@@ -205,6 +384,7 @@ MAX_PROCESSED_APPROVALS = 500
 #   "result": None|dict,
 #   "requested_by": <api key>,
 #   "role": <requester role>,
+#   "requester_scope": <Principal.scope()>,  # bearer-token requesters only
 #   "controller": <controller name>,
 #   "approved_by": <api key>,      # set once processed
 #   "approver_role": <role>,       # set once processed
@@ -292,6 +472,52 @@ def cooldown_key_for(
     )
 
 
+def single_flight_key_for(
+    action_config: dict, event_type: str, controller_name: str, params: dict
+) -> str:
+    """
+    What makes two executions identical for single-flight coalescing:
+    the same cooldown key and the same parameters. The cooldown key alone
+    isn't enough - an action without `cooldown_key_param` would otherwise
+    coalesce e.g. restarting nginx onto restarting postgres.
+    """
+    cd_key = cooldown_key_for(action_config, event_type, controller_name, params)
+    return f"{cd_key}|{json.dumps(params, sort_keys=True, default=str)}"
+
+
+def result_cache_key_for(
+    action_config: dict, event_type: str, controller_name: str, params: dict
+) -> str:
+    """
+    What makes two requests identical for the result cache: the same
+    single_flight_key_for, under the same config snapshot - a reload that
+    changes what an action runs (or where) must not be answered with the
+    old definition's result.
+    """
+    sf_key = single_flight_key_for(action_config, event_type, controller_name, params)
+    return f"{config_registry.snapshot().checksum}|{sf_key}"
+
+
+def cached_execution(
+    action_config: dict,
+    event_type: str,
+    controller_name: str,
+    params: dict,
+    dry_run: bool,
+):
+    """
+    The result of an identical execution that succeeded within the last
+    `cache_ttl_seconds`, for an action marked `cacheable: true` in
+    config/actions.yaml - or None, and the action must run. Dry runs are
+    never served from (or stored in) the cache.
+    """
+    if dry_run or not action_config.get("cacheable"):
+        return None
+    return result_cache.get(
+        result_cache_key_for(action_config, event_type, controller_name, params)
+    )
+
+
 def cooldown_block_audit_entry(
     event_type: str, controller_name: str, params: dict, api_key, role, dry_run: bool
 ) -> dict:
@@ -361,26 +587,66 @@ NO_EXECUTABLE_ERROR = "No playbook, script, command, or kube_action defined for
 
 
 def execute_action(
-    action_config: dict, controller_config: dict, params: dict, dry_run: bool
+    action_config: dict,
+    controller_name: str,
+    controller_config: dict,
+    params: dict,
+    dry_run: bool,
 ):
     """
     Dispatch an action to the right ActionExecutor method based on the
-    controller it's targeting. Returns None if the action defines none of
-    playbook/script/command/kube_action. Shared by /webhook and the
-    approval-execution path so the two can't drift.
+    controller it's targeting (`controller_name` in config/controllers.yaml,
+    which per-controller state such as kubeapi's cached clients is keyed
+    by), retrying transient failures under the
+    action's and controller's retry policy (see
+    ActionExecutor.run_with_retries). Returns None if the action defines
+    none of playbook/script/command/kube_action. Shared by /webhook and
+    the approval-execution path so the two can't drift.
     """
-    controller_name = (
-        controller_config.get("host")
-        or controller_config.get("api_server")
-        or ("in-cluster" if controller_config.get("in_cluster") else "local")
+    return executor.run_with_retries(
+        controller_config,
+        action_config,
+        lambda: _dispatch_action(
+            action_config, controller_name, controller_config, params, dry_run
+        ),
+        dry_run=dry_run,
     )
-    if controller_config.get("type") == "kubeapi":
+
+
+def _dispatch_action(
+    action_config: dict,
+    controller_name: str,
+    controller_config: dict,
+    params: dict,
+    dry_run: bool,
+):
+    """One attempt at execute_action."""
+    controller_type = controller_config.get("type")
+    if controller_type == "kubeapi":
         logger.info(
             f"Executing kube_action '{action_config.get('kube_action')}' via "
             f"controller '{controller_name}' with params {params} (dry_run={dry_run})"
         )
         return executor.run_kube_action(
-            controller_config, action_config, params, dry_run=dry_run
+            controller_config,
+            action_config,
+            params,
+            dry_run=dry_run,
+            controller_name=controller_name,
+        )
+    if executor.controller_backends.handles(controller_type):
+        # A plugged-in backend (`backends` in config/execution.yaml).
+        logger.info(
+            f"Executing action on '{controller_type}' controller "
+            f"'{controller_name}' with params {params} (dry_run={dry_run})"
+        )
+        return executor.run_on_backend(
+            controller_type,
+            controller_config,
+            action_config,
+            params,
+            dry_run=dry_run,
+            controller_name=controller_name,
         )
     if not is_local_controller(controller_config):
         logger.info(
@@ -412,8 +678,292 @@ def execute_action(
     return None
 
 
+def _caller_audit_fields(caller: Principal, client_ip: Optional[str]) -> dict:
+    return {"user": caller.api_key, "role": caller.role, "client_ip": client_ip}
+
+
+def _authorize_webhook_event(
+    payload: WebhookPayload, action_config: dict, caller: Principal
+):
+    """
+    The role, key-scope and controller checks for one event whose action
+    is known and within rate limits. Returns the error response to send,
+    or (targets, params) if it's admitted, where targets is a list of
+    (controller_name, controller_config) - more than one when the event
+    names several controllers or a controller group (see
+    _target_controller_names). Every one of them must be permitted, or
+    none runs.
+    """
+    event_type = payload.event_type
+    # Role-level gate: can this role trigger actions at all? (readonly
+    # cannot - it's audit_read/approvals_read only.) Checked after both
+    # rate limits so a role mismatch still consumes the caller's rate
+    # budget rather than offering an unlimited free 403 to spam.
+    if not caller.has_permission("execute_actions"):
+        return JSONResponse(
+            status_code=403,
+            content={"detail": "Executing actions is not permitted for your role"},
+        )
+    # Key-level gate: this specific API key may be scoped to a subset of
+    # actions on top of whatever its role permits (see config/auth.yaml).
+    if not caller.allows_action(event_type):
+        return JSONResponse(
+            status_code=403,
+            content={
+                "detail": f"Action '{event_type}' is not permitted for your API key"
+            },
+        )
+
+    # Controller override logic
+    if payload.controller_override and payload.controllers:
+        return JSONResponse(
+            status_code=400,
+            content={"detail": "Give either controller_override or controllers"},
+        )
+    if payload.controller_override or payload.controllers:
+        if not caller.has_permission("controller_override"):
+            return JSONResponse(
+                status_code=403,
+                content={"detail": "Controller override not permitted for your role"},
+            )
+    names = _target_controller_names(payload, action_config)
+    if len(names) > MAX_BATCH_EVENTS:
+        detail = f"An event may target at most {MAX_BATCH_EVENTS} controllers"
+        return JSONResponse(status_code=400, content={"detail": detail})
+    targets = []
+    for controller_name in names:
+        controller_config = get_controller_config(controller_name)
+        if not controller_config:
+            return JSONResponse(
+                status_code=400, content={"detail": "Unknown controller"}
+            )
+        if not caller.allows_controller(controller_name):
+            detail = f"Controller '{controller_name}' is not permitted for your API key"
+            return JSONResponse(status_code=403, content={"detail": detail})
+        targets.append((controller_name, controller_config))
+    # Parameter merging
+    params = action_config.get("parameters", {}).copy()
+    params.update(payload.parameters or {})
+    return targets, params
+
+
+def _target_controller_names(payload: WebhookPayload, action_config: dict):
+    """
+    The controllers an event runs on: its `controllers` list, else its
+    controller_override, else the action's default_controller - any of
+    which may name a controller group (controllers.yaml
+    `controller_groups`), standing for all of its members. Deduplicated,
+    in order.
+    """
+    requested = payload.controllers or [
+        payload.controller_override or action_config.get("default_controller")
+    ]
+    names: List[str] = []
+    for name in requested:
+        for member in get_controller_group(name) or (name,):
+            if member not in names:
+                names.append(member)
+    return names
+
+
+def _queue_webhook_for_approval(
+    raw_payload: dict, event_type: str, caller: Principal, controller_name: str
+) -> dict:
+    """
+    Queues an event for approval on the one controller it was resolved to
+    target. The stored payload names that controller as its
+    controller_override, in place of any `controllers` list or group, so
+    approve_approval runs it - and re-checks the requester - against the
+    controller it was queued for.
+    """
+    entry_id = str(uuid.uuid4())
+    payload = {**raw_payload, "controller_override": controller_name}
+    payload.pop("controllers", None)
+    approval_entry = {
+        "id": entry_id,
+        "payload": payload,
+        "status": "pending",
+        "result": None,
+        "requested_by": caller.api_key,
+        "role": caller.role,
+        "controller": controller_name,
+    }
+    if caller.is_token:
+        approval_entry["requester_scope"] = caller.scope()
+    with approval_lock:
+        approval_queue.append(approval_entry)
+        _save_approval_queue_locked()
+    logger.info(f"Action '{event_type}' queued for approval (id={entry_id})")
+    return {
+        "approval_id": entry_id,
+        "status": "pending",
+        "detail": "Action requires approval before execution.",
+    }
+
+
+def _webhook_cooldown_remaining(
+    action_config: dict,
+    event_type: str,
+    controller_name: str,
+    params: dict,
+    dry_run: bool,
+) -> Optional[float]:
+    # Cooldown: skip entirely for dry_run, which never touches real
+    # infrastructure and so has nothing to protect against.
+    cooldown_seconds = action_config.get("cooldown_seconds", 0)
+    if dry_run or not cooldown_seconds:
+        return None
+    cd_key = cooldown_key_for(action_config, event_type, controller_name, params)
+    return cooldown_tracker.seconds_remaining(cd_key, cooldown_seconds)
+
+
+def _submit_webhook_job(
+    event_type: str,
+    action_config: dict,
+    controller_name: str,
+    controller_config: dict,
+    params: dict,
+    caller: Principal,
+    client_ip: Optional[str],
+    dry_run: bool,
+) -> JSONResponse:
+    # Admitted exactly as a synchronous request would be, but the caller
+    # gets a job handle back immediately instead of waiting on the
+    # execution itself.
+    job = job_store.create(
+        action=event_type,
+        controller=controller_name,
+        parameters=params,
+        dry_run=dry_run,
+        requested_by=caller.api_key,
+        role=caller.role,
+    )
+    try:
+        future, coalesced = submit_execution(
+            event_type,
+            action_config,
+            controller_name,
+            controller_config,
+            params,
+            dry_run,
+            job_id=job["id"],
+            audit_fields=_caller_audit_fields(caller, client_ip),
+        )
+    except PoolClosedError as e:
+        # Shutdown began after the draining check: the job never runs.
+        job_store.mark_finished(job["id"], error=str(e))
+        return draining_response()
+    if coalesced:
+        # Attached to an execution that's already running.
+        job_store.mark_running(job["id"])
+    future.add_done_callback(
+        lambda done: finish_webhook_job(
+            job["id"],
+            done,
+            event_type,
+            action_config,
+            controller_name,
+            controller_config,
+            params,
+            caller.api_key,
+            caller.role,
+            client_ip,
+            dry_run,
+            coalesced,
+        )
+    )
+    logger.info(f"Action '{event_type}' accepted as job {job['id']}")
+    return JSONResponse(
+        status_code=202,
+        content={
+            "job_id": job["id"],
+            "status": job["status"],
+            "status_url": f"/jobs/{job['id']}",
+            "detail": "Action accepted for asynchronous execution.",
+        },
+    )
+
+
+def submit_execution(
+    event_type: str,
+    action_config: dict,
+    controller_name: str,
+    controller_config: dict,
+    params: dict,
+    dry_run: bool,
+    job_id: Optional[str] = None,
+    audit_fields: Optional[dict] = None,
+) -> Tuple[Future, bool]:
+    """
+    Starts an action on the execution pool (under its controller's
+    bulkhead, prioritized by the action's severity) and returns (a Future
+    for its ActionExecutionResult, whether this request was coalesced).
+    If an identical real execution is already in flight - same
+    single_flight_key_for - no new one starts: the caller gets the
+    running one's Future and shares its result (see src/singleflight.py).
+    Dry runs are never coalesced. `job_id` runs it as that async_mode
+    job's execution (see _run_job_execution).
+
+    Until it completes, the request is tracked by shutdown_drain with
+    `audit_fields` (who asked for it), so a shutdown that cuts it off
+    still audits it - see drain_executions.
+    """
+
+    def start() -> Future:
+        if job_id is None:
+            fn_args = (execute_action, action_config)
+        else:
+            fn_args = (_run_job_execution, job_id, action_config)
+        return execution_pool.submit(
+            *fn_args,
+            controller_name,
+            controller_config,
+            params,
+            dry_run,
+            controller=controller_name,
+            max_concurrency=controller_config.get("max_concurrency"),
+            priority=action_config.get("severity"),
+        )
+
+    if dry_run:
+        future, coalesced = start(), False
+    else:
+        key = single_flight_key_for(action_config, event_type, controller_name, params)
+        future, started = single_flight.run(key, start)
+        coalesced = not started
+        if coalesced:
+            logger.info(
+                f"Action '{event_type}' on '{controller_name}' is already "
+                "executing with the same parameters; coalescing onto it"
+            )
+    interrupted_entry = {
+        **(audit_fields or {}),
+        "action": event_type,
+        "controller": controller_name,
+        "controller_type": controller_config.get("type"),
+        "parameters": params,
+        "dry_run": dry_run,
+        "coalesced": coalesced,
+    }
+    if job_id is not None:
+        interrupted_entry["job_id"] = job_id
+    shutdown_drain.track(future, interrupted_entry)
+    return future, coalesced
+
+
+async def await_execution(future: Future):
+    """
+    Awaits a submit_execution() Future without blocking the event loop.
+    Shielded: the Future may be shared with coalesced requests, so this
+    caller going away must not cancel it for everyone else.
+    """
+    return await asyncio.shield(asyncio.wrap_future(future))
+
+
 @app.post("/webhook")
 async def webhook(request: Request):
+    if shutdown_drain.draining:
+        return draining_response()
     try:
         raw_payload = await request.json()
         payload = WebhookPayload(**raw_payload)
@@ -426,8 +976,8 @@ async def webhook(request: Request):
         return JSONResponse(
             status_code=400, content={"detail": "Malformed JSON payload"}
         )
-    api_key = request.headers.get("x-api-key")
-    role = get_role_from_api_key(api_key)
+    caller: Principal = request.state.principal
+    api_key, role = caller.api_key, caller.role
     event_type = payload.event_type
 
     # Caller-level rate limit: checked before anything else, including
@@ -459,93 +1009,327 @@ async def webhook(request: Request):
         )
         return rate_limit_block_response(action_retry_after)
 
-    # Role-level gate: can this role trigger actions at all? (readonly
-    # cannot - it's audit_read/approvals_read only.) Checked after both
-    # rate limits so a role mismatch still consumes the caller's rate
-    # budget rather than offering an unlimited free 403 to spam.
-    if not has_permission(role, "execute_actions"):
-        return JSONResponse(
-            status_code=403,
-            content={"detail": "Executing actions is not permitted for your role"},
-        )
-    # Key-level gate: this specific API key may be scoped to a subset of
-    # actions on top of whatever its role permits (see config/auth.yaml).
-    if not is_action_allowed_for_key(api_key, event_type):
-        return JSONResponse(
-            status_code=403,
-            content={
-                "detail": f"Action '{event_type}' is not permitted for your API key"
-            },
+    admitted = _authorize_webhook_event(payload, action_config, caller)
+    if isinstance(admitted, JSONResponse):
+        return admitted
+    targets, params = admitted
+    client_ip = request.client.host if request.client else None
+    if len(targets) > 1:
+        return await _fan_out_webhook_event(
+            raw_payload, payload, action_config, targets, params, caller, client_ip
         )
-
-    # Controller override logic
-    controller_override = payload.controller_override
-    controller_name = controller_override or action_config.get("default_controller")
-    if controller_override:
-        if not has_permission(role, "controller_override"):
-            return JSONResponse(
-                status_code=403,
-                content={"detail": "Controller override not permitted for your role"},
-            )
-    controller_config = get_controller_config(controller_name)
-    if not controller_config:
-        return JSONResponse(status_code=400, content={"detail": "Unknown controller"})
-    if not is_controller_allowed_for_key(api_key, controller_name):
-        detail = f"Controller '{controller_name}' is not permitted for your API key"
-        return JSONResponse(status_code=403, content={"detail": detail})
-    # Parameter merging
-    params = action_config.get("parameters", {}).copy()
-    params.update(payload.parameters or {})
+    [(controller_name, controller_config)] = targets
     dry_run = getattr(payload, "dry_run", False)
     approval_required = getattr(payload, "approval_required", False)
     if approval_required:
         # Queue for approval, do not execute
-        entry_id = str(uuid.uuid4())
-        approval_entry = {
-            "id": entry_id,
-            "payload": raw_payload,
-            "status": "pending",
-            "result": None,
-            "requested_by": api_key,
-            "role": role,
-            "controller": controller_name,
-        }
-        with approval_lock:
-            approval_queue.append(approval_entry)
-            _save_approval_queue_locked()
-        logger.info(f"Action '{event_type}' queued for approval (id={entry_id})")
-        return {
-            "approval_id": entry_id,
-            "status": "pending",
-            "detail": "Action requires approval before execution.",
-        }
-    # Cooldown: skip entirely for dry_run, which never touches real
-    # infrastructure and so has nothing to protect against.
-    cooldown_seconds = action_config.get("cooldown_seconds", 0)
-    cd_key = cooldown_key_for(action_config, event_type, controller_name, params)
-    if not dry_run and cooldown_seconds:
-        remaining = cooldown_tracker.seconds_remaining(cd_key, cooldown_seconds)
-        if remaining is not None:
-            write_audit_log(
-                cooldown_block_audit_entry(
-                    event_type, controller_name, params, api_key, role, dry_run
-                )
+        return _queue_webhook_for_approval(
+            raw_payload, event_type, caller, controller_name
+        )
+    # Answered from the result cache ahead of the cooldown check: a
+    # repeat within the TTL gets the earlier result, not a 409.
+    cached = None
+    if not payload.async_mode:
+        cached = cached_execution(
+            action_config, event_type, controller_name, params, dry_run
+        )
+    if cached is not None:
+        return finish_webhook_execution(
+            cached,
+            event_type,
+            action_config,
+            controller_name,
+            controller_config,
+            params,
+            api_key,
+            role,
+            client_ip,
+            dry_run,
+            cached=True,
+        )
+    remaining = _webhook_cooldown_remaining(
+        action_config, event_type, controller_name, params, dry_run
+    )
+    if remaining is not None:
+        write_audit_log(
+            cooldown_block_audit_entry(
+                event_type, controller_name, params, api_key, role, dry_run
             )
-            return cooldown_block_response(event_type, controller_name, remaining)
+        )
+        return cooldown_block_response(event_type, controller_name, remaining)
+
+    if payload.async_mode:
+        return _submit_webhook_job(
+            event_type,
+            action_config,
+            controller_name,
+            controller_config,
+            params,
+            caller,
+            client_ip,
+            dry_run,
+        )
 
-    # Dry-run support
-    exec_result = execute_action(action_config, controller_config, params, dry_run)
+    # Dry-run support. Runs on the execution pool, never on the event
+    # loop itself, and counts against this controller's bulkhead - see
+    # src/pool.py::ExecutionPool.
+    try:
+        future, coalesced = submit_execution(
+            event_type,
+            action_config,
+            controller_name,
+            controller_config,
+            params,
+            dry_run,
+            audit_fields=_caller_audit_fields(caller, client_ip),
+        )
+        exec_result = await await_execution(future)
+    except PoolClosedError:
+        # Refused, or queued and never started before the drain deadline
+        # (audited as interrupted by drain_executions).
+        return draining_response()
     if exec_result is None:
         logger.error(f"No executable defined for action '{event_type}'")
         return JSONResponse(
             status_code=400,
             content={"detail": NO_EXECUTABLE_ERROR},
         )
-    if not dry_run and cooldown_seconds:
+    return finish_webhook_execution(
+        exec_result,
+        event_type,
+        action_config,
+        controller_name,
+        controller_config,
+        params,
+        api_key,
+        role,
+        client_ip,
+        dry_run,
+        coalesced=coalesced,
+    )
+
+
+async def _fan_out_webhook_event(
+    raw_payload: dict,
+    payload: WebhookPayload,
+    action_config: dict,
+    targets: List[Tuple[str, dict]],
+    params: dict,
+    caller: Principal,
+    client_ip: Optional[str],
+) -> dict:
+    """
+    /webhook for an event targeting several controllers: everything a
+    single-controller event goes through - approval, cooldown, async_mode,
+    execution - done per controller, with every execution started at once
+    on the execution pool (each under its own controller's bulkhead), so
+    the whole fan-out takes about as long as its slowest controller.
+
+    Answers with one aggregated result: {"action", "parameters",
+    "dry_run", "success", "results": [{controller, status_code, body},
+    ...]}, where each status_code/body is what /webhook would have
+    answered for that controller alone, and success is whether every
+    controller's execution succeeded. Each controller gets its own audit
+    entry, written together as one group once all are done.
+    """
+    event_type = payload.event_type
+    api_key, role = caller.api_key, caller.role
+    dry_run = payload.dry_run
+    results: Dict[str, dict] = {}
+    audit_entries: List[dict] = []
+
+    def result(controller_name, response) -> dict:
+        if isinstance(response, JSONResponse):
+            return {
+                "controller": controller_name,
+                "status_code": response.status_code,
+                "body": json.loads(response.body),
+            }
+        return {"controller": controller_name, "status_code": 200, "body": response}
+
+    executions = []
+    for controller_name, controller_config in targets:
+        if payload.approval_required:
+            # One approval per controller, each approvable on its own.
+            results[controller_name] = result(
+                controller_name,
+                _queue_webhook_for_approval(
+                    raw_payload, event_type, caller, controller_name
+                ),
+            )
+            continue
+        cached = None
+        if not payload.async_mode:
+            cached = cached_execution(
+                action_config, event_type, controller_name, params, dry_run
+            )
+        if cached is not None:
+            results[controller_name] = result(
+                controller_name,
+                finish_webhook_execution(
+                    cached,
+                    event_type,
+                    action_config,
+                    controller_name,
+                    controller_config,
+                    params,
+                    api_key,
+                    role,
+                    client_ip,
+                    dry_run,
+                    audit_entries=audit_entries,
+                    cached=True,
+                ),
+            )
+            continue
+        remaining = _webhook_cooldown_remaining(
+            action_config, event_type, controller_name, params, dry_run
+        )
+        if remaining is not None:
+            audit_entries.append(
+                cooldown_block_audit_entry(
+                    event_type, controller_name, params, api_key, role, dry_run
+                )
+            )
+            results[controller_name] = result(
+                controller_name,
+                cooldown_block_response(event_type, controller_name, remaining),
+            )
+            continue
+        if payload.async_mode:
+            results[controller_name] = result(
+                controller_name,
+                _submit_webhook_job(
+                    event_type,
+                    action_config,
+                    controller_name,
+                    controller_config,
+                    params,
+                    caller,
+                    client_ip,
+                    dry_run,
+                ),
+            )
+            continue
+        try:
+            future, coalesced = submit_execution(
+                event_type,
+                action_config,
+                controller_name,
+                controller_config,
+                params,
+                dry_run,
+                audit_fields=_caller_audit_fields(caller, client_ip),
+            )
+        except PoolClosedError:
+            results[controller_name] = result(controller_name, draining_response())
+            continue
+        executions.append((controller_name, controller_config, future, coalesced))
+
+    outcomes = await asyncio.gather(
+        *(await_execution(future) for _, _, future, _ in executions),
+        return_exceptions=True,
+    )
+    for (controller_name, controller_config, _, coalesced), exec_result in zip(
+        executions, outcomes
+    ):
+        if isinstance(exec_result, PoolClosedError):
+            # Never started before the drain deadline; drain_executions
+            # audits it as interrupted.
+            response = draining_response()
+        elif isinstance(exec_result, Exception):
+            logger.error(
+                f"Action '{event_type}' on '{controller_name}' failed: {exec_result}"
+            )
+            response = JSONResponse(
+                status_code=500, content={"detail": "Internal server error"}
+            )
+        elif exec_result is None:
+            logger.error(f"No executable defined for action '{event_type}'")
+            response = JSONResponse(
+                status_code=400, content={"detail": NO_EXECUTABLE_ERROR}
+            )
+        else:
+            response = finish_webhook_execution(
+                exec_result,
+                event_type,
+                action_config,
+                controller_name,
+                controller_config,
+                params,
+                api_key,
+                role,
+                client_ip,
+                dry_run,
+                audit_entries=audit_entries,
+                coalesced=coalesced,
+            )
+        results[controller_name] = result(controller_name, response)
+    write_audit_logs(audit_entries)
+
+    ordered = [results[name] for name, _ in targets]
+    return {
+        "action": event_type,
+        "parameters": params,
+        "dry_run": dry_run,
+        "success": all(
+            r["status_code"] == 200 and r["body"].get("execution", {}).get("success")
+            for r in ordered
+        ),
+        "results": ordered,
+    }
+
+
+def finish_webhook_execution(
+    exec_result,
+    event_type: str,
+    action_config: dict,
+    controller_name: str,
+    controller_config: dict,
+    params: dict,
+    api_key,
+    role,
+    client_ip: Optional[str],
+    dry_run: bool,
+    audit_entries: Optional[List[dict]] = None,
+    coalesced: bool = False,
+    cached: bool = False,
+) -> dict:
+    """
+    Everything /webhook does once an execution has produced a result:
+    start the cooldown, write the audit entry, notify, and build the
+    response body. Shared by the synchronous path, async_mode jobs and
+    /webhook/batch so they can't drift. If `audit_entries` is given, the
+    audit entry is added to it for the caller to write as part of a group
+    instead of being written here.
+
+    A `coalesced` request (one that shared an identical in-flight
+    execution's result - see submit_execution) is still audited, marked
+    as such, but doesn't record the cooldown or notify again: the
+    execution it shared already did both. The same goes for a `cached`
+    one, answered with an earlier execution's result (see
+    cached_execution); a successful real execution of a cacheable action
+    is what puts that result in the cache.
+    """
+    cooldown_seconds = action_config.get("cooldown_seconds", 0)
+    if action_config.get("cacheable") and exec_result.success:
+        if not (dry_run or coalesced or cached):
+            result_cache.put(
+                result_cache_key_for(
+                    action_config, event_type, controller_name, params
+                ),
+                exec_result,
+                float(
+                    action_config.get("cache_ttl_seconds", DEFAULT_CACHE_TTL_SECONDS)
+                ),
+            )
+    if not dry_run and cooldown_seconds and not (coalesced or cached):
         # Record on any real attempt, success or failure - a failing
         # target retried in a tight loop is exactly the flapping scenario
         # cooldown exists to prevent, not just a repeated success.
-        cooldown_tracker.record(cd_key)
+        cooldown_tracker.record(
+            cooldown_key_for(action_config, event_type, controller_name, params)
+        )
     logger.info(f"Execution result: {exec_result.as_dict()}")
     # Write audit log
     audit_entry = {
@@ -556,21 +1340,29 @@ async def webhook(request: Request):
         "controller_type": controller_config.get("type"),
         "parameters": params,
         "execution": exec_result.as_dict(),
-        "client_ip": request.client.host if request.client else None,
+        "client_ip": client_ip,
         "dry_run": dry_run,
+        "coalesced": coalesced,
+        "cached": cached,
     }
-    write_audit_log(audit_entry)
+    if audit_entries is not None:
+        audit_entries.append(audit_entry)
+    else:
+        write_audit_log(audit_entry)
     # Send notifications
-    status = "success" if exec_result.success else "failure"
-    details = exec_result.as_dict().get("stdout") or exec_result.as_dict().get("error")
-    notification_sender.notify(
-        event_type,
-        controller_name,
-        api_key,
-        status,
-        details=details,
-        severity=action_config.get("severity"),
-    )
+    if not (coalesced or cached):
+        status = "success" if exec_result.success else "failure"
+        details = exec_result.as_dict().get("stdout") or exec_result.as_dict().get(
+            "error"
+        )
+        notification_sender.notify(
+            event_type,
+            controller_name,
+            api_key,
+            status,
+            details=details,
+            severity=action_config.get("severity"),
+        )
     return {
         "action": event_type,
         "controller": controller_name,
@@ -579,9 +1371,483 @@ async def webhook(request: Request):
         "controller_type": controller_config.get("type"),
         "execution": exec_result.as_dict(),
         "dry_run": dry_run,
+        "coalesced": coalesced,
+        "cached": cached,
     }
 
 
+def _run_job_execution(
+    job_id: str,
+    action_config: dict,
+    controller_name: str,
+    controller_config: dict,
+    params: dict,
+    dry_run: bool,
+):
+    """
+    An async_mode job's execution, run on the execution pool: execute_action
+    with the job marked running and the process's output lines going to
+    the job's output feed, for GET /jobs/{id}/stream.
+    """
+    job_store.mark_running(job_id)
+    output = job_store.output(job_id)
+    sink_token = output_sink.set(output.append if output is not None else None)
+    try:
+        return execute_action(
+            action_config, controller_name, controller_config, params, dry_run
+        )
+    finally:
+        output_sink.reset(sink_token)
+
+
+def finish_webhook_job(
+    job_id: str,
+    future: Future,
+    event_type: str,
+    action_config: dict,
+    controller_name: str,
+    controller_config: dict,
+    params: dict,
+    api_key,
+    role,
+    client_ip: Optional[str],
+    dry_run: bool,
+    coalesced: bool,
+):
+    """
+    Completes an async_mode job once the execution it's waiting on - its
+    own, or the one it was coalesced onto - is done. Runs as that Future's
+    done-callback; never raises, since there's no HTTP response left to
+    report an error through - whatever happens ends up recorded on the job.
+    """
+    try:
+        exec_result = future.result()
+        if exec_result is None:
+            logger.error(f"No executable defined for action '{event_type}'")
+            job_store.mark_finished(job_id, error=NO_EXECUTABLE_ERROR)
+            return
+        finish_webhook_execution(
+            exec_result,
+            event_type,
+            action_config,
+            controller_name,
+            controller_config,
+            params,
+            api_key,
+            role,
+            client_ip,
+            dry_run,
+            coalesced=coalesced,
+        )
+        job_store.mark_finished(
+            job_id, execution=exec_result.as_dict(), coalesced=coalesced
+        )
+    except Exception as e:
+        logger.error(f"Job {job_id} for action '{event_type}' failed: {e}")
+        job_store.mark_finished(job_id, error=str(e))
+
+
+# Upper bound on events per /webhook/batch request - every one of them may
+# end up holding an execution pool slot.
+MAX_BATCH_EVENTS = 100
+
+
+def _batch_item_result(index: int, response) -> dict:
+    """One /webhook/batch result, from what /webhook would have answered."""
+    if isinstance(response, JSONResponse):
+        return {
+            "index": index,
+            "status_code": response.status_code,
+            "body": json.loads(response.body),
+        }
+    return {"index": index, "status_code": 200, "body": response}
+
+
+@app.post("/webhook/batch")
+async def webhook_batch(request: Request):
+    """
+    Accepts a JSON array of /webhook payloads (at most MAX_BATCH_EVENTS)
+    and answers with one result per event, in order: {"results": [{index,
+    status_code, body}, ...]}, where status_code/body are exactly what
+    /webhook would have answered for that event on its own. One bad event
+    never fails the others.
+
+    Cheaper than one request per event: the caller's role, key scope and
+    permissions are resolved once; rate limits are checked in bulk (each
+    event still counts as one call against the caller's and the action's
+    limits - whatever doesn't fit is rejected with 429); the admitted
+    events execute concurrently on the execution pool, under the same
+    bulkheads as /webhook; and every audit entry the batch produces is
+    written in one grouped append once it's done. An event with the same
+    cooldown key as an earlier one in the same batch is rejected as in
+    cooldown, as it would have been had the two arrived one after another.
+    async_mode events get their job id back immediately and are audited
+    when their job finishes, as with /webhook.
+    """
+    if shutdown_drain.draining:
+        return draining_response()
+    try:
+        raw_items = await request.json()
+    except Exception:
+        return JSONResponse(
+            status_code=400, content={"detail": "Malformed JSON payload"}
+        )
+    if not isinstance(raw_items, list) or not raw_items:
+        return JSONResponse(
+            status_code=400,
+            content={"detail": "Expected a non-empty JSON array of webhook payloads"},
+        )
+    if len(raw_items) > MAX_BATCH_EVENTS:
+        return JSONResponse(
+            status_code=400,
+            content={"detail": f"A batch may hold at most {MAX_BATCH_EVENTS} events"},
+        )
+    client_ip = request.client.host if request.client else None
+    return {
+        "results": await _process_webhook_batch(
+            raw_items, request.state.principal, client_ip
+        )
+    }
+
+
+async def _process_webhook_batch(
+    raw_items: List[Any], caller: Principal, client_ip: Optional[str]
+) -> List[dict]:
+    """
+    The /webhook/batch pipeline, for `raw_items` (/webhook payloads) whose
+    envelope has already been checked. Returns one result per item, in
+    order. Also what /webhook/alertmanager fans a notification out with.
+    """
+    api_key, role = caller.api_key, caller.role
+    results: List[Optional[dict]] = [None] * len(raw_items)
+    audit_entries: List[dict] = []
+
+    payloads: Dict[int, WebhookPayload] = {}
+    for index, raw_payload in enumerate(raw_items):
+        try:
+            payloads[index] = WebhookPayload(**raw_payload)
+        except ValidationError as ve:
+            results[index] = _batch_item_result(
+                index,
+                JSONResponse(
+                    status_code=400,
+                    content={"detail": "Invalid payload", "errors": ve.errors()},
+                ),
+            )
+        except Exception:
+            results[index] = _batch_item_result(
+                index,
+                JSONResponse(status_code=400, content={"detail": "Invalid payload"}),
+            )
+
+    def reject_rate_limited(indexes, retry_after):
+        for index in indexes:
+            payload = payloads[index]
+            audit_entries.append(
+                rate_limit_block_audit_entry(
+                    payload.event_type, api_key, role, payload.parameters
+                )
+            )
+            results[index] = _batch_item_result(
+                index, rate_limit_block_response(retry_after)
+            )
+
+    # Caller-level rate limit, for the whole batch at once.
+    indexes = list(payloads)
+    admitted, retry_after = rate_limiter.check_many(
+        f"caller:{api_key}", rate_limiter.limit_for_role(role), len(indexes)
+    )
+    reject_rate_limited(indexes[admitted:], retry_after)
+
+    action_configs: Dict[str, dict] = {}
+    by_action: Dict[str, List[int]] = {}
+    for index in indexes[:admitted]:
+        event_type = payloads[index].event_type
+        if event_type not in action_configs:
+            action_configs[event_type] = get_action_config(event_type)
+        if not action_configs[event_type]:
+            results[index] = _batch_item_result(
+                index,
+                JSONResponse(
+                    status_code=400, content={"detail": "Unknown action/event_type"}
+                ),
+            )
+            continue
+        by_action.setdefault(event_type, []).append(index)
+
+    # Action-level rate limits, one bulk check per distinct action.
+    within_limits = []
+    for event_type, group in by_action.items():
+        allowed, retry_after = rate_limiter.check_many(
+            f"action:{event_type}",
+            rate_limiter.limit_for_action(event_type),
+            len(group),
+        )
+        reject_rate_limited(group[allowed:], retry_after)
+        within_limits.extend(group[:allowed])
+
+    executions = []
+    batch_cooldown_keys = set()
+    for index in sorted(within_limits):
+        payload = payloads[index]
+        event_type = payload.event_type
+        action_config = action_configs[event_type]
+        admitted = _authorize_webhook_event(payload, action_config, caller)
+        if isinstance(admitted, JSONResponse):
+            results[index] = _batch_item_result(index, admitted)
+            continue
+        targets, params = admitted
+        if len(targets) > 1:
+            results[index] = _batch_item_result(
+                index,
+                JSONResponse(
+                    status_code=400,
+                    content={
+                        "detail": "Events targeting several controllers aren't "
+                        "supported in a batch; send them to /webhook"
+                    },
+                ),
+            )
+            continue
+        [(controller_name, controller_config)] = targets
+        dry_run = payload.dry_run
+        if payload.approval_required:
+            results[index] = _batch_item_result(
+                index,
+                _queue_webhook_for_approval(
+                    raw_items[index], event_type, caller, controller_name
+                ),
+            )
+            continue
+        cached = None
+        if not payload.async_mode:
+            cached = cached_execution(
+                action_config, event_type, controller_name, params, dry_run
+            )
+        if cached is not None:
+            results[index] = _batch_item_result(
+                index,
+                finish_webhook_execution(
+                    cached,
+                    event_type,
+                    action_config,
+                    controller_name,
+                    controller_config,
+                    params,
+                    api_key,
+                    role,
+                    client_ip,
+                    dry_run,
+                    audit_entries=audit_entries,
+                    cached=True,
+                ),
+            )
+            continue
+        remaining = _webhook_cooldown_remaining(
+            action_config, event_type, controller_name, params, dry_run
+        )
+        cooldown_seconds = action_config.get("cooldown_seconds", 0)
+        if not dry_run and cooldown_seconds:
+            cd_key = cooldown_key_for(
+                action_config, event_type, controller_name, params
+            )
+            if remaining is None and cd_key in batch_cooldown_keys:
+                remaining = float(cooldown_seconds)
+            batch_cooldown_keys.add(cd_key)
+        if remaining is not None:
+            audit_entries.append(
+                cooldown_block_audit_entry(
+                    event_type, controller_name, params, api_key, role, dry_run
+                )
+            )
+            results[index] = _batch_item_result(
+                index, cooldown_block_response(event_type, controller_name, remaining)
+            )
+            continue
+        if payload.async_mode:
+            results[index] = _batch_item_result(
+                index,
+                _submit_webhook_job(
+                    event_type,
+                    action_config,
+                    controller_name,
+                    controller_config,
+                    params,
+                    caller,
+                    client_ip,
+                    dry_run,
+                ),
+            )
+            continue
+        executions.append(
+            {
+                "index": index,
+                "event_type": event_type,
+                "action_config": action_config,
+                "controller_name": controller_name,
+                "controller_config": controller_config,
+                "params": params,
+                "dry_run": dry_run,
+            }
+        )
+
+    submitted = []
+    for e in executions:
+        try:
+            e["future"], e["coalesced"] = submit_execution(
+                e["event_type"],
+                e["action_config"],
+                e["controller_name"],
+                e["controller_config"],
+                e["params"],
+                e["dry_run"],
+                audit_fields=_caller_audit_fields(caller, client_ip),
+            )
+        except PoolClosedError:
+            # Shutdown began mid-batch. The rest of the batch - and the
+            # audit entries it has already produced - still completes.
+            results[e["index"]] = _batch_item_result(e["index"], draining_response())
+            continue
+        submitted.append(e)
+    executions = submitted
+    outcomes = await asyncio.gather(
+        *(await_execution(e["future"]) for e in executions),
+        return_exceptions=True,
+    )
+    for e, exec_result in zip(executions, outcomes):
+        index = e["index"]
+        if isinstance(exec_result, PoolClosedError):
+            results[index] = _batch_item_result(index, draining_response())
+        elif isinstance(exec_result, Exception):
+            logger.error(
+                f"Batch event {index} ('{e['event_type']}') failed: {exec_result}"
+            )
+            results[index] = _batch_item_result(
+                index,
+                JSONResponse(
+                    status_code=500, content={"detail": "Internal server error"}
+                ),
+            )
+        elif exec_result is None:
+            logger.error(f"No executable defined for action '{e['event_type']}'")
+            results[index] = _batch_item_result(
+                index,
+                JSONResponse(status_code=400, content={"detail": NO_EXECUTABLE_ERROR}),
+            )
+        else:
+            results[index] = _batch_item_result(
+                index,
+                finish_webhook_execution(
+                    exec_result,
+                    e["event_type"],
+                    e["action_config"],
+                    e["controller_name"],
+                    e["controller_config"],
+                    e["params"],
+                    api_key,
+                    role,
+                    client_ip,
+                    e["dry_run"],
+                    audit_entries=audit_entries,
+                    coalesced=e["coalesced"],
+                ),
+            )
+    write_audit_logs(audit_entries)
+    return results
+
+
+@app.post("/webhook/alertmanager")
+async def webhook_alertmanager(request: Request):
+    """
+    Native ingestion of Alertmanager webhook notifications (and Grafana
+    unified alerting's, which share the format) - no translation shim in
+    front of /webhook needed.
+
+    The notification itself is authenticated and pre-auth rate limited by
+    APIKeyAuthMiddleware like any request. Its resolved alerts are then
+    dropped before mapping: they're never executed and never count
+    against the per-event rate limits. Each firing alert is mapped to a
+    /webhook event by config/alertmanager.yaml (see
+    src/alertmanager.py::AlertmanagerMapper); alerts nothing maps are
+    skipped and counted. The mapped events then go
+    through exactly the /webhook/batch pipeline - one auth resolution,
+    bulk rate limits, concurrent execution, one grouped audit append - so
+    a grouped notification of 50 alerts is one request, not 50. Several
+    alerts for the same target in one group are deduplicated by the
+    action's cooldown, as in a batch.
+
+    Always answers 200 once the notification is parsed (per-alert outcomes
+    are in `results`), so Alertmanager doesn't re-send a whole group
+    because one alert in it was rejected.
+    """
+    if shutdown_drain.draining:
+        return draining_response()
+    try:
+        notification = await request.json()
+    except Exception:
+        return JSONResponse(
+            status_code=400, content={"detail": "Malformed JSON payload"}
+        )
+    alerts = notification.get("alerts") if isinstance(notification, dict) else None
+    if not isinstance(alerts, list):
+        return JSONResponse(
+            status_code=400,
+            content={"detail": "Expected an Alertmanager notification with 'alerts'"},
+        )
+    firing = [
+        alert
+        for alert in alerts
+        if not (isinstance(alert, dict) and alertmanager_mapper.is_resolved(alert))
+    ]
+    summary = {
+        "alerts": len(alerts),
+        "resolved_dropped": len(alerts) - len(firing),
+        "unmapped": [],
+    }
+    if len(firing) > MAX_BATCH_EVENTS:
+        return JSONResponse(
+            status_code=400,
+            content={
+                "detail": f"At most {MAX_BATCH_EVENTS} firing alerts per "
+                "notification - set max_alerts on the Alertmanager receiver"
+            },
+        )
+
+    mapped_alerts, raw_items = [], []
+    for alert in firing:
+        payload = (
+            alertmanager_mapper.map_alert(alert) if isinstance(alert, dict) else None
+        )
+        labels = (alert.get("labels") or {}) if isinstance(alert, dict) else {}
+        if payload is None:
+            summary["unmapped"].append(labels.get("alertname"))
+            continue
+        mapped_alerts.append(alert)
+        raw_items.append(payload)
+    if summary["unmapped"]:
+        logger.info(
+            f"Alertmanager notification: {len(summary['unmapped'])} alert(s) "
+            f"matched no route: {summary['unmapped']}"
+        )
+    if not raw_items:
+        return {"results": [], **summary}
+
+    client_ip = request.client.host if request.client else None
+    batch_results = await _process_webhook_batch(
+        raw_items, request.state.principal, client_ip
+    )
+    results = [
+        {
+            "alertname": (alert.get("labels") or {}).get("alertname"),
+            "fingerprint": alert.get("fingerprint"),
+            "event_type": raw_items[result["index"]]["event_type"],
+            **result,
+        }
+        for alert, result in zip(mapped_alerts, batch_results)
+    ]
+    return {"results": results, **summary}
+
+
 # Standard error response schema
 class ErrorResponse(BaseModel):
     detail: str
@@ -692,9 +1958,7 @@ async def get_audit(
     controller: Optional[str] = None,
     limit: int = 100,
 ):
-    api_key = request.headers.get("x-api-key")
-    role_val = get_role_from_api_key(api_key)
-    if not has_permission(role_val, "audit_read"):
+    if not request.state.principal.has_permission("audit_read"):
         return JSONResponse(status_code=403, content={"detail": "Forbidden"})
     params = AuditQueryParams(
         start=start,
@@ -729,18 +1993,14 @@ async def get_audit_verify(request: Request):
     as /audit, since it's a read of the same data (just a structural
     check rather than the entries themselves).
     """
-    api_key = request.headers.get("x-api-key")
-    role_val = get_role_from_api_key(api_key)
-    if not has_permission(role_val, "audit_read"):
+    if not request.state.principal.has_permission("audit_read"):
         return JSONResponse(status_code=403, content={"detail": "Forbidden"})
     return verify_chain(AUDIT_LOG_PATH)
 
 
 @app.get("/approvals")
 def list_approvals(request: Request):
-    api_key = request.headers.get("x-api-key")
-    role = get_role_from_api_key(api_key)
-    if not has_permission(role, "approvals_read"):
+    if not request.state.principal.has_permission("approvals_read"):
         return JSONResponse(status_code=403, content={"detail": "Forbidden"})
     with approval_lock:
         return [
@@ -751,9 +2011,11 @@ def list_approvals(request: Request):
 
 @app.post("/approvals/{approval_id}/approve")
 def approve_approval(approval_id: str, request: Request):
-    api_key = request.headers.get("x-api-key")
-    approver_role = get_role_from_api_key(api_key)
-    if not has_permission(approver_role, "approve_actions"):
+    if shutdown_drain.draining:
+        return draining_response()
+    approver: Principal = request.state.principal
+    api_key, approver_role = approver.api_key, approver.role
+    if not approver.has_permission("approve_actions"):
         return JSONResponse(
             status_code=403,
             content={"detail": "Approving actions is not permitted for your role"},
@@ -786,12 +2048,14 @@ def approve_approval(approval_id: str, request: Request):
         # themselves allowed to ask for, it doesn't grant new rights.
         # Re-checked here (not just at queue time in /webhook) in case
         # config/auth.yaml changed while this entry sat pending.
-        requester_key = entry["requested_by"]
-        requester_role = entry["role"]
+        requester = resolve_requester(
+            entry["requested_by"], entry.get("requester_scope")
+        )
         if (
-            not has_permission(requester_role, "execute_actions")
-            or not is_action_allowed_for_key(requester_key, event_type)
-            or not is_controller_allowed_for_key(requester_key, controller_name)
+            requester is None
+            or not requester.has_permission("execute_actions")
+            or not requester.allows_action(event_type)
+            or not requester.allows_controller(controller_name)
         ):
             reason = (
                 "Requester is no longer permitted to execute this action/controller"
@@ -831,7 +2095,30 @@ def approve_approval(approval_id: str, request: Request):
 
     # Execute outside the lock - this can take a while (SSH, ansible-playbook)
     # and shouldn't block /approvals reads or other approve/reject calls.
-    exec_result = execute_action(action_config, controller_config, params, dry_run)
+    # Same execution pool as /webhook, so approved work counts against
+    # (and is bounded by) the same capacity.
+    try:
+        future, coalesced = submit_execution(
+            event_type,
+            action_config,
+            controller_name,
+            controller_config,
+            params,
+            dry_run,
+            audit_fields={
+                "user": entry["requested_by"],
+                "role": entry["role"],
+                "client_ip": None,
+                "approval_id": approval_id,
+                "approval_status": "approved",
+                "approved_by": api_key,
+                "approver_role": approver_role,
+            },
+        )
+        exec_result = future.result()
+    except PoolClosedError:
+        _return_approval_to_pending(entry)
+        return draining_response()
     if exec_result is None:
         with approval_lock:
             entry["status"] = "rejected"
@@ -841,7 +2128,7 @@ def approve_approval(approval_id: str, request: Request):
             status_code=400,
             content={"detail": NO_EXECUTABLE_ERROR},
         )
-    if not dry_run and cooldown_seconds:
+    if not dry_run and cooldown_seconds and not coalesced:
         cooldown_tracker.record(cd_key)
     with approval_lock:
         entry["result"] = exec_result.as_dict()
@@ -861,6 +2148,7 @@ def approve_approval(approval_id: str, request: Request):
         "approval_status": "approved",
         "approved_by": api_key,
         "approver_role": approver_role,
+        "coalesced": coalesced,
     }
     write_audit_log(audit_entry)
     # An approved action executing is exactly as notify-worthy as a
@@ -883,11 +2171,24 @@ def approve_approval(approval_id: str, request: Request):
     return {"status": "approved", "result": exec_result.as_dict()}
 
 
+def _return_approval_to_pending(entry: dict):
+    """
+    Un-claims an approved entry whose execution never ran - shutdown
+    refused it, or it was still queued at the drain deadline - so it can
+    be approved again once the service is back.
+    """
+    with approval_lock:
+        entry["status"] = "pending"
+        entry.pop("approved_by", None)
+        entry.pop("approver_role", None)
+        _save_approval_queue_locked()
+
+
 @app.post("/approvals/{approval_id}/reject")
 def reject_approval(approval_id: str, request: Request):
-    api_key = request.headers.get("x-api-key")
-    approver_role = get_role_from_api_key(api_key)
-    if not has_permission(approver_role, "approve_actions"):
+    approver: Principal = request.state.principal
+    api_key, approver_role = approver.api_key, approver.role
+    if not approver.has_permission("approve_actions"):
         return JSONResponse(
             status_code=403,
             content={"detail": "Rejecting actions is not permitted for your role"},
@@ -930,3 +2231,88 @@ def reject_approval(approval_id: str, request: Request):
     }
     write_audit_log(audit_entry)
     return {"status": "rejected"}
+
+
+def _can_read_job(job: dict, principal: Principal) -> bool:
+    """A job is visible to whoever submitted it, or to any audit_read role."""
+    return job.get("requested_by") == principal.api_key or principal.has_permission(
+        "audit_read"
+    )
+
+
+@app.get("/jobs")
+def list_jobs(request: Request, status: Optional[str] = None, limit: int = 100):
+    """
+    async_mode jobs, newest first. Roles with audit_read see every job;
+    anyone else only sees the jobs their own API key submitted.
+    """
+    principal: Principal = request.state.principal
+    requested_by = None if principal.has_permission("audit_read") else principal.api_key
+    return job_store.list(requested_by=requested_by, status=status, limit=limit)
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str, request: Request):
+    job = job_store.get(job_id)
+    # Someone else's job is reported as missing, not forbidden, so job
+    # ids can't be probed for existence.
+    if job is None or not _can_read_job(job, request.state.principal):
+        return JSONResponse(status_code=404, content={"detail": "Job not found"})
+    return job
+
+
+# How often an idle /jobs/{id}/stream connection gets an SSE comment, so
+# proxies and load balancers don't time it out during a quiet stretch of
+# a long playbook.
+STREAM_KEEPALIVE_SECONDS = 15
+
+
+def _sse_event(event: str, data) -> str:
+    if not isinstance(data, str):
+        data = json.dumps(data)
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+async def _job_event_stream(job_id: str, output, request: Request):
+    cursor = 0
+    while True:
+        lines, cursor, missed, closed = output.read(cursor)
+        if missed:
+            yield _sse_event("dropped", {"lines": missed})
+        for stream, text in lines:
+            yield _sse_event(stream, text)
+        if closed:
+            yield _sse_event("end", job_store.get(job_id) or {"id": job_id})
+            return
+        if await request.is_disconnected():
+            return
+        if not await output.wait(cursor, STREAM_KEEPALIVE_SECONDS):
+            yield ": keepalive\n\n"
+
+
+@app.get("/jobs/{job_id}/stream")
+async def stream_job(job_id: str, request: Request):
+    """
+    Server-Sent Events feed of an async_mode job's output while it runs:
+    one `stdout`/`stderr` event per line, then a final `end` event carrying
+    the job itself (same body as GET /jobs/{id}). Connecting late, or to a
+    finished job, replays the lines still buffered first.
+
+    Each connection reads the job's output feed (src/jobs.py::JobOutput)
+    at its own pace, so a slow client only ever delays itself: the
+    executor never waits for it, the buffer is bounded, and if the client
+    falls so far behind that lines were rotated out before it read them it
+    gets a `dropped` event with the count instead.
+
+    Lines arrive as they're printed with `executor.backend: asyncio`; with
+    the subprocess backend they all arrive once the process exits.
+    """
+    job = job_store.get(job_id)
+    output = job_store.output(job_id)
+    if job is None or output is None or not _can_read_job(job, request.state.principal):
+        return JSONResponse(status_code=404, content={"detail": "Job not found"})
+    return StreamingResponse(
+        _job_event_stream(job_id, output, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,542 @@
+import asyncio
+import contextvars
+import itertools
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Condition, Event, Lock
+from typing import Any, Callable, Dict, List, Optional
+
+from src.config import load_config_file
+from src.notifications import SEVERITY_RANK
+
+logger = logging.getLogger("autoheal.pool")
+
+DEFAULT_MAX_WORKERS = 8
+# Queued work is prioritized by its action's `severity` (config/
+# actions.yaml) - the same info/warning/critical scale notifications use.
+# Actions that don't declare one are "info".
+DEFAULT_PRIORITY = "info"
+# Every this many seconds spent queued counts as one severity class more,
+# so a steady stream of critical work can delay info work but never
+# starve it. Overridden by `pool.priority_aging_seconds`; 0 disables aging.
+DEFAULT_PRIORITY_AGING_SECONDS = 30
+# How long drain() waits for running work at shutdown, unless
+# `pool.shutdown_grace_seconds` says otherwise.
+DEFAULT_SHUTDOWN_GRACE_SECONDS = 25
+# How many executions may be waiting on something outside the process
+# (see release_slot) at once, on top of max_workers, unless
+# `pool.max_waiting` says otherwise.
+DEFAULT_MAX_WAITING = 16
+
+# The pool and task the current thread is running, if any - what
+# release_slot() releases.
+_current_task: contextvars.ContextVar = contextvars.ContextVar(
+    "autoheal_pool_task", default=None
+)
+
+
+class PoolClosedError(RuntimeError):
+    """Raised by ExecutionPool.submit() once the pool is draining."""
+
+
+class _Task:
+    __slots__ = (
+        "seq",
+        "fn",
+        "args",
+        "ctx",
+        "controller",
+        "priority",
+        "future",
+        "submitted_at",
+        "waiting",
+        "resume",
+    )
+
+    def __init__(self, seq, fn, args, ctx, controller, priority):
+        self.seq = seq
+        self.fn = fn
+        self.args = args
+        self.ctx = ctx
+        self.controller = controller
+        self.priority = priority
+        self.future: Future = Future()
+        self.submitted_at = time.monotonic()
+        self.waiting = False
+        # Set while a running task that released its slot is queued to
+        # take one back (see sleep_without_slot); set() once it has.
+        self.resume: Optional[Event] = None
+
+
+class _WaitStats:
+    """Queued count and queue wait times for one group of tasks."""
+
+    __slots__ = ("queued", "started", "total_wait", "max_wait")
+
+    def __init__(self):
+        self.queued = 0
+        self.started = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_start(self, waited: float):
+        self.queued -= 1
+        self.started += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self.queued,
+            "avg_queue_wait_seconds": (
+                round(self.total_wait / self.started, 3) if self.started else 0.0
+            ),
+            "max_queue_wait_seconds": round(self.max_wait, 3),
+        }
+
+
+class _Bulkhead(_WaitStats):
+    """Running/queued counters and wait stats for one controller."""
+
+    __slots__ = ("max_concurrency", "running")
+
+    def __init__(self, max_concurrency: Optional[int]):
+        super().__init__()
+        self.max_concurrency = max_concurrency
+        self.running = 0
+
+    def has_capacity(self) -> bool:
+        return self.max_concurrency is None or self.running < self.max_concurrency
+
+    def record_start(self, waited: float):
+        super().record_start(waited)
+        self.running += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "running": self.running,
+            **super().stats(),
+        }
+
+
+class ExecutionPool:
+    """
+    Bounded pool of worker threads that every action execution runs on.
+
+    ActionExecutor's methods are plain blocking calls - subprocess.run
+    with a 600s timeout, an SSH session, a sequence of Kubernetes API
+    calls - and /webhook is an `async def` handler. Calling them directly
+    from the handler parks the whole event loop for as long as the action
+    takes, so one ten-minute playbook would also stall /live, /ready and
+    every other request on that worker. Everything goes through here
+    instead: async callers `await run(...)`, which never blocks the loop;
+    sync callers (FastAPI runs plain `def` endpoints in its own
+    threadpool) use submit(...).result().
+
+    The pool is dedicated rather than reusing the event loop's default
+    executor or Starlette's threadpool, so long-running remediations
+    can't starve unrelated request handling of threads (and vice versa),
+    and so its size is an explicit, configured capacity (config/
+    execution.yaml) instead of an implicit one.
+
+    max_workers is the global cap on concurrent executions. On top of it,
+    each controller is a bulkhead: work submitted for a controller never
+    runs more than that controller's max_concurrency at once (its own
+    `max_concurrency` in config/controllers.yaml, else the pool-wide
+    `default_controller_max_concurrency`, else unlimited). Work that
+    can't start yet waits here without holding a worker thread - so a
+    slow or overloaded controller (an SSH bastion, one cluster's API
+    server) queues up behind its own limit while work for healthy
+    controllers keeps flowing through the free workers, instead of every
+    worker ending up parked on the one slow target.
+
+    Queued work starts in priority order, not arrival order: a critical
+    drain_node submitted behind a flood of info health_checks starts as
+    soon as a worker (and its controller) is free. Priority is the
+    action's severity, plus one class per `priority_aging_seconds` spent
+    waiting, so low-priority work still gets through under sustained
+    high-priority load; equal priorities start oldest first.
+
+    stats() reports running/queued counts and queue wait times, globally,
+    per controller and per priority class, so saturation is visible.
+
+    A running execution that's only waiting on something else - a
+    rollout converging, evicted pods going away - can release_slot():
+    from then on it no longer counts against max_workers or its
+    controller, and queued work starts in its place. Up to `max_waiting`
+    executions can wait like that at once; each still has a thread of
+    its own, just not a slot. sleep_without_slot() does the same for a
+    while - a retry's backoff - then queues to take a slot back like
+    new work.
+
+    drain() is the shutdown path: no new submissions, nothing more started
+    from the queue, and a bounded wait for what's already running.
+    """
+
+    def __init__(self, config_path: str):
+        self.config = load_config_file(config_path, "execution pool config")
+        pool_config = self.config.get("pool") or {}
+        self.max_workers = max(
+            int(pool_config.get("max_workers", DEFAULT_MAX_WORKERS)), 1
+        )
+        self.default_controller_max_concurrency = pool_config.get(
+            "default_controller_max_concurrency"
+        )
+        self.priority_aging_seconds = float(
+            pool_config.get("priority_aging_seconds", DEFAULT_PRIORITY_AGING_SECONDS)
+            or 0
+        )
+        self.shutdown_grace_seconds = float(
+            pool_config.get("shutdown_grace_seconds", DEFAULT_SHUTDOWN_GRACE_SECONDS)
+        )
+        self.max_waiting = max(
+            int(pool_config.get("max_waiting", DEFAULT_MAX_WAITING)), 0
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers + self.max_waiting,
+            thread_name_prefix="autoheal-exec",
+        )
+        self.lock = Lock()
+        self._idle = Condition(self.lock)
+        self._closed = False
+        self._seq = itertools.count()
+        self._pending: List[_Task] = []
+        self._bulkheads: Dict[str, _Bulkhead] = {}
+        self._priorities: Dict[str, _WaitStats] = {
+            name: _WaitStats() for name in SEVERITY_RANK
+        }
+        self._running = 0
+        self._waiting = 0
+        self._submitted = 0
+        self._completed = 0
+        self._started = 0
+        self._max_wait_seconds = 0.0
+        self._total_wait_seconds = 0.0
+
+    def submit(
+        self,
+        fn: Callable,
+        *args,
+        controller: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        priority: Optional[str] = None,
+    ) -> Future:
+        """
+        Queue `fn(*args)` to run on a pool worker and return a
+        concurrent.futures.Future for its result. `controller` names the
+        bulkhead it counts against; `max_concurrency` is that controller's
+        own limit, if it configures one (the latest value seen wins, so a
+        config change applies to the next submission). `priority` is the
+        action's severity (info/warning/critical; anything else counts as
+        info). The caller's contextvars are carried over to the worker,
+        same as asyncio.to_thread does. Raises PoolClosedError once drain()
+        has been called.
+        """
+        if priority not in SEVERITY_RANK:
+            priority = DEFAULT_PRIORITY
+        task = _Task(
+            next(self._seq),
+            fn,
+            args,
+            contextvars.copy_context(),
+            controller,
+            priority,
+        )
+        with self.lock:
+            if self._closed:
+                raise PoolClosedError("Execution pool is draining for shutdown")
+            self._submitted += 1
+            if controller is not None:
+                bulkhead = self._bulkhead_locked(controller, max_concurrency)
+                bulkhead.queued += 1
+            self._priorities[priority].queued += 1
+            self._pending.append(task)
+            self._dispatch_locked()
+            if self._pending:
+                logger.warning(
+                    f"Execution pool saturated: {self._running} running, "
+                    f"{len(self._pending)} queued (max_workers={self.max_workers})"
+                )
+        return task.future
+
+    async def run(
+        self,
+        fn: Callable,
+        *args,
+        controller: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        priority: Optional[str] = None,
+    ) -> Any:
+        """Awaitable form of submit() for async callers - never blocks the loop."""
+        return await asyncio.wrap_future(
+            self.submit(
+                fn,
+                *args,
+                controller=controller,
+                max_concurrency=max_concurrency,
+                priority=priority,
+            )
+        )
+
+    def _bulkhead_locked(
+        self, controller: str, max_concurrency: Optional[int]
+    ) -> _Bulkhead:
+        """Caller must hold self.lock."""
+        limit = (
+            max_concurrency
+            if max_concurrency is not None
+            else self.default_controller_max_concurrency
+        )
+        limit = max(int(limit), 1) if limit is not None else None
+        bulkhead = self._bulkheads.get(controller)
+        if bulkhead is None:
+            bulkhead = self._bulkheads[controller] = _Bulkhead(limit)
+        else:
+            bulkhead.max_concurrency = limit
+        return bulkhead
+
+    def _effective_priority(self, task: _Task, now: float) -> float:
+        priority = float(SEVERITY_RANK[task.priority])
+        if self.priority_aging_seconds > 0:
+            priority += (now - task.submitted_at) / self.priority_aging_seconds
+        return priority
+
+    def _dispatch_locked(self):
+        """
+        Caller must hold self.lock. While there's global capacity, starts
+        the pending task with the highest effective priority (oldest
+        first among equals) whose controller isn't at its own limit;
+        tasks held back by their controller keep their place. Once
+        draining, nothing more is started.
+        """
+        while self._pending and self._running < self.max_workers:
+            if self._closed:
+                return
+            now = time.monotonic()
+            best, best_key = None, None
+            for task in self._pending:
+                bulkhead = self._bulkheads.get(task.controller)
+                if bulkhead is not None and not bulkhead.has_capacity():
+                    continue
+                key = (self._effective_priority(task, now), -task.seq)
+                if best_key is None or key > best_key:
+                    best, best_key = task, key
+            if best is None:
+                return
+            self._pending.remove(best)
+            bulkhead = self._bulkheads.get(best.controller)
+            if best.resume is None and not best.future.set_running_or_notify_cancel():
+                if bulkhead is not None:
+                    bulkhead.queued -= 1
+                self._priorities[best.priority].queued -= 1
+                continue
+            waited = now - best.submitted_at
+            self._running += 1
+            self._started += 1
+            self._total_wait_seconds += waited
+            self._max_wait_seconds = max(self._max_wait_seconds, waited)
+            if bulkhead is not None:
+                bulkhead.record_start(waited)
+            self._priorities[best.priority].record_start(waited)
+            if best.resume is not None:
+                # Already running on its own thread, which takes it from here.
+                best.waiting = False
+                self._waiting -= 1
+                best.resume.set()
+                best.resume = None
+                continue
+            self._executor.submit(self._run, best)
+
+    def _run(self, task: _Task):
+        try:
+            result, error = task.ctx.run(self._call, task), None
+        except BaseException as e:
+            result, error = None, e
+        # Free the slot (and start whatever was waiting on it) before
+        # resolving the future, so a caller that reads stats() right after
+        # getting its result sees this task as completed. Resolved outside
+        # the lock: done-callbacks may themselves submit() more work.
+        with self.lock:
+            if task.waiting:
+                self._waiting -= 1
+            else:
+                self._free_slot_locked(task)
+            self._completed += 1
+            self._dispatch_locked()
+            if self._running == 0 and self._waiting == 0:
+                self._idle.notify_all()
+        if error is not None:
+            task.future.set_exception(error)
+        else:
+            task.future.set_result(result)
+
+    def _call(self, task: _Task):
+        _current_task.set((self, task))
+        return task.fn(*task.args)
+
+    def _release(self, task: _Task) -> bool:
+        """release_slot() for `task`, which is running on this pool."""
+        with self.lock:
+            if task.waiting:
+                return True
+            if self._waiting >= self.max_waiting:
+                return False
+            task.waiting = True
+            self._waiting += 1
+            self._free_slot_locked(task)
+            self._dispatch_locked()
+        return True
+
+    def _reacquire(self, task: _Task) -> bool:
+        """
+        Queues `task`, which released its slot, to take one back, and
+        blocks until it has - True - or the pool started draining - False,
+        and it stays waiting.
+        """
+        with self.lock:
+            if not task.waiting:
+                return True
+            if self._closed:
+                return False
+            resume = task.resume = Event()
+            task.submitted_at = time.monotonic()
+            bulkhead = self._bulkheads.get(task.controller)
+            if bulkhead is not None:
+                bulkhead.queued += 1
+            self._priorities[task.priority].queued += 1
+            self._pending.append(task)
+            self._dispatch_locked()
+        resume.wait()
+        return not task.waiting
+
+    def _wake_resuming_locked(self):
+        """
+        Caller must hold self.lock. Once draining nothing more starts, so
+        running tasks queued to take a slot back are told they won't.
+        """
+        for task in [t for t in self._pending if t.resume is not None]:
+            self._pending.remove(task)
+            bulkhead = self._bulkheads.get(task.controller)
+            if bulkhead is not None:
+                bulkhead.queued -= 1
+            self._priorities[task.priority].queued -= 1
+            task.resume.set()
+            task.resume = None
+
+    def _free_slot_locked(self, task: _Task):
+        """Caller must hold self.lock."""
+        self._running -= 1
+        bulkhead = self._bulkheads.get(task.controller)
+        if bulkhead is not None:
+            bulkhead.running -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "max_workers": self.max_workers,
+                "running": self._running,
+                "waiting": self._waiting,
+                "queued": len(self._pending),
+                "saturated": self._running >= self.max_workers,
+                "draining": self._closed,
+                "utilization": round(self._running / self.max_workers, 3),
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "avg_queue_wait_seconds": (
+                    round(self._total_wait_seconds / self._started, 3)
+                    if self._started
+                    else 0.0
+                ),
+                "max_queue_wait_seconds": round(self._max_wait_seconds, 3),
+                "controllers": {
+                    name: bulkhead.stats()
+                    for name, bulkhead in sorted(self._bulkheads.items())
+                },
+                "priorities": {
+                    name: wait_stats.stats()
+                    for name, wait_stats in self._priorities.items()
+                },
+            }
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Stops the pool taking on work - submit() raises PoolClosedError
+        from now on, and queued work is never started, since it likely
+        wouldn't finish before the process is killed - then waits up to
+        `timeout` seconds (default shutdown_grace_seconds) for running
+        work - including work that released its slot to wait - to
+        finish. Returns whether it all did. Queued work's futures are
+        then failed with PoolClosedError, so nothing waiting on them
+        hangs until the process dies. Blocking; async callers should run
+        it in a thread.
+        """
+        if timeout is None:
+            timeout = self.shutdown_grace_seconds
+        with self.lock:
+            self._closed = True
+            self._wake_resuming_locked()
+            drained = self._idle.wait_for(
+                lambda: self._running == 0 and self._waiting == 0, timeout
+            )
+            never_started, self._pending = self._pending, []
+            for task in never_started:
+                bulkhead = self._bulkheads.get(task.controller)
+                if bulkhead is not None:
+                    bulkhead.queued -= 1
+                self._priorities[task.priority].queued -= 1
+        # Resolved outside the lock, as in _run.
+        for task in never_started:
+            if task.future.set_running_or_notify_cancel():
+                task.future.set_exception(
+                    PoolClosedError("Execution pool shut down before this started")
+                )
+        return drained
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+def release_slot() -> bool:
+    """
+    Called from inside an execution running on an ExecutionPool that's
+    about to spend a while just waiting (on a watch stream, say): gives
+    up its worker slot and its controller's, so queued work can start,
+    for the rest of the execution. Returns False - and the execution
+    keeps its slot - outside a pool, or if `max_waiting` executions are
+    already waiting.
+    """
+    current = _current_task.get()
+    if current is None:
+        return False
+    pool, task = current
+    return pool._release(task)
+
+
+def slot_released() -> bool:
+    """
+    Whether the execution running on this thread has released its pool
+    slot (see release_slot) and is waiting without one.
+    """
+    current = _current_task.get()
+    return current is not None and current[1].waiting
+
+
+def sleep_without_slot(seconds: float) -> bool:
+    """
+    Sleeps `seconds` from inside an execution running on an ExecutionPool
+    without holding its worker or controller slot - queued work starts
+    in its place - then queues (at the execution's own priority) to take
+    a slot back before returning. Returns False if the pool started
+    draining meanwhile: no slot was taken back, and the execution should
+    wrap up instead of doing more work. Outside a pool, or if
+    `max_waiting` executions are already waiting, it just sleeps.
+    """
+    current = _current_task.get()
+    if current is None or not release_slot():
+        time.sleep(seconds)
+        return True
+    pool, task = current
+    time.sleep(seconds)
+    return pool._reacquire(task)
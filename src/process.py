@@ -0,0 +1,253 @@
+"""
+asyncio-native subprocess backend for ActionExecutor (`executor.backend:
+asyncio` in config/execution.yaml).
+
+The default backend is plain subprocess.run(capture_output=True), which
+holds a process's entire stdout/stderr in memory until it exits. Here
+every process instead runs under one shared event loop (on a single
+daemon thread, started on first use): its pipes are read incrementally,
+in chunks, into BoundedOutput buffers with a fixed memory ceiling, and
+its timeout is an asyncio deadline on that same loop - so reading and
+timing out however many processes costs one loop thread plus a bounded
+amount of memory each, however much a chatty playbook prints.
+
+It doesn't save threads on the calling side: run() is a blocking call,
+so each execution still holds its ExecutionPool worker thread (see
+src/pool.py) parked on the outcome while its process runs. How many
+processes run at once is still bounded by the pool's workers, not by
+the loop.
+
+run() returns a subprocess.CompletedProcess and raises
+subprocess.TimeoutExpired on timeout, exactly like subprocess.run, so
+the executor's ActionExecutionResult handling is identical for both
+backends.
+
+It is also what makes live output possible: when a caller has set
+`output_sink` (GET /jobs/{id}/stream does, for async_mode jobs), each
+complete stdout/stderr line is handed to it as it's read, while the
+process is still running.
+"""
+
+import asyncio
+import contextlib
+import logging
+import subprocess
+import threading
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+
+logger = logging.getLogger("autoheal.process")
+
+DEFAULT_MAX_OUTPUT_BYTES = 1024 * 1024
+READ_CHUNK_BYTES = 64 * 1024
+# A "line" with no newline in sight is cut into pieces of this size, so a
+# process printing one endless line can't grow the splitter's buffer.
+MAX_LINE_BYTES = 8 * 1024
+
+# Receives ("stdout"|"stderr", line) for every line of output a process
+# produces, on whichever thread reads it. Set around an execution by
+# whoever wants to watch it (_run_job_execution in src/main.py); being a
+# contextvar, it's scoped to that one execution. Must never block.
+OutputCallback = Callable[[str, str], None]
+output_sink: ContextVar[Optional[OutputCallback]] = ContextVar(
+    "autoheal_output_sink", default=None
+)
+
+
+class BoundedOutput:
+    """
+    Accumulates a stream's bytes up to `max_bytes`: the first half is
+    kept as-is, and past that only the most recent half is retained, with
+    a marker noting how much was dropped in between. The start of a
+    playbook run (what it was asked to do) and its end (how it finished)
+    are what matter for a remediation record; an unbounded middle isn't
+    worth an unbounded amount of memory.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_OUTPUT_BYTES):
+        self.head_limit = max_bytes // 2
+        self.tail_limit = max_bytes - self.head_limit
+        self._head = bytearray()
+        self._tail = bytearray()
+        self.dropped_bytes = 0
+
+    def write(self, chunk: bytes):
+        room = self.head_limit - len(self._head)
+        if room > 0:
+            self._head += chunk[:room]
+            chunk = chunk[room:]
+        if not chunk:
+            return
+        self._tail += chunk
+        overflow = len(self._tail) - self.tail_limit
+        if overflow > 0:
+            del self._tail[:overflow]
+            self.dropped_bytes += overflow
+
+    def getvalue(self) -> str:
+        text = self._head.decode("utf-8", errors="replace")
+        if self.dropped_bytes:
+            text += f"\n...[truncated {self.dropped_bytes} bytes]...\n"
+        return text + self._tail.decode("utf-8", errors="replace")
+
+
+class LineSplitter:
+    """
+    Turns a stream's chunks back into lines for an OutputCallback. Only
+    the current, incomplete line is buffered (at most MAX_LINE_BYTES).
+    """
+
+    def __init__(
+        self, stream: str, on_line: OutputCallback, max_line_bytes: int = MAX_LINE_BYTES
+    ):
+        self.stream = stream
+        self.on_line = on_line
+        self.max_line_bytes = max_line_bytes
+        self._partial = bytearray()
+
+    def feed(self, chunk: bytes):
+        self._partial += chunk
+        while True:
+            newline = self._partial.find(b"\n")
+            if newline == -1:
+                break
+            line = bytes(self._partial[:newline])
+            del self._partial[: newline + 1]
+            self._emit(line)
+        while len(self._partial) >= self.max_line_bytes:
+            line = bytes(self._partial[: self.max_line_bytes])
+            del self._partial[: self.max_line_bytes]
+            self._emit(line)
+
+    def flush(self):
+        if self._partial:
+            line = bytes(self._partial)
+            self._partial.clear()
+            self._emit(line)
+
+    def _emit(self, line: bytes):
+        text = line.decode("utf-8", errors="replace").rstrip("\r")
+        try:
+            self.on_line(self.stream, text)
+        except Exception as e:
+            # Watching output is best-effort; it must never fail the run.
+            logger.warning(f"Output callback failed: {e}")
+
+
+class AsyncProcessRunner:
+    def __init__(self, max_output_bytes: int = DEFAULT_MAX_OUTPUT_BYTES):
+        self.max_output_bytes = max_output_bytes
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever, name="autoheal-proc-loop", daemon=True
+                )
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def run(
+        self,
+        cmd: List[str],
+        timeout: float,
+        on_line: Optional[OutputCallback] = None,
+    ) -> subprocess.CompletedProcess:
+        """
+        Blocking entry point for the executor's (pool worker) threads:
+        hands the process to the shared loop and waits for its outcome,
+        holding the calling thread for the process's whole run.
+        `on_line`, if given, is called on the loop thread with each line
+        of output as it arrives.
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self.run_async(cmd, timeout, on_line), self._ensure_loop()
+        )
+        return future.result()
+
+    async def run_async(
+        self,
+        cmd: List[str],
+        timeout: float,
+        on_line: Optional[OutputCallback] = None,
+    ) -> subprocess.CompletedProcess:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stdout = BoundedOutput(self.max_output_bytes)
+        stderr = BoundedOutput(self.max_output_bytes)
+        splitters = (
+            (LineSplitter("stdout", on_line), LineSplitter("stderr", on_line))
+            if on_line is not None
+            else (None, None)
+        )
+        waiter = asyncio.gather(
+            self._pump(proc.stdout, stdout, splitters[0]),
+            self._pump(proc.stderr, stderr, splitters[1]),
+            proc.wait(),
+        )
+        try:
+            _, _, returncode = await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Process {cmd[0]} exceeded {timeout}s timeout, killing it")
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass
+            await proc.wait()
+            # Whatever was read before the deadline is kept; a grandchild
+            # still holding the pipes open mustn't hang us here.
+            waiter.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await waiter
+            self._flush(splitters)
+            raise subprocess.TimeoutExpired(
+                cmd, timeout, output=stdout.getvalue(), stderr=stderr.getvalue()
+            )
+        self._flush(splitters)
+        return subprocess.CompletedProcess(
+            cmd, returncode, stdout=stdout.getvalue(), stderr=stderr.getvalue()
+        )
+
+    @staticmethod
+    async def _pump(
+        stream: asyncio.StreamReader,
+        sink: BoundedOutput,
+        splitter: Optional[LineSplitter] = None,
+    ):
+        while True:
+            chunk = await stream.read(READ_CHUNK_BYTES)
+            if not chunk:
+                return
+            sink.write(chunk)
+            if splitter is not None:
+                splitter.feed(chunk)
+
+    @staticmethod
+    def _flush(splitters):
+        for splitter in splitters:
+            if splitter is not None:
+                splitter.flush()
+
+    def close(self):
+        """
+        Stops the loop, waits for its thread to exit and closes it; call
+        at shutdown, once nothing is running. A later run() starts a new
+        loop.
+        """
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
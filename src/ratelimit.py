@@ -1,17 +1,27 @@
+import ipaddress
 import logging
-import os
 import time
-from collections import deque
+from collections import OrderedDict, deque
 from threading import Lock
-from typing import Deque, Dict, Optional
+from typing import Deque, Dict, Hashable, List, Optional, Tuple
 
-import yaml
+from src.config import load_config_file
 
 logger = logging.getLogger("autoheal.ratelimit")
 
 DEFAULT_REQUESTS_PER_MINUTE = 60
 WINDOW_SECONDS = 60
 
+# PreAuthGuard defaults: how long a rejected API key is remembered, and
+# the prefix lengths that group client addresses into one network.
+DEFAULT_NEGATIVE_CACHE_SECONDS = 30
+DEFAULT_IPV4_PREFIX = 32
+DEFAULT_IPV6_PREFIX = 64
+# Most client networks / rejected keys PreAuthGuard tracks at once; the
+# least recently seen are forgotten first, so a flood from ever-changing
+# addresses or keys can't grow its memory without bound.
+MAX_TRACKED_ENTRIES = 100_000
+
 
 class RateLimiter:
     """
@@ -22,29 +32,15 @@ class RateLimiter:
     is fine - there's no safety property to preserve across it.
 
     Config (config/rate_limits.yaml) is read once at construction, not
-    re-read per request - unlike config/auth.yaml and config/actions.yaml
-    elsewhere in this codebase, which are re-parsed from disk on every
-    single check. That pattern is harmless at low request volume but
-    directly counterproductive for a rate limiter, which exists to be
-    cheap to check on every request.
+    re-read per request: a rate limiter exists to be cheap to check on
+    every request.
     """
 
     def __init__(self, config_path: str):
-        self.config = self._load_config(config_path)
+        self.config = load_config_file(config_path, "rate limit config")
         self.lock = Lock()
         self._hits: Dict[str, Deque[float]] = {}
 
-    @staticmethod
-    def _load_config(config_path: str) -> dict:
-        if not os.path.exists(config_path):
-            return {}
-        try:
-            with open(config_path) as f:
-                return yaml.safe_load(f) or {}
-        except (yaml.YAMLError, OSError) as e:
-            logger.error(f"Failed to load rate limit config, using defaults: {e}")
-            return {}
-
     def limit_for_role(self, role: Optional[str]) -> int:
         """The per-minute limit for a caller with this role."""
         per_role = self.config.get("per_role") or {}
@@ -88,3 +84,132 @@ class RateLimiter:
                 return max(retry_after, 0.1)
             hits.append(now)
             return None
+
+    def check_many(
+        self,
+        key: str,
+        limit: Optional[int],
+        count: int,
+        window_seconds: int = WINDOW_SECONDS,
+    ) -> Tuple[int, Optional[float]]:
+        """
+        check() for `count` calls at once (one /webhook/batch request),
+        under a single lock acquisition. Admits and records as many as fit
+        in what's left of the window - each still counts as one call, so
+        batching never buys a caller more than `limit` per window - and
+        returns (number admitted, seconds until retry for the rest, or
+        None if all were admitted).
+        """
+        if not limit or limit <= 0:
+            return count, None
+        now = time.time()
+        with self.lock:
+            hits = self._hits.setdefault(key, deque())
+            cutoff = now - window_seconds
+            while hits and hits[0] <= cutoff:
+                hits.popleft()
+            admitted = max(min(count, limit - len(hits)), 0)
+            hits.extend([now] * admitted)
+            if admitted == count:
+                return admitted, None
+            return admitted, max(hits[0] + window_seconds - now, 0.1)
+
+
+class PreAuthGuard:
+    """
+    The checks APIKeyAuthMiddleware makes before it authenticates anything,
+    so a flood of requests with missing, bad or random keys is turned away
+    without reading the auth config or calling Vault:
+      - a per-client-network token bucket over every authenticated path
+        (`pre_auth.requests_per_minute`; addresses are grouped into
+        networks by `ipv4_prefix`/`ipv6_prefix`). Off unless configured.
+      - a negative cache: an API key (or bearer token) that just failed
+        authentication is rejected again outright for
+        `negative_cache_seconds`, or until the `config_version` it was
+        checked against changes, whichever comes first. Callers pass it
+        as its hash_api_key() digest, never the credential itself, and
+        the version as whatever identifies the key set it was checked
+        against (src/auth.py::_key_set_version).
+
+    Both are in-memory and bounded (MAX_TRACKED_ENTRIES each). Config is
+    the `pre_auth` section of config/rate_limits.yaml, read once at
+    construction like RateLimiter's.
+    """
+
+    def __init__(self, config_path: str):
+        self.config = (
+            load_config_file(config_path, "rate limit config").get("pre_auth")
+        ) or {}
+        self.lock = Lock()
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._rejected: "OrderedDict[str, Tuple[float, Hashable]]" = OrderedDict()
+
+    def client_network(self, client_ip: Optional[str]) -> Optional[str]:
+        if not client_ip:
+            return None
+        try:
+            address = ipaddress.ip_address(client_ip)
+        except ValueError:
+            return client_ip
+        prefix = (
+            self.config.get("ipv4_prefix", DEFAULT_IPV4_PREFIX)
+            if address.version == 4
+            else self.config.get("ipv6_prefix", DEFAULT_IPV6_PREFIX)
+        )
+        return str(ipaddress.ip_network(f"{address}/{prefix}", strict=False))
+
+    def check_client(self, client_ip: Optional[str]) -> Optional[float]:
+        """
+        Takes one request from the client's network's bucket. Returns
+        None if it's allowed, else seconds until it would be.
+        """
+        limit = self.config.get("requests_per_minute")
+        network = self.client_network(client_ip)
+        if not limit or limit <= 0 or network is None:
+            return None
+        rate = limit / WINDOW_SECONDS
+        now = time.monotonic()
+        with self.lock:
+            bucket = self._buckets.get(network)
+            if bucket is None:
+                bucket = self._buckets[network] = [float(limit), now]
+                _trim(self._buckets)
+            else:
+                self._buckets.move_to_end(network)
+                bucket[0] = min(float(limit), bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+            if bucket[0] < 1:
+                return (1 - bucket[0]) / rate
+            bucket[0] -= 1
+            return None
+
+    def recently_rejected(self, credential_hash: str, config_version: Hashable) -> bool:
+        with self.lock:
+            entry = self._rejected.get(credential_hash)
+            if entry is None:
+                return False
+            expires_at, version = entry
+            if version != config_version or time.monotonic() >= expires_at:
+                del self._rejected[credential_hash]
+                return False
+            return True
+
+    def record_rejected(self, credential_hash: str, config_version: Hashable):
+        ttl = self.config.get("negative_cache_seconds", DEFAULT_NEGATIVE_CACHE_SECONDS)
+        if not ttl or ttl <= 0:
+            return
+        with self.lock:
+            self._rejected[credential_hash] = (time.monotonic() + ttl, config_version)
+            self._rejected.move_to_end(credential_hash)
+            _trim(self._rejected)
+
+    def reset(self):
+        with self.lock:
+            self._buckets.clear()
+            self._rejected.clear()
+
+
+def _trim(entries: OrderedDict):
+    """Caller must hold the owner's lock."""
+    while len(entries) > MAX_TRACKED_ENTRIES:
+        entries.popitem(last=False)
@@ -0,0 +1,88 @@
+import logging
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+
+from src.config import load_config_file
+
+logger = logging.getLogger("autoheal.resultcache")
+
+# Most results ResultCache holds at once; past it, the least recently
+# used are evicted first. Overridden by `result_cache.max_entries` in
+# config/execution.yaml.
+DEFAULT_MAX_ENTRIES = 1024
+# How long a `cacheable` action's result is reused when the action
+# doesn't set `cache_ttl_seconds`.
+DEFAULT_CACHE_TTL_SECONDS = 30
+
+
+class ResultCache:
+    """
+    A bounded, TTL'd LRU cache of execution results for read-only
+    actions - those marked `cacheable: true` in config/actions.yaml, for
+    `cache_ttl_seconds`. A request identical to one that ran within the
+    TTL (same single_flight_key_for: action, controller, parameters) is
+    answered with that execution's result instead of running the action
+    again, so a probe hammering health_check costs a dictionary lookup
+    rather than a script or an SSH round-trip. Only successful results
+    are cached: a failing check is run again, so recovery shows up at
+    once.
+
+    Where CooldownTracker rejects a repeat and SingleFlight collapses
+    concurrent duplicates, this answers sequential ones; it never caches
+    anything for actions that don't opt in.
+
+    Like SingleFlight, in-memory and per-process.
+    """
+
+    def __init__(self, config_path: str):
+        self.config = load_config_file(config_path, "result cache config")
+        cache_config = self.config.get("result_cache") or {}
+        self.max_entries = max(
+            int(cache_config.get("max_entries", DEFAULT_MAX_ENTRIES)), 0
+        )
+        self.lock = Lock()
+        # key -> (expires_at, result), least recently used first.
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """The result cached under `key`, or None if there's none unexpired."""
+        now = time.monotonic()
+        with self.lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def put(self, key: str, result: Any, ttl_seconds: float):
+        """Caches `result` under `key` for `ttl_seconds`."""
+        if ttl_seconds <= 0 or self.max_entries == 0:
+            return
+        with self.lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+            }
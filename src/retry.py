@@ -0,0 +1,100 @@
+import random
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+# Error classes a failed ActionExecutionResult can carry (its
+# `error_class`) - the transient failures a retry policy may retry. Each
+# is only ever given to a failure that provably happened before the
+# action started changing anything, so retrying can't run it twice. Any
+# other failure is final: a command that ran and exited non-zero, an ssh
+# exit 255 that may have come from the command or a session dropped
+# mid-command, a Kubernetes 5xx that may have arrived after the change
+# was applied, a 403, a bad parameter.
+#
+# ssh couldn't connect or authenticate while starting a master
+# connection (ssh.multiplex) - the action's command was never sent.
+SSH_CONNECTION = "ssh_connection"
+# The Kubernetes API server answered 429 Too Many Requests to a request
+# made before the kube_action had changed anything.
+KUBE_THROTTLED = "kube_throttled"
+# A vault: credential couldn't be resolved - Vault unreachable or timing
+# out - so nothing was even attempted.
+VAULT_UNAVAILABLE = "vault_unavailable"
+
+RETRYABLE_ERROR_CLASSES = (SSH_CONNECTION, KUBE_THROTTLED, VAULT_UNAVAILABLE)
+
+# Defaults for a policy that doesn't say otherwise. One attempt - no
+# retries - unless `retry.max_attempts` is configured.
+DEFAULT_MAX_ATTEMPTS = 1
+DEFAULT_INITIAL_BACKOFF_SECONDS = 1.0
+DEFAULT_MAX_BACKOFF_SECONDS = 10.0
+DEFAULT_JITTER = 0.5
+
+
+def kube_api_error_class(status: Optional[int], changed: bool) -> Optional[str]:
+    """
+    The error class of a Kubernetes API error with HTTP `status`, raised
+    after the kube_action had (`changed`) or hadn't yet changed anything.
+    """
+    if status == 429 and not changed:
+        return KUBE_THROTTLED
+    return None
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    How ActionExecutor.run_with_retries retries an execution that failed
+    transiently: up to `max_attempts` attempts in all, retrying only
+    failures whose error class is in `retry_on`. The wait before retry n
+    (n = 1, 2, ...) is initial_backoff_seconds * 2^(n-1), capped at
+    max_backoff_seconds, less a random fraction of up to `jitter` of it -
+    so executions that failed together (one API server throttling them
+    all) don't retry in lockstep.
+    """
+
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    initial_backoff_seconds: float = DEFAULT_INITIAL_BACKOFF_SECONDS
+    max_backoff_seconds: float = DEFAULT_MAX_BACKOFF_SECONDS
+    jitter: float = DEFAULT_JITTER
+    retry_on: Tuple[str, ...] = RETRYABLE_ERROR_CLASSES
+
+    @classmethod
+    def from_config(cls, *layers: Optional[dict]) -> "RetryPolicy":
+        """
+        The policy from `retry` config sections, later ones overriding
+        earlier ones key by key - e.g. (execution.yaml's, the
+        controller's, the action's).
+        """
+        merged = {}
+        for layer in layers:
+            merged.update(layer or {})
+        return cls(
+            max_attempts=max(int(merged.get("max_attempts", DEFAULT_MAX_ATTEMPTS)), 1),
+            initial_backoff_seconds=max(
+                float(
+                    merged.get(
+                        "initial_backoff_seconds", DEFAULT_INITIAL_BACKOFF_SECONDS
+                    )
+                ),
+                0.0,
+            ),
+            max_backoff_seconds=max(
+                float(merged.get("max_backoff_seconds", DEFAULT_MAX_BACKOFF_SECONDS)),
+                0.0,
+            ),
+            jitter=min(max(float(merged.get("jitter", DEFAULT_JITTER)), 0.0), 1.0),
+            retry_on=tuple(merged.get("retry_on", RETRYABLE_ERROR_CLASSES)),
+        )
+
+    def should_retry(self, error_class: Optional[str], attempt: int) -> bool:
+        """Whether a failure of `error_class` on attempt `attempt` is retried."""
+        return attempt < self.max_attempts and error_class in self.retry_on
+
+    def backoff_seconds(self, attempt: int) -> float:
+        """How long to wait after failed attempt `attempt` before the next."""
+        backoff = min(
+            self.initial_backoff_seconds * 2 ** (attempt - 1),
+            self.max_backoff_seconds,
+        )
+        return backoff * (1 - random.uniform(0, self.jitter))
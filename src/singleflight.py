@@ -0,0 +1,52 @@
+from concurrent.futures import Future
+from threading import Lock
+from typing import Callable, Dict, Tuple
+
+
+class SingleFlight:
+    """
+    In-flight coalescing of identical executions. The first caller for a
+    key starts the work; anyone asking for the same key while it's still
+    running gets that same Future back instead of starting another copy,
+    and sees its result when it finishes. The key is forgotten the moment
+    the work completes, so this never caches results - it only collapses
+    concurrent duplicates.
+
+    It closes the gap CooldownTracker can't: cooldown is only recorded
+    once an execution finishes, so five alerts for the same broken
+    deployment arriving within a second all pass the cooldown check and
+    would otherwise each start their own SSH session or kube patch.
+
+    Like CooldownTracker, in-memory and per-process.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self._in_flight: Dict[str, Future] = {}
+        self._coalesced = 0
+
+    def run(self, key: str, start: Callable[[], Future]) -> Tuple[Future, bool]:
+        """
+        Returns (future, started): the Future of the execution in flight
+        for `key` and False, or - if there is none - a new one from
+        `start()` and True. `start` must only schedule the work (e.g.
+        ExecutionPool.submit), never run it inline: it's called under the
+        lock.
+        """
+        with self.lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._coalesced += 1
+                return future, False
+            future = self._in_flight[key] = start()
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future, True
+
+    def _forget(self, key: str, future: Future):
+        with self.lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {"in_flight": len(self._in_flight), "coalesced": self._coalesced}
@@ -0,0 +1,248 @@
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("autoheal.sshmux")
+
+# A master connection exits on its own after this many seconds with no
+# session using it (OpenSSH ControlPersist).
+DEFAULT_CONTROL_PERSIST_SECONDS = 300
+# How long a master that passed `ssh -O check` is trusted before it's
+# checked again.
+DEFAULT_HEALTH_CHECK_SECONDS = 10
+# Upper bound on establishing a master: connect, key exchange, auth.
+MASTER_START_TIMEOUT_SECONDS = 30
+# After a master fails to start, how long actions on that destination
+# just connect directly instead of trying (and timing out on) another.
+DEFAULT_MASTER_RETRY_SECONDS = 60
+CONTROL_COMMAND_TIMEOUT_SECONDS = 5
+# ssh's own exit code for its errors. A master runs `true`, so from a
+# master start it can only mean ssh couldn't connect or authenticate.
+SSH_ERROR_EXIT_CODE = 255
+
+
+class SSHConnectError(Exception):
+    """
+    Raised by SSHMultiplexer.master() when ssh couldn't connect to or
+    authenticate with the destination to start a master - before any
+    command was sent to it.
+    """
+
+
+class SSHMultiplexer:
+    """
+    Persistent OpenSSH master connections (ControlMaster), one per
+    controller destination and key, so an action on a controller that
+    was used recently skips the TCP connect, key exchange and auth - and
+    the Vault fetch and tempfile for its key - and starts in
+    milliseconds: the action's ssh just opens a new session on the
+    master's socket.
+
+    Lifecycle:
+    - master() starts a master on first use, authenticating once with
+      the controller's key. If ssh can't connect or authenticate it
+      raises SSHConnectError: the action's command was never sent. A
+      master that fails to start for any other reason isn't tried again
+      for `master_retry_seconds`: until then master() answers None at
+      once and actions connect directly, instead of each paying a
+      failed master start first.
+    - a master in use is health-checked (`ssh -O check`) at most every
+      `health_check_seconds`; one that died is replaced on the next use.
+    - a master nobody uses exits by itself after
+      `control_persist_seconds` idle (ControlPersist).
+    - close() stops every master (`ssh -O exit`) and removes the socket
+      directory, at shutdown.
+
+    Reads the `ssh` section of config/execution.yaml; disabled unless
+    `multiplex` is true, in which case run_remote is unchanged.
+    """
+
+    def __init__(self, config: Optional[dict] = None):
+        config = config or {}
+        self.enabled = bool(config.get("multiplex", False))
+        self.persist_seconds = int(
+            config.get("control_persist_seconds", DEFAULT_CONTROL_PERSIST_SECONDS)
+        )
+        self.health_check_seconds = float(
+            config.get("health_check_seconds", DEFAULT_HEALTH_CHECK_SECONDS)
+        )
+        self.master_retry_seconds = float(
+            config.get("master_retry_seconds", DEFAULT_MASTER_RETRY_SECONDS)
+        )
+        self._control_dir = config.get("control_dir")
+        self._owns_control_dir = False
+        self.lock = Lock()
+        self._locks: Dict[str, Lock] = {}
+        # control path -> (destination, monotonic time of its last good check)
+        self._masters: Dict[str, Tuple[str, float]] = {}
+        # control path -> monotonic time a failed master may be retried
+        self._failed_until: Dict[str, float] = {}
+        self._started = 0
+        self._reused = 0
+
+    def control_path(self, destination: str, ssh_key: Optional[str]) -> str:
+        # Hashed: unix socket paths are limited to ~100 bytes.
+        digest = hashlib.sha256(f"{destination}\0{ssh_key}".encode()).hexdigest()
+        return os.path.join(self._ensure_control_dir(), digest[:16])
+
+    def master(
+        self,
+        destination: str,
+        ssh_key: Optional[str],
+        ssh_options: List[str],
+        resolve_key: Callable[[], Tuple[Optional[str], Optional[str]]],
+    ) -> Optional[str]:
+        """
+        The control path of a live master for `destination`, starting one
+        if needed, or None if one couldn't be started, now or within the
+        last `master_retry_seconds` (the caller should just connect
+        directly). `resolve_key` returns the (key path, tempfile) to
+        authenticate with, and is only called when a new master has to
+        authenticate; a VaultUnavailableError from it is passed on. The
+        caller owns the tempfile - a master that fails to start leaves
+        the key for the direct connection rather than having it fetched
+        again. Raises SSHConnectError if ssh couldn't connect or
+        authenticate (exit 255) - a direct connection would fare no
+        better.
+        """
+        path = self.control_path(destination, ssh_key)
+        with self.lock:
+            path_lock = self._locks.setdefault(path, Lock())
+        with path_lock:
+            with self.lock:
+                known = self._masters.get(path)
+                if known is None and self._failed_until.get(path, 0) > (
+                    time.monotonic()
+                ):
+                    return None
+            if known is not None:
+                if time.monotonic() - known[1] < self.health_check_seconds:
+                    self._count_reuse()
+                    return path
+                if self._control(path, destination, "check"):
+                    with self.lock:
+                        self._masters[path] = (destination, time.monotonic())
+                    self._count_reuse()
+                    return path
+                logger.warning(f"SSH master for {destination} is gone; reconnecting")
+                self.forget(path)
+            if self._start(path, destination, ssh_options, resolve_key):
+                return path
+            return None
+
+    def forget(self, path: str):
+        """Stops treating the master at `path` as live."""
+        with self.lock:
+            self._masters.pop(path, None)
+
+    def close(self):
+        with self.lock:
+            masters = dict(self._masters)
+            self._masters.clear()
+        for path, (destination, _) in masters.items():
+            self._control(path, destination, "exit")
+        if self._owns_control_dir and self._control_dir:
+            shutil.rmtree(self._control_dir, ignore_errors=True)
+            self._control_dir = None
+            self._owns_control_dir = False
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                "masters": len(self._masters),
+                "started": self._started,
+                "reused": self._reused,
+            }
+
+    def _count_reuse(self):
+        with self.lock:
+            self._reused += 1
+
+    def _ensure_control_dir(self) -> str:
+        with self.lock:
+            if self._control_dir is None:
+                self._control_dir = tempfile.mkdtemp(prefix="autoheal-ssh-")
+                self._owns_control_dir = True
+            else:
+                os.makedirs(self._control_dir, mode=0o700, exist_ok=True)
+            return self._control_dir
+
+    def _start(self, path, destination, ssh_options, resolve_key) -> bool:
+        key_path, _ = resolve_key()
+        # A stale socket left by a dead master would stop a new one from
+        # binding.
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        cmd = ["ssh", *ssh_options]
+        if key_path:
+            cmd += ["-i", key_path]
+        cmd += [
+            "-o",
+            "ControlMaster=yes",
+            "-o",
+            f"ControlPath={path}",
+            "-o",
+            f"ControlPersist={self.persist_seconds}",
+            destination,
+            "true",
+        ]
+        try:
+            # All three streams detached: the master lives on in the
+            # background, and would hold captured pipes open with it.
+            proc = subprocess.run(
+                cmd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=MASTER_START_TIMEOUT_SECONDS,
+            )
+        except (subprocess.TimeoutExpired, OSError) as e:
+            logger.warning(f"Could not start SSH master for {destination}: {e}")
+            self._start_failed(path)
+            return False
+        if proc.returncode == SSH_ERROR_EXIT_CODE:
+            # Not remembered: a connection failure says nothing against
+            # multiplexing, and the next attempt should try a master again.
+            raise SSHConnectError(
+                f"SSH connection to {destination} failed: could not connect "
+                "or authenticate to start a master connection"
+            )
+        if proc.returncode != 0:
+            logger.warning(
+                f"Could not start SSH master for {destination} "
+                f"(exit {proc.returncode}); connecting directly"
+            )
+            self._start_failed(path)
+            return False
+        with self.lock:
+            self._failed_until.pop(path, None)
+            self._masters[path] = (destination, time.monotonic())
+            self._started += 1
+        logger.info(f"SSH master connection to {destination} established")
+        return True
+
+    def _start_failed(self, path: str):
+        with self.lock:
+            self._failed_until[path] = time.monotonic() + self.master_retry_seconds
+
+    @staticmethod
+    def _control(path: str, destination: str, command: str) -> bool:
+        try:
+            proc = subprocess.run(
+                ["ssh", "-o", f"ControlPath={path}", "-O", command, destination],
+                stdin=subprocess.DEVNULL,
+                capture_output=True,
+                timeout=CONTROL_COMMAND_TIMEOUT_SECONDS,
+            )
+        except (subprocess.TimeoutExpired, OSError) as e:
+            logger.warning(f"ssh -O {command} for {destination} failed: {e}")
+            return False
+        return proc.returncode == 0
@@ -2,7 +2,7 @@ import logging
 import os
 import time
 from threading import Lock
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Callable, Dict, Optional, Tuple
 
 import requests
 
@@ -94,7 +94,9 @@ class VaultClient:
             else os.environ.get("VAULT_K8S_JWT_PATH", DEFAULT_K8S_JWT_PATH)
         )
         self.token_refresh_buffer_seconds = token_refresh_buffer_seconds
-        self._cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        # path -> (fetched_at, data, {derive: derive(data)}, generation)
+        self._cache: Dict[str, Tuple[float, Dict[str, Any], Dict, int]] = {}
+        self._fetches = 0
         self._lock = Lock()
         self._auth_lock = Lock()
         self._k8s_token: Optional[str] = None
@@ -115,6 +117,35 @@ class VaultClient:
         the response can't be parsed as expected. Never returns stale
         data past cache_ttl_seconds; never silently returns partial data.
         """
+        return self._cached_entry(path)[1]
+
+    def get_derived(self, path: str, derive: Callable[[Dict[str, Any]], Any]) -> Any:
+        """
+        derive(get_secret(path)), computed once per fetch of the secret
+        rather than on every call - for callers that compile a secret
+        into something costlier to build than to use (src.auth's API key
+        index). It's kept with the cached secret, so it expires, is
+        invalidated and is rebuilt along with it.
+        """
+        _, data, derived, _ = self._cached_entry(path)
+        with self._lock:
+            if derive in derived:
+                return derived[derive]
+        value = derive(data)
+        with self._lock:
+            return derived.setdefault(derive, value)
+
+    def fetch_generation(self, path: str) -> Optional[int]:
+        """
+        Identifies the fetch of `path` currently cached - it changes each
+        time the secret is fetched afresh - or None if nothing is cached.
+        Never contacts Vault.
+        """
+        with self._lock:
+            cached = self._cache.get(path)
+        return cached[3] if cached is not None else None
+
+    def _cached_entry(self, path: str) -> Tuple[float, Dict[str, Any], Dict, int]:
         if not self.is_configured:
             if self.auth_method == "kubernetes":
                 raise VaultUnavailableError(
@@ -126,10 +157,8 @@ class VaultClient:
 
         with self._lock:
             cached = self._cache.get(path)
-        if cached is not None:
-            fetched_at, data = cached
-            if time.time() - fetched_at < self.cache_ttl_seconds:
-                return data
+        if cached is not None and time.time() - cached[0] < self.cache_ttl_seconds:
+            return cached
 
         url = f"{self.addr.rstrip('/')}/v1/{path.lstrip('/')}"
         headers = {"X-Vault-Token": self._resolve_token()}
@@ -155,8 +184,10 @@ class VaultClient:
             ) from e
 
         with self._lock:
-            self._cache[path] = (time.time(), data)
-        return data
+            self._fetches += 1
+            entry = (time.time(), data, {}, self._fetches)
+            self._cache[path] = entry
+        return entry
 
     def invalidate(self, path: Optional[str] = None):
         """
@@ -304,3 +335,13 @@ def resolve_vault_ref(
     if field not in secret:
         raise VaultUnavailableError(f"Vault secret at '{path}' has no field '{field}'")
     return secret[field]
+
+
+def invalidate_vault_ref(value: Optional[str]):
+    """
+    Drops the cached secret behind a "vault:<path>#<field>" reference, so
+    the next resolve_vault_ref fetches it fresh - for a caller that just
+    found out the value it got has been rotated. Anything else is ignored.
+    """
+    if value and value.startswith("vault:"):
+        vault_client.invalidate(value.removeprefix("vault:").partition("#")[0])
@@ -66,8 +66,10 @@ def reset_rate_limiter():
     import src.main as main
 
     main.rate_limiter._hits.clear()
+    main.pre_auth_guard.reset()
     yield
     main.rate_limiter._hits.clear()
+    main.pre_auth_guard.reset()
 
 
 @pytest.fixture(autouse=True)
@@ -151,3 +153,34 @@ def patch_executor(monkeypatch, request):
         lambda *a, **kw: DummyResult("kube"),
     )
     yield
+
+
+@pytest.fixture(autouse=True)
+def reset_job_store():
+    """
+    job_store is another module-level singleton; clear it so one test's
+    async_mode jobs never show up in another test's /jobs listing.
+    """
+    import src.main as main
+
+    with main.job_store.lock:
+        main.job_store._jobs.clear()
+        main.job_store._outputs.clear()
+    yield
+    with main.job_store.lock:
+        main.job_store._jobs.clear()
+        main.job_store._outputs.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_result_cache():
+    """
+    result_cache too: a cacheable action's result cached by one test
+    would otherwise answer the next test's request for it without
+    running anything.
+    """
+    import src.main as main
+
+    main.result_cache.clear()
+    yield
+    main.result_cache.clear()
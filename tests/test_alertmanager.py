@@ -0,0 +1,182 @@
+from fastapi.testclient import TestClient
+
+import src.main as main
+from src.alertmanager import AlertmanagerMapper
+from src.main import app
+
+client = TestClient(app)
+
+MAPPING = """
+routes:
+  - match:
+      alertname: KubeDeploymentReplicasMismatch
+    event_type: restart_deployment_kubeapi
+    parameters:
+      deployment: deployment
+      namespace: namespace
+  - match:
+      alertname: DiskFull
+      severity: critical
+    event_type: cleanup_disk
+    dry_run: true
+event_type_label: autoheal_action
+parameter_label_prefix: autoheal_param_
+"""
+
+
+def make_mapper(tmp_path, config_text=MAPPING):
+    config_path = tmp_path / "alertmanager.yaml"
+    config_path.write_text(config_text)
+    return AlertmanagerMapper(str(config_path))
+
+
+def alert(status="firing", fingerprint=None, **labels):
+    return {"status": status, "labels": labels, "fingerprint": fingerprint}
+
+
+def notification(*alerts, status="firing"):
+    return {
+        "version": "4",
+        "groupKey": "{}:{alertname='x'}",
+        "status": status,
+        "receiver": "auto-healer",
+        "alerts": list(alerts),
+    }
+
+
+def post(body, api_key="admin-key"):
+    return client.post(
+        "/webhook/alertmanager", json=body, headers={"x-api-key": api_key}
+    )
+
+
+# --- AlertmanagerMapper --------------------------------------------------
+
+
+def test_route_maps_labels_to_parameters(tmp_path):
+    mapper = make_mapper(tmp_path)
+    payload = mapper.map_alert(
+        alert(
+            alertname="KubeDeploymentReplicasMismatch",
+            deployment="web",
+            namespace="prod",
+            pod="web-123",
+        )
+    )
+    assert payload == {
+        "event_type": "restart_deployment_kubeapi",
+        "parameters": {"deployment": "web", "namespace": "prod"},
+    }
+
+
+def test_route_requires_every_match_label_and_passes_options_through(tmp_path):
+    mapper = make_mapper(tmp_path)
+    assert mapper.map_alert(alert(alertname="DiskFull", severity="warning")) is None
+    payload = mapper.map_alert(alert(alertname="DiskFull", severity="critical"))
+    assert payload["event_type"] == "cleanup_disk"
+    assert payload["dry_run"] is True
+
+
+def test_event_type_label_and_prefixed_parameters(tmp_path):
+    mapper = make_mapper(tmp_path)
+    payload = mapper.map_alert(
+        alert(
+            alertname="NginxDown",
+            autoheal_action="restart_service",
+            autoheal_param_service_name="nginx",
+        )
+    )
+    assert payload == {
+        "event_type": "restart_service",
+        "parameters": {"service_name": "nginx"},
+    }
+
+
+def test_unmatched_alert_and_missing_config_map_to_none(tmp_path):
+    assert make_mapper(tmp_path).map_alert(alert(alertname="Other")) is None
+    mapper = AlertmanagerMapper(str(tmp_path / "missing.yaml"))
+    assert mapper.map_alert(alert(autoheal_action="cleanup_disk")) is None
+
+
+# --- /webhook/alertmanager -----------------------------------------------
+
+
+def test_grouped_notification_fans_out_per_alert():
+    resp = post(
+        notification(
+            alert(
+                fingerprint="a1",
+                alertname="NodeFilesystemAlmostOutOfSpace",
+                instance="node-1",
+            ),
+            alert(
+                fingerprint="a2",
+                alertname="KubeDeploymentReplicasMismatch",
+                deployment="web",
+                namespace="prod",
+            ),
+            alert(fingerprint="a3", alertname="Unmapped"),
+            alert(status="resolved", fingerprint="a4", alertname="DiskFull"),
+        )
+    )
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["alerts"] == 4
+    assert body["resolved_dropped"] == 1
+    assert body["unmapped"] == ["Unmapped"]
+    results = {r["fingerprint"]: r for r in body["results"]}
+    assert set(results) == {"a1", "a2"}
+    assert results["a1"]["event_type"] == "cleanup_disk"
+    assert results["a1"]["status_code"] == 200
+    assert results["a2"]["body"]["parameters"]["deployment"] == "web"
+
+
+def test_resolved_notification_does_nothing(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("resolved alerts must not reach the batch pipeline")
+
+    monkeypatch.setattr("src.main._process_webhook_batch", fail)
+    resp = post(
+        notification(
+            alert(status="resolved", alertname="NodeFilesystemAlmostOutOfSpace"),
+            status="resolved",
+        )
+    )
+    assert resp.status_code == 200
+    assert resp.json()["results"] == []
+    assert resp.json()["resolved_dropped"] == 1
+
+
+def test_duplicate_alerts_in_a_group_run_once():
+    duplicate = dict(
+        alertname="KubeDeploymentReplicasMismatch", deployment="web", namespace="prod"
+    )
+    body = post(
+        notification(
+            alert(fingerprint="p1", pod="web-1", **duplicate),
+            alert(fingerprint="p2", pod="web-2", **duplicate),
+        )
+    ).json()
+    assert [r["status_code"] for r in body["results"]] == [200, 409]
+
+
+def test_permissions_apply_per_alert():
+    body = post(
+        notification(alert(alertname="NodeFilesystemAlmostOutOfSpace")),
+        api_key="readonly-key",
+    ).json()
+    assert body["results"][0]["status_code"] == 403
+
+
+def test_rejects_non_alertmanager_bodies_and_oversized_groups():
+    assert post({"event_type": "cleanup_disk"}).status_code == 400
+    too_many = [
+        alert(alertname="NodeFilesystemAlmostOutOfSpace")
+        for _ in range(main.MAX_BATCH_EVENTS + 1)
+    ]
+    assert post(notification(*too_many)).status_code == 400
+
+
+def test_requires_auth():
+    resp = client.post("/webhook/alertmanager", json=notification())
+    assert resp.status_code == 401
@@ -320,6 +320,24 @@ def test_verify_valid_chain_is_ok(audit_path):
     assert result["segment_boundaries"] == []
 
 
+def test_append_many_chains_like_sequential_appends(audit_path):
+    chain = AuditChain(audit_path)
+    chain.append({"action": "before"})
+    group = chain.append_many([{"action": "a"}, {"action": "b"}, {"action": "c"}])
+    assert [e["sequence"] for e in group] == [2, 3, 4]
+    assert group[1]["prev_hash"] == group[0]["entry_hash"]
+    assert chain.append({"action": "after"})["prev_hash"] == group[2]["entry_hash"]
+    assert [e["action"] for e in read_lines(audit_path)] == [
+        "before",
+        "a",
+        "b",
+        "c",
+        "after",
+    ]
+    assert verify_chain(audit_path)["ok"] is True
+    assert chain.append_many([]) == []
+
+
 def test_verify_detects_modified_entry(audit_path):
     chain = AuditChain(audit_path)
     chain.append({"action": "a"})
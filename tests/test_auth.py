@@ -44,3 +44,172 @@ def test_protected_with_valid_api_key():
     response = client.get("/protected", headers={"x-api-key": "admin-key"})
     assert response.status_code == 200
     assert response.json()["message"] == "You have accessed a protected endpoint!"
+
+
+def test_resolve_principal_compiles_role_and_scope(monkeypatch):
+    import src.auth as auth
+
+    monkeypatch.setattr(
+        auth,
+        "_load_auth_config",
+        lambda: {
+            "api_keys": {
+                "scoped": {"role": "operator", "allowed_actions": ["restart_service"]}
+            },
+            "roles": {
+                "operator": {
+                    "permissions": [
+                        "execute_actions",
+                        {"controller_override": False},
+                        {"audit_read": True},
+                    ]
+                }
+            },
+        },
+    )
+    principal = auth.resolve_principal("scoped")
+    assert principal.role == "operator"
+    assert principal.permissions == {"execute_actions", "audit_read"}
+    assert principal.allows_action("restart_service")
+    assert not principal.allows_action("drain_node")
+    assert principal.allows_controller("anything")
+    assert auth.resolve_principal("unknown") is None
+    assert auth.resolve_principal(None) is None
+
+
+def test_auth_config_is_read_once_per_request(monkeypatch):
+    import src.auth as auth
+
+    calls = []
+    real = auth._load_auth_config
+
+    def counting():
+        calls.append(1)
+        return real()
+
+    monkeypatch.setattr(auth, "_load_auth_config", counting)
+    resp = client.post(
+        "/webhook",
+        json={"event_type": "cleanup_disk"},
+        headers={"x-api-key": "admin-key"},
+    )
+    assert resp.status_code == 200
+    assert len(calls) == 1
+
+
+def test_middleware_is_pure_asgi_and_passes_send_through():
+    import asyncio
+
+    from starlette.middleware.base import BaseHTTPMiddleware
+
+    from src.auth import APIKeyAuthMiddleware
+
+    assert not issubclass(APIKeyAuthMiddleware, BaseHTTPMiddleware)
+
+    seen = {}
+
+    async def inner(scope, receive, send):
+        seen["principal"] = scope["state"]["principal"]
+        seen["send"] = send
+
+    async def send(message):
+        pass
+
+    scope = {
+        "type": "http",
+        "path": "/jobs",
+        "headers": [(b"x-api-key", b"admin-key")],
+    }
+    asyncio.run(APIKeyAuthMiddleware(inner)(scope, None, send))
+    assert seen["principal"].role == "admin"
+    # The app writes straight to the server's send - nothing in between.
+    assert seen["send"] is send
+
+
+def _use_api_keys(monkeypatch, api_keys):
+    import src.auth as auth
+
+    config = {"api_keys": api_keys, "roles": {"admin": {"permissions": []}}}
+    monkeypatch.setattr(auth, "_load_auth_config", lambda: config)
+
+
+def test_hashed_key_entries_authenticate(monkeypatch):
+    from src.auth import hash_api_key
+
+    monkeypatch.setenv("AUTOHEAL_API_KEY_PEPPER", "pepper-1")
+    _use_api_keys(
+        monkeypatch, {hash_api_key("alert-source-1"): "admin", "plain-key": "admin"}
+    )
+    for key in ("alert-source-1", "plain-key"):
+        assert client.get("/protected", headers={"x-api-key": key}).status_code == 200
+    # The hash itself is not a key.
+    leaked = hash_api_key("alert-source-1")
+    assert client.get("/protected", headers={"x-api-key": leaked}).status_code == 401
+
+
+def test_pepper_is_part_of_the_hash(monkeypatch):
+    from src.auth import hash_api_key
+
+    assert hash_api_key("k", pepper="a") != hash_api_key("k", pepper="b")
+    monkeypatch.setenv("AUTOHEAL_API_KEY_PEPPER", "a")
+    _use_api_keys(monkeypatch, {hash_api_key("k", pepper="b"): "admin"})
+    assert client.get("/protected", headers={"x-api-key": "k"}).status_code == 401
+
+
+def _counting_hashes(monkeypatch):
+    import src.auth as auth
+
+    hashes = []
+    real = auth.hash_api_key
+
+    def counting(api_key, pepper=None):
+        hashes.append(api_key)
+        return real(api_key, pepper)
+
+    monkeypatch.setattr(auth, "hash_api_key", counting)
+    return hashes
+
+
+def test_key_index_is_built_once_per_config_snapshot(monkeypatch, tmp_path):
+    import yaml
+
+    import src.auth as auth
+    from src.config import ConfigRegistry
+
+    keys = {f"key-{i}": "admin" for i in range(1000)}
+    (tmp_path / "auth.yaml").write_text(
+        yaml.safe_dump({"api_keys": keys, "roles": {"admin": {"permissions": []}}})
+    )
+    (tmp_path / "controllers.yaml").write_text("controllers: {}\n")
+    (tmp_path / "actions.yaml").write_text("actions: {}\n")
+    registry = ConfigRegistry(
+        str(tmp_path), str(tmp_path), str(tmp_path), dict, auth.build_key_index
+    )
+    monkeypatch.setattr(auth, "config_registry", registry)
+    hashes = _counting_hashes(monkeypatch)
+    for _ in range(3):
+        resp = client.get("/protected", headers={"x-api-key": "key-999"})
+        assert resp.status_code == 200
+    # 1000 to build the index with the snapshot, then one per request.
+    assert len(hashes) == 1000 + 3
+
+
+def test_vault_backed_key_index_is_built_once_per_fetch(monkeypatch):
+    from unittest.mock import MagicMock, patch
+
+    import src.auth as auth
+    from src.vault import VaultClient
+
+    monkeypatch.setattr(auth, "vault_client", VaultClient(addr="https://v", token="t"))
+    _use_api_keys(monkeypatch, {"vault_path": "secret/data/api-keys"})
+    vault_resp = MagicMock(status_code=200)
+    vault_resp.json.return_value = {
+        "data": {"data": {f"key-{i}": "admin" for i in range(100)}}
+    }
+    hashes = _counting_hashes(monkeypatch)
+    with patch("requests.get", return_value=vault_resp) as vault_get:
+        for _ in range(3):
+            resp = client.get("/protected", headers={"x-api-key": "key-99"})
+            assert resp.status_code == 200
+    assert vault_get.call_count == 1
+    assert len(hashes) == 100 + 3
@@ -0,0 +1,222 @@
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi.testclient import TestClient
+
+import src.auth as auth
+import src.jwks as jwks
+from src.config import config_registry
+from src.main import app, pre_auth_guard
+
+client = TestClient(app)
+
+JWKS_URL = "https://issuer.example.com/.well-known/jwks.json"
+ISSUER = "https://issuer.example.com/"
+
+
+def make_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+KEY = make_key()
+
+
+def public_jwk(private_key, kid):
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+    return {**jwk, "kid": kid, "alg": "RS256", "use": "sig"}
+
+
+def make_token(private_key=KEY, kid="k1", **claims):
+    now = int(time.time())
+    payload = {
+        "iss": ISSUER,
+        "aud": "auto-healer",
+        "sub": "alice",
+        "iat": now,
+        "exp": now + 300,
+        **claims,
+    }
+    return jwt.encode(payload, private_key, algorithm="RS256", headers={"kid": kid})
+
+
+def bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def issuer(monkeypatch):
+    """Serves a JWKS from memory and counts how often it's fetched."""
+    state = SimpleNamespace(keys=[public_jwk(KEY, "k1")], fetches=0)
+
+    def fake_get(url, timeout):
+        assert url == JWKS_URL
+        state.fetches += 1
+        return SimpleNamespace(status_code=200, json=lambda: {"keys": state.keys})
+
+    monkeypatch.setattr(jwks.requests, "get", fake_get)
+    monkeypatch.setattr(jwks, "jwks_cache", jwks.JWKSCache())
+    config = {
+        **config_registry.snapshot().auth,
+        "jwt": {
+            "jwks_url": JWKS_URL,
+            "issuer": ISSUER,
+            "audience": "auto-healer",
+            "claims": {"role": "groups", "allowed_actions": "autoheal_actions"},
+            "role_map": {"sre": "operator"},
+        },
+    }
+    monkeypatch.setattr(auth, "_load_auth_config", lambda: config)
+    return state
+
+
+def test_bearer_token_maps_claims_to_role_and_scope(issuer):
+    token = make_token(groups=["developers", "sre"], autoheal_actions=["cleanup_disk"])
+    principal = auth.resolve_token_principal(token)
+    assert principal.api_key == "jwt:alice"
+    assert principal.is_token
+    assert principal.role == "operator"
+    assert principal.has_permission("execute_actions")
+    assert not principal.has_permission("controller_override")
+    assert principal.allows_action("cleanup_disk")
+    assert not principal.allows_action("restart_service")
+    assert principal.allows_controller("anything")
+
+    resp = client.post(
+        "/webhook", json={"event_type": "cleanup_disk"}, headers=bearer(token)
+    )
+    assert resp.status_code == 200
+    resp = client.post(
+        "/webhook", json={"event_type": "restart_service"}, headers=bearer(token)
+    )
+    assert resp.status_code == 403
+
+
+def test_keys_are_fetched_once_and_verified_locally(issuer):
+    token = make_token(groups="sre")
+    for _ in range(5):
+        assert client.get("/protected", headers=bearer(token)).status_code == 200
+    assert issuer.fetches == 1
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        make_token(groups="sre", exp=int(time.time()) - 3600),
+        make_token(groups="sre", aud="someone-else"),
+        make_token(groups="sre", iss="https://evil.example.com/"),
+        make_token(make_key(), groups="sre"),
+        make_token(groups="marketing"),
+        "not-a-jwt",
+    ],
+    ids=["expired", "audience", "issuer", "signature", "no-role", "garbage"],
+)
+def test_unacceptable_tokens_are_rejected(issuer, token):
+    assert client.get("/protected", headers=bearer(token)).status_code == 401
+
+
+def test_unknown_kid_refetches_for_key_rotation(issuer, monkeypatch):
+    token = make_token(groups="sre")
+    assert client.get("/protected", headers=bearer(token)).status_code == 200
+    rotated = make_key()
+    issuer.keys.append(public_jwk(rotated, "k2"))
+    new_token = make_token(rotated, kid="k2", groups="sre")
+    # Within the minimum refetch interval an unknown kid is just rejected...
+    assert client.get("/protected", headers=bearer(new_token)).status_code == 401
+    assert issuer.fetches == 1
+    # ...after it, the set is refetched and the new key found.
+    monkeypatch.setattr(jwks, "MIN_REFETCH_INTERVAL_SECONDS", 0)
+    pre_auth_guard.reset()  # forget the rejection just recorded
+    assert client.get("/protected", headers=bearer(new_token)).status_code == 200
+    assert issuer.fetches == 2
+
+
+def test_token_rejected_while_the_issuer_is_down_works_once_it_is_back(
+    issuer, monkeypatch
+):
+    token = make_token(groups="sre")
+    real_get = jwks.requests.get
+
+    def down(url, timeout):
+        raise jwks.requests.ConnectionError("connection refused")
+
+    monkeypatch.setattr(jwks.requests, "get", down)
+    assert client.get("/protected", headers=bearer(token)).status_code == 401
+    # Not remembered as a bad token: the outage was ours, not the caller's.
+    monkeypatch.setattr(jwks.requests, "get", real_get)
+    monkeypatch.setattr(jwks, "MIN_REFETCH_INTERVAL_SECONDS", 0)
+    assert client.get("/protected", headers=bearer(token)).status_code == 200
+
+
+def test_keys_are_fetched_off_the_event_loop(issuer, monkeypatch):
+    real_get = jwks.requests.get
+    loops = []
+
+    def get(url, timeout):
+        try:
+            loops.append(asyncio.get_running_loop())
+        except RuntimeError:
+            loops.append(None)
+        return real_get(url, timeout)
+
+    monkeypatch.setattr(jwks.requests, "get", get)
+    token = make_token(groups="sre")
+    assert client.get("/protected", headers=bearer(token)).status_code == 200
+    assert loops == [None]
+
+
+def test_concurrent_fetches_share_one_request(issuer, monkeypatch):
+    real_get = jwks.requests.get
+
+    def slow_get(url, timeout):
+        time.sleep(0.1)
+        return real_get(url, timeout)
+
+    monkeypatch.setattr(jwks.requests, "get", slow_get)
+    cache = jwks.jwks_cache
+    threads = [
+        threading.Thread(target=cache.signing_key, args=(JWKS_URL, "k1"))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert issuer.fetches == 1
+
+
+def test_unreachable_issuer_is_retried_at_most_every_refetch_interval(
+    issuer, monkeypatch
+):
+    attempts = []
+
+    def down(url, timeout):
+        attempts.append(url)
+        raise jwks.requests.ConnectionError("connection refused")
+
+    monkeypatch.setattr(jwks.requests, "get", down)
+    token = make_token(groups="sre")
+    for _ in range(5):
+        assert client.get("/protected", headers=bearer(token)).status_code == 401
+    assert len(attempts) == 1
+
+
+def test_tokens_are_ignored_unless_configured():
+    token = make_token(groups="sre")
+    assert client.get("/protected", headers=bearer(token)).status_code == 401
+
+
+def test_token_requester_is_rechecked_from_recorded_scope(issuer):
+    scope = {"role": "operator", "allowed_actions": None, "allowed_controllers": []}
+    requester = auth.resolve_requester("jwt:alice", scope)
+    assert requester.has_permission("execute_actions")
+    assert not requester.allows_controller("local")
+    assert auth.resolve_requester("jwt:alice", {**scope, "role": "gone"}) is None
+    assert auth.resolve_requester("jwt:alice", None) is None
+    # A static key can't pose as a token identity.
+    assert auth.resolve_principal("jwt:alice") is None
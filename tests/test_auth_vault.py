@@ -9,6 +9,17 @@ from src.vault import VaultUnavailableError
 client = TestClient(app)
 
 
+def _fake_vault_client(monkeypatch):
+    fake_client = MagicMock()
+    # Derived values (the API key index) come from get_secret, like the
+    # real client's.
+    fake_client.get_derived.side_effect = lambda path, derive: derive(
+        fake_client.get_secret(path)
+    )
+    monkeypatch.setattr(auth, "vault_client", fake_client)
+    return fake_client
+
+
 def test_resolve_api_keys_literal_map_unchanged():
     config = {"api_keys": {"admin-key": "admin"}}
     assert auth._resolve_api_keys(config) == {"admin-key": "admin"}
@@ -42,9 +53,8 @@ def test_resolve_api_keys_fails_closed_on_vault_error(monkeypatch):
 
 
 def test_middleware_denies_all_keys_when_vault_backed_and_unreachable(monkeypatch):
-    fake_client = MagicMock()
+    fake_client = _fake_vault_client(monkeypatch)
     fake_client.get_secret.side_effect = VaultUnavailableError("unreachable")
-    monkeypatch.setattr(auth, "vault_client", fake_client)
     monkeypatch.setattr(
         auth,
         "_load_auth_config",
@@ -60,10 +70,27 @@ def test_middleware_denies_all_keys_when_vault_backed_and_unreachable(monkeypatc
     assert resp.status_code == 401
 
 
+def test_key_rejected_during_vault_outage_works_once_vault_recovers(monkeypatch):
+    fake_client = _fake_vault_client(monkeypatch)
+    fake_client.get_secret.side_effect = VaultUnavailableError("unreachable")
+    monkeypatch.setattr(
+        auth,
+        "_load_auth_config",
+        lambda: {
+            "api_keys": {"vault_path": "secret/data/auto-healer/api-keys"},
+            "roles": {"admin": {"permissions": []}},
+        },
+    )
+    assert client.get("/protected", headers={"x-api-key": "k"}).status_code == 401
+    # The outage wasn't remembered as the key being bad.
+    fake_client.get_secret.side_effect = None
+    fake_client.get_secret.return_value = {"k": "admin"}
+    assert client.get("/protected", headers={"x-api-key": "k"}).status_code == 200
+
+
 def test_middleware_accepts_key_resolved_from_vault(monkeypatch):
-    fake_client = MagicMock()
+    fake_client = _fake_vault_client(monkeypatch)
     fake_client.get_secret.return_value = {"vault-issued-key": "admin"}
-    monkeypatch.setattr(auth, "vault_client", fake_client)
     monkeypatch.setattr(
         auth,
         "_load_auth_config",
@@ -81,3 +108,38 @@ def test_middleware_accepts_key_resolved_from_vault(monkeypatch):
     # merge with it.
     resp2 = client.get("/protected", headers={"x-api-key": "admin-key"})
     assert resp2.status_code == 401
+
+
+def test_key_added_in_vault_works_once_the_keys_are_refreshed(monkeypatch, tmp_path):
+    from unittest.mock import patch
+
+    from src.config import ConfigRegistry
+    from src.vault import VaultClient
+
+    (tmp_path / "auth.yaml").write_text(
+        "api_keys: {vault_path: secret/data/api-keys}\n"
+        "roles: {admin: {permissions: []}}\n"
+    )
+    (tmp_path / "controllers.yaml").write_text("controllers: {}\n")
+    (tmp_path / "actions.yaml").write_text("actions: {}\n")
+    registry = ConfigRegistry(str(tmp_path), str(tmp_path), str(tmp_path), dict)
+    monkeypatch.setattr(auth, "config_registry", registry)
+    vault = VaultClient(addr="https://vault", token="t", cache_ttl_seconds=300)
+    monkeypatch.setattr(auth, "vault_client", vault)
+    keys = {"old-key": "admin"}
+    vault_resp = MagicMock(status_code=200)
+    vault_resp.json.side_effect = lambda: {"data": {"data": dict(keys)}}
+
+    def get(key):
+        return client.get("/protected", headers={"x-api-key": key}).status_code
+
+    with patch("requests.get", return_value=vault_resp):
+        assert get("new-key") == 401
+        keys["new-key"] = "admin"
+        # Still the cached key set: negatively cached, not looked up.
+        assert get("new-key") == 401
+        # The next refresh of the keys from Vault...
+        vault.invalidate("secret/data/api-keys")
+        assert get("old-key") == 200
+        # ...lets it be looked up again, before negative_cache_seconds.
+        assert get("new-key") == 200
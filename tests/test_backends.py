@@ -0,0 +1,86 @@
+import subprocess
+import sys
+
+from src.backends import BackendRegistry
+from src.executor import ActionExecutionResult, ActionExecutor
+
+PLUGIN = """
+from src.executor import ActionExecutionResult
+
+
+class EchoBackend:
+    def __init__(self, executor):
+        self.closed = False
+
+    def run(self, controller, action, params, dry_run, controller_name):
+        return ActionExecutionResult(True, f"{controller_name}:{params}", "", 0)
+
+    def close(self):
+        self.closed = True
+"""
+
+
+def _executor_with_plugin(tmp_path, monkeypatch):
+    (tmp_path / "echo_backend.py").write_text(PLUGIN)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    config = tmp_path / "execution.yaml"
+    config.write_text("backends:\n  echo: echo_backend:EchoBackend\n")
+    return ActionExecutor(str(config))
+
+
+def test_importing_the_app_does_not_import_kubernetes():
+    # A fresh interpreter: this one has long since imported it. (Popen,
+    # since conftest.py mocks out subprocess.run.)
+    code = "import sys, src.main; print('kubernetes' in sys.modules)"
+    proc = subprocess.Popen(
+        [sys.executable, "-c", code], stdout=subprocess.PIPE, text=True
+    )
+    stdout, _ = proc.communicate(timeout=60)
+    # (Its last line - startup may log to stdout first.)
+    assert (proc.returncode, stdout.splitlines()[-1]) == (0, "False")
+
+
+def test_backend_is_loaded_on_first_use_and_closed(tmp_path, monkeypatch):
+    executor = _executor_with_plugin(tmp_path, monkeypatch)
+    assert executor.controller_backends.loaded() == {}
+    result = executor.run_on_backend("echo", {}, {}, {"a": 1}, controller_name="e1")
+    assert (result.success, result.stdout) == (True, "e1:{'a': 1}")
+    backend = executor.controller_backend("echo")
+    assert executor.controller_backends.loaded() == {"echo": "EchoBackend"}
+    executor.close()
+    assert backend.closed is True
+
+
+def test_preload_loads_configured_types_only(tmp_path, monkeypatch):
+    executor = _executor_with_plugin(tmp_path, monkeypatch)
+    registry = executor.controller_backends
+    registry.preload(["echo", "ansible", None, "echo"], executor)
+    assert registry.loaded() == {"echo": "EchoBackend"}
+    # One that can't be imported is logged, not raised...
+    registry.register("broken", "no_such_module:Backend")
+    registry.preload(["broken"], executor)
+    # ...and fails the actions sent to it.
+    result = executor.run_on_backend("broken", {}, {})
+    assert isinstance(result, ActionExecutionResult)
+    assert result.success is False
+    assert "could not be loaded" in result.error
+
+
+def test_webhook_dispatches_plugged_in_controller_types(tmp_path, monkeypatch):
+    import src.main as main
+
+    executor = _executor_with_plugin(tmp_path, monkeypatch)
+    monkeypatch.setattr(main, "executor", executor)
+    result = main.execute_action(
+        {"command": "ignored"},
+        "e1",
+        {"type": "echo", "host": "e1.example"},
+        {"x": 1},
+        False,
+    )
+    assert result.stdout == "e1:{'x': 1}"
+
+
+def test_kubeapi_is_a_builtin_backend():
+    assert BackendRegistry().handles("kubeapi")
+    assert not BackendRegistry().handles("ansible")
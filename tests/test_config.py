@@ -0,0 +1,195 @@
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.config import ConfigError, ConfigRegistry, load_config_file
+from src.main import app
+
+AUTH = """
+roles:
+  admin:
+    permissions: [execute_actions]
+api_keys:
+  "k": admin
+"""
+
+CONTROLLERS = """
+controllers:
+  local:
+    type: local
+"""
+
+ACTIONS = """
+actions:
+  cleanup_disk:
+    script: scripts/cleanup_disk.sh
+    default_controller: local
+    parameters:
+      paths: [/tmp]
+"""
+
+
+def write_config(config_dir, auth=AUTH, controllers=CONTROLLERS, actions=ACTIONS):
+    (config_dir / "auth.yaml").write_text(auth)
+    (config_dir / "controllers.yaml").write_text(controllers)
+    (config_dir / "actions.yaml").write_text(actions)
+
+
+def touch_later(path):
+    # Make sure the change is visible even on coarse-mtime filesystems.
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def make_registry(tmp_path, discovered=None):
+    config_dir = tmp_path / "config"
+    config_dir.mkdir(exist_ok=True)
+    if not (config_dir / "auth.yaml").exists():
+        write_config(config_dir)
+    return ConfigRegistry(
+        str(config_dir),
+        str(tmp_path / "playbooks"),
+        str(tmp_path / "scripts"),
+        lambda: dict(discovered or {}),
+    )
+
+
+def test_snapshot_compiles_and_merges_discovered_actions(tmp_path):
+    registry = make_registry(
+        tmp_path,
+        discovered={
+            "cleanup_disk": {"script": "scripts/other.sh"},
+            "extra": {"script": "scripts/extra.sh", "default_controller": "local"},
+        },
+    )
+    snapshot = registry.snapshot()
+    assert snapshot.version == 1
+    assert snapshot.auth["api_keys"] == {"k": "admin"}
+    assert snapshot.controllers["local"] == {"type": "local"}
+    assert snapshot.actions["cleanup_disk"]["script"] == "scripts/cleanup_disk.sh"
+    assert "extra" in snapshot.actions
+    assert registry.snapshot() is snapshot
+
+
+def test_snapshot_is_read_only_but_copies_and_serializes(tmp_path):
+    action = make_registry(tmp_path).snapshot().actions["cleanup_disk"]
+    with pytest.raises(TypeError):
+        action["script"] = "x"
+    with pytest.raises(TypeError):
+        action["parameters"].update(paths=[])
+    params = action["parameters"].copy()
+    params["paths"] = ["/var/tmp"]
+    assert json.loads(json.dumps(action))["parameters"] == {"paths": ["/tmp"]}
+
+
+def test_reload_swaps_snapshot_only_when_files_change(tmp_path):
+    registry = make_registry(tmp_path)
+    first = registry.snapshot()
+    assert registry.reload() is False
+    controllers = tmp_path / "config" / "controllers.yaml"
+    controllers.write_text(CONTROLLERS + "  other:\n    type: local\n")
+    touch_later(controllers)
+    assert registry.reload() is True
+    second = registry.snapshot()
+    assert second.version == 2
+    assert second.checksum != first.checksum
+    assert "other" in second.controllers
+    # The old snapshot is untouched for whoever still holds it.
+    assert "other" not in first.controllers
+
+
+def test_invalid_change_keeps_last_good_snapshot(tmp_path):
+    registry = make_registry(tmp_path)
+    good = registry.snapshot()
+    auth = tmp_path / "config" / "auth.yaml"
+    auth.write_text("roles: [not, a, mapping]\napi_keys: {}\n")
+    touch_later(auth)
+    assert registry.reload() is False
+    assert registry.snapshot() is good
+
+
+def test_restart_only_config_change_is_warned_about_not_loaded(tmp_path, caplog):
+    registry = make_registry(tmp_path)
+    execution = tmp_path / "config" / "execution.yaml"
+    execution.write_text("pool:\n  max_workers: 4\n")
+    first = registry.snapshot()
+    execution.write_text("pool:\n  max_workers: 8\n")
+    touch_later(execution)
+    with caplog.at_level("WARNING", logger="autoheal.config"):
+        assert registry.reload() is False
+        assert registry.reload() is False
+    assert registry.snapshot() is first
+    warnings = [r.getMessage() for r in caplog.records]
+    assert len(warnings) == 1
+    assert "execution.yaml changed" in warnings[0]
+    assert "next restart" in warnings[0]
+
+
+def test_first_load_fails_loudly(tmp_path):
+    config_dir = tmp_path / "config"
+    config_dir.mkdir()
+    write_config(config_dir, controllers="controllers:\n  local: not-a-mapping\n")
+    with pytest.raises(ConfigError):
+        make_registry(tmp_path).snapshot()
+
+
+def test_controller_groups_are_validated(tmp_path):
+    config_dir = tmp_path / "config"
+    config_dir.mkdir()
+    grouped = CONTROLLERS + "controller_groups:\n  everywhere: [local]\n"
+    write_config(config_dir, controllers=grouped)
+    assert make_registry(tmp_path).snapshot().controller_groups == {
+        "everywhere": ("local",)
+    }
+    for bad in ("  everywhere: [local, dc9]\n", "  local: [local]\n", "  none: []\n"):
+        write_config(config_dir, controllers=CONTROLLERS + "controller_groups:\n" + bad)
+        with pytest.raises(ConfigError):
+            make_registry(tmp_path).snapshot()
+
+
+def test_configmap_symlink_swap_is_detected(tmp_path):
+    # The layout kubelet maintains for a ConfigMap volume: each file is a
+    # symlink through `..data`, which is atomically repointed on update.
+    config_dir = tmp_path / "config"
+    config_dir.mkdir()
+    first = tmp_path / "config" / "..2024_01_01"
+    first.mkdir()
+    write_config(first)
+    os.symlink(first.name, config_dir / "..data")
+    for name in ("auth.yaml", "controllers.yaml", "actions.yaml"):
+        os.symlink(f"..data/{name}", config_dir / name)
+    registry = make_registry(tmp_path)
+    assert "other" not in registry.snapshot().controllers
+
+    second = tmp_path / "config" / "..2024_01_02"
+    second.mkdir()
+    write_config(second, controllers=CONTROLLERS + "  other:\n    type: local\n")
+    os.symlink(second.name, config_dir / "..data_tmp")
+    os.replace(config_dir / "..data_tmp", config_dir / "..data")
+    assert registry.reload() is True
+    assert "other" in registry.snapshot().controllers
+
+
+def test_config_version_endpoint():
+    client = TestClient(app)
+    resp = client.get("/config/version", headers={"x-api-key": "admin-key"})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["version"] >= 1
+    assert len(body["checksum"]) == 16
+    assert client.get("/config/version").status_code == 401
+
+
+def test_load_config_file_falls_back_to_defaults(tmp_path):
+    path = tmp_path / "execution.yaml"
+    assert load_config_file(str(path), "execution config") == {}
+    assert load_config_file(None, "execution config") == {}
+    path.write_text("pool:\n  max_workers: 2\n")
+    assert load_config_file(str(path), "execution config") == {
+        "pool": {"max_workers": 2}
+    }
+    for broken in ("pool: [unclosed\n", "- just\n- a list\n"):
+        path.write_text(broken)
+        assert load_config_file(str(path), "execution config") == {}
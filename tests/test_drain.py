@@ -0,0 +1,222 @@
+import asyncio
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+import src.main as main
+from src.drain import ShutdownDrain
+from src.main import app
+from src.pool import ExecutionPool
+from src.singleflight import SingleFlight
+
+client = TestClient(app)
+
+
+def get_headers(api_key="admin-key"):
+    return {"x-api-key": api_key}
+
+
+def draining(monkeypatch):
+    drain = ShutdownDrain()
+    drain.begin()
+    monkeypatch.setattr(main, "shutdown_drain", drain)
+
+
+def test_ready_goes_false_while_draining(monkeypatch):
+    draining(monkeypatch)
+    resp = client.get("/ready")
+    assert resp.status_code == 503
+    assert resp.json()["status"] == "draining"
+    assert client.get("/live").status_code == 200
+
+
+def test_new_work_is_refused_while_draining(monkeypatch):
+    draining(monkeypatch)
+    resp = client.post(
+        "/webhook", json={"event_type": "cleanup_disk"}, headers=get_headers()
+    )
+    assert resp.status_code == 503
+    assert resp.headers["retry-after"] == "5"
+    batch = client.post(
+        "/webhook/batch", json=[{"event_type": "cleanup_disk"}], headers=get_headers()
+    )
+    assert batch.status_code == 503
+
+
+def test_begin_is_idempotent():
+    drain = ShutdownDrain()
+    assert drain.begin() is True
+    assert drain.begin() is False
+    assert drain.draining
+
+
+def test_drain_audits_unfinished_jobs_as_interrupted(tmp_path, monkeypatch):
+    config_path = tmp_path / "execution.yaml"
+    config_path.write_text("pool:\n  max_workers: 1\n  shutdown_grace_seconds: 0.1\n")
+    pool = ExecutionPool(str(config_path))
+    monkeypatch.setattr(main, "execution_pool", pool)
+    monkeypatch.setattr(main, "shutdown_drain", ShutdownDrain())
+    # The queued execution is never started, so never completes either.
+    monkeypatch.setattr(main, "single_flight", SingleFlight())
+    audited = []
+    monkeypatch.setattr(main, "write_audit_logs", audited.extend)
+
+    release = threading.Event()
+    started = threading.Event()
+    real_run_script = main.executor.run_script
+
+    def slow_script(*args, **kwargs):
+        started.set()
+        release.wait(5)
+        return real_run_script(*args, **kwargs)
+
+    monkeypatch.setattr("src.main.executor.run_script", slow_script)
+
+    running = client.post(
+        "/webhook",
+        json={"event_type": "cleanup_disk", "async_mode": True},
+        headers=get_headers(),
+    ).json()["job_id"]
+    assert started.wait(5)
+    # Only one worker, so this one never leaves the queue.
+    queued = client.post(
+        "/webhook",
+        json={"event_type": "health_check", "async_mode": True},
+        headers=get_headers(),
+    ).json()["job_id"]
+
+    try:
+        asyncio.run(main.drain_executions())
+    finally:
+        release.set()
+
+    assert [e["job_id"] for e in audited] == [running, queued]
+    for entry in audited:
+        assert entry["interrupted"] is True
+        assert entry["user"] == "admin-key"
+        assert entry["execution"] == {
+            "success": False,
+            "error": main.INTERRUPTED_ERROR,
+        }
+    job = main.job_store.get(queued)
+    assert job["status"] == "failed"
+    assert job["interrupted"] is True
+
+
+def test_drain_writes_nothing_when_everything_finished(tmp_path, monkeypatch):
+    pool = ExecutionPool(str(tmp_path / "missing.yaml"))
+    monkeypatch.setattr(main, "execution_pool", pool)
+    monkeypatch.setattr(main, "shutdown_drain", ShutdownDrain())
+
+    def unexpected(entries):
+        raise AssertionError(f"nothing was interrupted: {entries}")
+
+    monkeypatch.setattr(main, "write_audit_logs", unexpected)
+    resp = client.post(
+        "/webhook", json={"event_type": "health_check"}, headers=get_headers()
+    )
+    assert resp.status_code == 200
+    started = time.monotonic()
+    asyncio.run(main.drain_executions())
+    assert time.monotonic() - started < 1
+
+
+def test_work_arriving_as_the_pool_closes_is_refused_and_accounted_for(
+    tmp_path, monkeypatch
+):
+    monkeypatch.setattr(main, "approval_queue", [])
+    monkeypatch.setattr(main, "APPROVALS_STATE_PATH", str(tmp_path / "a.json"))
+    approval_id = client.post(
+        "/webhook",
+        json={"event_type": "cleanup_disk", "approval_required": True},
+        headers=get_headers(),
+    ).json()["approval_id"]
+    # Closed just after the draining check let these requests in.
+    pool = ExecutionPool(str(tmp_path / "missing.yaml"))
+    pool.drain(0)
+    monkeypatch.setattr(main, "execution_pool", pool)
+    audited = []
+    monkeypatch.setattr(main, "write_audit_logs", audited.extend)
+
+    resp = client.post(
+        "/webhook", json={"event_type": "cleanup_disk"}, headers=get_headers()
+    )
+    assert resp.status_code == 503
+    resp = client.post(
+        "/webhook",
+        json={
+            "event_type": "cleanup_disk",
+            "controllers": ["dc1-ansible", "dc2-ansible"],
+        },
+        headers=get_headers(),
+    )
+    assert [r["status_code"] for r in resp.json()["results"]] == [503, 503]
+
+    resp = client.post(
+        "/webhook",
+        json={"event_type": "cleanup_disk", "async_mode": True},
+        headers=get_headers(),
+    )
+    assert resp.status_code == 503
+    [job] = main.job_store.list()
+    assert job["status"] == "failed"
+
+    # The approval wasn't consumed: it can be approved once we're back.
+    resp = client.post(
+        f"/approvals/{approval_id}/approve", headers=get_headers("operator-key")
+    )
+    assert resp.status_code == 503
+    [entry] = main.approval_queue
+    assert entry["status"] == "pending"
+    assert "approved_by" not in entry
+
+    # The batch still answers for, and audits, the events it did handle.
+    deployment = {"event_type": "restart_deployment", "parameters": {"deployment": "w"}}
+    resp = client.post("/webhook/batch", json=[deployment] * 2, headers=get_headers())
+    assert [r["status_code"] for r in resp.json()["results"]] == [503, 409]
+    assert [e["execution"]["success"] for e in audited] == [False]
+
+
+def test_request_still_queued_at_the_deadline_gets_503_and_one_audit_entry(
+    tmp_path, monkeypatch
+):
+    config_path = tmp_path / "execution.yaml"
+    config_path.write_text("pool:\n  max_workers: 1\n  shutdown_grace_seconds: 0.1\n")
+    pool = ExecutionPool(str(config_path))
+    monkeypatch.setattr(main, "execution_pool", pool)
+    monkeypatch.setattr(main, "shutdown_drain", ShutdownDrain())
+    audited = []
+    monkeypatch.setattr(main, "write_audit_logs", audited.extend)
+    release = threading.Event()
+    monkeypatch.setattr(
+        "src.main.executor.run_script", lambda *args, **kwargs: release.wait(5)
+    )
+    client.post(
+        "/webhook",
+        json={"event_type": "cleanup_disk", "async_mode": True},
+        headers=get_headers(),
+    )
+    responses = []
+    waiter = threading.Thread(
+        target=lambda: responses.append(
+            client.post(
+                "/webhook", json={"event_type": "health_check"}, headers=get_headers()
+            )
+        )
+    )
+    waiter.start()
+    while pool.stats()["queued"] == 0:
+        time.sleep(0.01)
+
+    try:
+        asyncio.run(main.drain_executions())
+    finally:
+        release.set()
+    waiter.join(5)
+
+    assert responses[0].status_code == 503
+    assert [(e["action"], e["interrupted"]) for e in audited] == [
+        ("cleanup_disk", True),
+        ("health_check", True),
+    ]
@@ -1,10 +1,16 @@
+import json
 import os
 import sys
+import threading
+import time
 from unittest.mock import patch, MagicMock
 
 import pytest
 
+import src.executor as executor_module
 from src.executor import ActionExecutor
+from src.process import output_sink
+from src.retry import KUBE_THROTTLED, SSH_CONNECTION
 from src.vault import VaultUnavailableError
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -280,6 +286,147 @@ def test_run_remote_dry_run():
     assert "oc rollout restart deployment/web" in result.stdout
 
 
+def _multiplexed_executor(tmp_path, monkeypatch, returncodes=None):
+    """
+    An executor with ssh.multiplex on, and subprocess.run answering ssh
+    control commands (-O check / -O exit), master starts (ControlMaster=
+    yes) and action sessions from `returncodes` by kind.
+    """
+    config = tmp_path / "execution.yaml"
+    config.write_text(
+        "ssh:\n  multiplex: true\n  health_check_seconds: 60\n"
+        f"  control_dir: {tmp_path / 'ssh'}\n"
+    )
+    codes = {"check": 0, "exit": 0, "master": 0, "session": 0, **(returncodes or {})}
+    calls = []
+
+    def fake_run(cmd, **kwargs):
+        if "-O" in cmd:
+            kind = cmd[cmd.index("-O") + 1]
+        elif "ControlMaster=yes" in cmd:
+            kind = "master"
+        else:
+            kind = "session"
+        calls.append((kind, cmd))
+        return MagicMock(returncode=codes[kind], stdout="ok", stderr="")
+
+    monkeypatch.setattr("subprocess.run", fake_run)
+    return ActionExecutor(str(config)), calls
+
+
+def test_run_remote_reuses_one_master_connection(tmp_path, monkeypatch):
+    executor, calls = _multiplexed_executor(tmp_path, monkeypatch)
+    for _ in range(3):
+        result = executor.run_remote(
+            ANSIBLE_CONTROLLER, {"script": "scripts/health_check.sh"}, {}
+        )
+        assert result.success is True
+    kinds = [kind for kind, _ in calls]
+    assert kinds == ["master", "session", "session", "session"]
+    master_cmd = calls[0][1]
+    assert "-i" in master_cmd and "ControlPersist=300" in master_cmd
+    session_cmd = calls[1][1]
+    control_path = [o for o in master_cmd if o.startswith("ControlPath=")][0]
+    assert control_path in session_cmd and "ControlMaster=no" in session_cmd
+    assert session_cmd[-2:] == [
+        "ansible@ansible.dc1.example.com",
+        "scripts/health_check.sh",
+    ]
+    assert executor.ssh_mux.stats() == {"masters": 1, "started": 1, "reused": 2}
+
+    executor.close()
+    assert calls[-1][0] == "exit"
+    assert executor.ssh_mux.stats()["masters"] == 0
+
+
+def test_vault_key_only_fetched_to_start_the_master(tmp_path, monkeypatch):
+    executor, calls = _multiplexed_executor(tmp_path, monkeypatch)
+    fake_client = MagicMock()
+    fake_client.get_secret.return_value = {"private_key": "keydata"}
+    monkeypatch.setattr("src.vault.vault_client", fake_client)
+    key_files = []
+    real_start = executor.ssh_mux._start
+
+    def recording_start(path, destination, options, resolve_key):
+        def resolve():
+            resolved = resolve_key()
+            key_files.append(resolved[0])
+            return resolved
+
+        return real_start(path, destination, options, resolve)
+
+    monkeypatch.setattr(executor.ssh_mux, "_start", recording_start)
+    for _ in range(2):
+        executor.run_remote(VAULT_CONTROLLER, {"script": "scripts/x.sh"}, {})
+    assert fake_client.get_secret.call_count == 1
+    # Deleted once the master authenticated; sessions don't need it.
+    assert len(key_files) == 1 and not os.path.exists(key_files[0])
+    assert all("-i" not in cmd for kind, cmd in calls if kind == "session")
+
+
+def test_dead_master_is_replaced(tmp_path, monkeypatch):
+    executor, calls = _multiplexed_executor(
+        tmp_path, monkeypatch, returncodes={"check": 255}
+    )
+    executor.ssh_mux.health_check_seconds = 0
+    for _ in range(2):
+        executor.run_remote(ANSIBLE_CONTROLLER, {"script": "scripts/x.sh"}, {})
+    kinds = [kind for kind, _ in calls]
+    assert kinds == ["master", "session", "check", "master", "session"]
+
+
+def test_master_failure_falls_back_to_direct_ssh(tmp_path, monkeypatch):
+    executor, calls = _multiplexed_executor(
+        tmp_path, monkeypatch, returncodes={"master": 1}
+    )
+    result = executor.run_remote(ANSIBLE_CONTROLLER, {"script": "scripts/x.sh"}, {})
+    assert result.success is True
+    direct = calls[-1][1]
+    assert not any(o.startswith("ControlPath=") for o in direct)
+    assert direct[-2] == "ansible@ansible.dc1.example.com"
+
+
+def test_failed_master_is_not_retried_and_its_key_is_reused(tmp_path, monkeypatch):
+    executor, calls = _multiplexed_executor(
+        tmp_path, monkeypatch, returncodes={"master": 1}
+    )
+    fake_client = MagicMock()
+    fake_client.get_secret.return_value = {"private_key": "keydata"}
+    monkeypatch.setattr("src.vault.vault_client", fake_client)
+    for _ in range(2):
+        result = executor.run_remote(VAULT_CONTROLLER, {"script": "scripts/x.sh"}, {})
+        assert result.success is True
+    # One master attempt; each call fetched its key once, for both.
+    assert [kind for kind, _ in calls] == ["master", "session", "session"]
+    assert fake_client.get_secret.call_count == 2
+    key_file = calls[0][1][calls[0][1].index("-i") + 1]
+    assert calls[1][1][calls[1][1].index("-i") + 1] == key_file
+    assert not os.path.exists(key_file)
+
+
+def test_master_connect_failure_is_retryable_and_not_sent_directly(
+    tmp_path, monkeypatch
+):
+    executor, calls = _multiplexed_executor(
+        tmp_path, monkeypatch, returncodes={"master": 255}
+    )
+    result = executor.run_remote(ANSIBLE_CONTROLLER, {"script": "scripts/x.sh"}, {})
+    assert (result.success, result.error_class) == (False, SSH_CONNECTION)
+    # The command was never sent anywhere, and the next call tries a
+    # master again.
+    executor.run_remote(ANSIBLE_CONTROLLER, {"script": "scripts/x.sh"}, {})
+    assert [kind for kind, _ in calls] == ["master", "master"]
+
+
+def test_session_exit_255_is_not_retryable(tmp_path, monkeypatch):
+    executor, _ = _multiplexed_executor(
+        tmp_path, monkeypatch, returncodes={"session": 255}
+    )
+    result = executor.run_remote(ANSIBLE_CONTROLLER, {"script": "scripts/x.sh"}, {})
+    assert result.exit_code == 255
+    assert result.error_class is None
+
+
 def test_run_command_local_success():
     executor = ActionExecutor()
     with patch("subprocess.run") as mock_run:
@@ -473,6 +620,9 @@ def test_run_remote_dry_run_never_touches_vault(monkeypatch):
 import kubernetes  # noqa: E402
 from kubernetes.client.exceptions import ApiException  # noqa: E402
 
+import src.kubeapi as kubeapi_module  # noqa: E402
+from src.kubeapi import KubeAPIBackend  # noqa: E402
+
 IN_CLUSTER_CONTROLLER = {"type": "kubeapi", "in_cluster": True}
 
 
@@ -494,8 +644,7 @@ def make_pod(name, namespace="default", daemonset_owned=False):
 
 
 def test_render_kube_action_fields_substitutes_params():
-    executor = ActionExecutor()
-    rendered = executor._render_kube_action_fields(
+    rendered = KubeAPIBackend._render_kube_action_fields(
         {
             "resource": "deployment",
             "name": "{deployment}",
@@ -513,9 +662,8 @@ def test_render_kube_action_fields_substitutes_params():
 
 
 def test_render_kube_action_fields_missing_param_raises():
-    executor = ActionExecutor()
     with pytest.raises(KeyError):
-        executor._render_kube_action_fields({"name": "{deployment}"}, {})
+        KubeAPIBackend._render_kube_action_fields({"name": "{deployment}"}, {})
 
 
 def test_run_kube_action_unknown_verb():
@@ -575,9 +723,9 @@ def test_build_kube_configuration_in_cluster(monkeypatch):
         "load_incluster_config",
         lambda client_configuration=None: calls.setdefault("cfg", client_configuration),
     )
-    configuration, cleanup_paths = executor._build_kube_configuration(
-        {"type": "kubeapi", "in_cluster": True}
-    )
+    configuration, cleanup_paths = executor.controller_backend(
+        "kubeapi"
+    )._build_kube_configuration({"type": "kubeapi", "in_cluster": True})
     assert cleanup_paths == []
     assert calls["cfg"] is configuration
 
@@ -589,7 +737,9 @@ def test_build_kube_configuration_token_and_ca(tmp_path):
     ca_file = tmp_path / "ca.crt"
     ca_file.write_text("-----BEGIN CERTIFICATE-----\n...")
 
-    configuration, cleanup_paths = executor._build_kube_configuration(
+    configuration, cleanup_paths = executor.controller_backend(
+        "kubeapi"
+    )._build_kube_configuration(
         {
             "type": "kubeapi",
             "api_server": "https://api.example.com:6443",
@@ -608,7 +758,7 @@ def test_build_kube_configuration_token_without_ca_disables_verify(tmp_path):
     token_file = tmp_path / "token"
     token_file.write_text("my-token")
 
-    configuration, _ = executor._build_kube_configuration(
+    configuration, _ = executor.controller_backend("kubeapi")._build_kube_configuration(
         {
             "type": "kubeapi",
             "api_server": "https://api.example.com:6443",
@@ -624,7 +774,9 @@ def test_build_kube_configuration_from_vault(monkeypatch):
     fake_client.get_secret.return_value = {"token": "vault-token", "ca_cert": "ca-data"}
     monkeypatch.setattr("src.vault.vault_client", fake_client)
 
-    configuration, cleanup_paths = executor._build_kube_configuration(
+    configuration, cleanup_paths = executor.controller_backend(
+        "kubeapi"
+    )._build_kube_configuration(
         {
             "type": "kubeapi",
             "api_server": "https://api.example.com:6443",
@@ -669,7 +821,7 @@ def test_build_kube_configuration_partial_vault_failure_cleans_up(monkeypatch):
 
     before = snapshot()
     with pytest.raises(VaultUnavailableError):
-        executor._build_kube_configuration(
+        executor.controller_backend("kubeapi")._build_kube_configuration(
             {
                 "type": "kubeapi",
                 "api_server": "https://api.example.com:6443",
@@ -685,7 +837,9 @@ def test_build_kube_configuration_partial_vault_failure_cleans_up(monkeypatch):
 def test_build_kube_configuration_no_credentials_raises():
     executor = ActionExecutor()
     with pytest.raises(ValueError):
-        executor._build_kube_configuration({"type": "kubeapi"})
+        executor.controller_backend("kubeapi")._build_kube_configuration(
+            {"type": "kubeapi"}
+        )
 
 
 def test_run_kube_action_no_credentials_returns_failure():
@@ -928,8 +1082,19 @@ def test_run_kube_action_drain_node_skips_daemonset_pods_and_evicts_rest(monkeyp
     assert evicted_names == {"web-1", "web-2"}
 
 
-def test_run_kube_action_drain_node_reports_eviction_failures(monkeypatch):
-    executor = ActionExecutor()
+def _drain_executor(tmp_path, timeout_seconds=5, concurrency=10):
+    config = tmp_path / "execution.yaml"
+    config.write_text(
+        f"executor:\n  drain_concurrency: {concurrency}\n"
+        f"  drain_timeout_seconds: {timeout_seconds}\n"
+    )
+    return ActionExecutor(str(config))
+
+
+def test_run_kube_action_drain_node_reports_eviction_failures(monkeypatch, tmp_path):
+    # A PDB that never relents: retried until the deadline, then failed.
+    executor = _drain_executor(tmp_path, timeout_seconds=0.2)
+    monkeypatch.setattr(kubeapi_module, "DRAIN_RETRY_INITIAL_BACKOFF_SECONDS", 0.01)
     _patch_incluster(monkeypatch)
     mock_core = MagicMock()
     mock_core.list_pod_for_all_namespaces.return_value = MagicMock(
@@ -946,6 +1111,313 @@ def test_run_kube_action_drain_node_reports_eviction_failures(monkeypatch):
         )
     assert result.success is False
     assert "could not be evicted" in result.error
+    assert mock_core.create_namespaced_pod_eviction.call_count > 1
+    failed = json.loads(result.stdout)["failed"]
+    assert failed[0]["pod"] == "web-1"
+    assert "drain deadline" in failed[0]["error"]
+
+
+def test_drain_node_retries_pdb_refusals_until_evicted(monkeypatch, tmp_path):
+    executor = _drain_executor(tmp_path)
+    monkeypatch.setattr(kubeapi_module, "DRAIN_RETRY_INITIAL_BACKOFF_SECONDS", 0.01)
+    _patch_incluster(monkeypatch)
+    mock_core = MagicMock()
+    mock_core.list_pod_for_all_namespaces.return_value = MagicMock(
+        items=[make_pod("web-1"), make_pod("web-2"), make_pod("db-0")]
+    )
+    refusals = {"web-2": 2}
+
+    def evict(name, namespace, body):
+        if refusals.get(name):
+            refusals[name] -= 1
+            raise ApiException(status=429, reason="Too Many Requests")
+        if name == "db-0":
+            raise ApiException(status=403, reason="Forbidden")
+
+    mock_core.create_namespaced_pod_eviction.side_effect = evict
+    with patch("kubernetes.client.CoreV1Api", return_value=mock_core):
+        result = executor.run_kube_action(
+            IN_CLUSTER_CONTROLLER,
+            {"kube_action": "drain_node", "node_name": "{node}"},
+            {"node": "node-1"},
+        )
+    summary = json.loads(result.stdout)
+    assert summary["evicted"] == ["web-1", "web-2"]
+    # Anything but a PDB refusal isn't retried.
+    assert summary["failed"] == [{"pod": "db-0", "error": "Forbidden"}]
+    assert mock_core.create_namespaced_pod_eviction.call_count == 5
+
+
+def test_drain_node_evicts_concurrently_up_to_the_limit(monkeypatch, tmp_path):
+    executor = _drain_executor(tmp_path, concurrency=4)
+    _patch_incluster(monkeypatch)
+    mock_core = MagicMock()
+    mock_core.list_pod_for_all_namespaces.return_value = MagicMock(
+        items=[make_pod(f"web-{i}") for i in range(12)]
+    )
+    lock = threading.Lock()
+    active = [0, 0]  # current, peak
+
+    def evict(name, namespace, body):
+        with lock:
+            active[0] += 1
+            active[1] = max(active[1], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+
+    mock_core.create_namespaced_pod_eviction.side_effect = evict
+    with patch("kubernetes.client.CoreV1Api", return_value=mock_core):
+        result = executor.run_kube_action(
+            IN_CLUSTER_CONTROLLER,
+            {"kube_action": "drain_node", "node_name": "{node}"},
+            {"node": "node-1"},
+        )
+    assert result.success is True
+    assert json.loads(result.stdout)["evicted"] == [f"web-{i}" for i in range(12)]
+    assert 1 < active[1] <= 4
+
+
+class FakeWatch:
+    """Stands in for kubernetes.watch.Watch: plays back canned events."""
+
+    def __init__(self, events):
+        self.events = events
+        self.calls = []
+
+    def __call__(self):
+        return self
+
+    def stream(self, list_fn, *args, **kwargs):
+        self.calls.append(kwargs)
+        yield from self.events
+        self.events = []
+
+    def stop(self):
+        pass
+
+
+def make_deployment(generation, replicas=2, updated=2, available=2, total=2):
+    return kubernetes.client.V1Deployment(
+        metadata=kubernetes.client.V1ObjectMeta(
+            name="web", uid="d-1", generation=generation, resource_version="7"
+        ),
+        spec=kubernetes.client.V1DeploymentSpec(
+            replicas=replicas,
+            selector=kubernetes.client.V1LabelSelector(),
+            template=kubernetes.client.V1PodTemplateSpec(),
+        ),
+        status=kubernetes.client.V1DeploymentStatus(
+            observed_generation=generation,
+            replicas=total,
+            updated_replicas=updated,
+            available_replicas=available,
+        ),
+    )
+
+
+WAIT_FOR_RESTART = {
+    "kube_action": "rollout_restart",
+    "resource": "deployment",
+    "name": "web",
+    "namespace": "prod",
+    "wait": True,
+}
+
+
+def test_rollout_restart_wait_follows_rollout_until_converged(monkeypatch):
+    executor = ActionExecutor()
+    _patch_incluster(monkeypatch)
+    mock_apps = MagicMock()
+    mock_apps.patch_namespaced_deployment.return_value = make_deployment(4)
+    # The listed state is from before the restart was picked up...
+    mock_apps.list_namespaced_deployment.return_value = MagicMock(
+        items=[make_deployment(3)], metadata=MagicMock(resource_version="6")
+    )
+    # ...then the watch reports the new ReplicaSet rolling out.
+    watch = FakeWatch(
+        [
+            {"type": "MODIFIED", "object": make_deployment(4, updated=1, total=3)},
+            {"type": "MODIFIED", "object": make_deployment(4, available=1)},
+            {"type": "MODIFIED", "object": make_deployment(4)},
+        ]
+    )
+    with patch("kubernetes.client.AppsV1Api", return_value=mock_apps), patch(
+        "kubernetes.watch.Watch", watch
+    ), patch.object(kubeapi_module, "release_slot") as released:
+        result = executor.run_kube_action(IN_CLUSTER_CONTROLLER, WAIT_FOR_RESTART)
+    assert result.success is True
+    summary = json.loads(result.stdout)
+    assert summary["converged"] is True
+    assert summary["converged_seconds"] >= 0
+    assert watch.calls[0]["resource_version"] == "6"
+    assert watch.calls[0]["field_selector"] == "metadata.name=web"
+    released.assert_called_once()
+
+
+def test_rollout_restart_wait_times_out(monkeypatch):
+    executor = ActionExecutor()
+    _patch_incluster(monkeypatch)
+    mock_apps = MagicMock()
+    mock_apps.patch_namespaced_deployment.return_value = make_deployment(4)
+    mock_apps.list_namespaced_deployment.return_value = MagicMock(
+        items=[make_deployment(4, available=1)],
+        metadata=MagicMock(resource_version="6"),
+    )
+    with patch("kubernetes.client.AppsV1Api", return_value=mock_apps), patch(
+        "kubernetes.watch.Watch", FakeWatch([])
+    ):
+        result = executor.run_kube_action(
+            IN_CLUSTER_CONTROLLER, {**WAIT_FOR_RESTART, "wait_timeout_seconds": 0.05}
+        )
+    assert result.success is False
+    assert "Timed out" in result.error
+    summary = json.loads(result.stdout)
+    assert summary["converged"] is False
+    assert summary["converged_seconds"] is None
+
+
+def test_drain_node_wait_until_evicted_pods_are_gone(monkeypatch, tmp_path):
+    executor = _drain_executor(tmp_path)
+    _patch_incluster(monkeypatch)
+    pods = [make_pod("web-1"), make_pod("web-2")]
+    for i, pod in enumerate(pods):
+        pod.metadata.uid = f"uid-{i}"
+    mock_core = MagicMock()
+    mock_core.list_pod_for_all_namespaces.return_value = MagicMock(
+        items=pods, metadata=MagicMock(resource_version="10")
+    )
+    watch = FakeWatch(
+        [
+            {"type": "MODIFIED", "object": pods[0]},
+            {"type": "DELETED", "object": pods[0]},
+            {"type": "DELETED", "object": pods[1]},
+        ]
+    )
+    with patch("kubernetes.client.CoreV1Api", return_value=mock_core), patch(
+        "kubernetes.watch.Watch", watch
+    ):
+        result = executor.run_kube_action(
+            IN_CLUSTER_CONTROLLER,
+            {"kube_action": "drain_node", "node_name": "node-1", "wait": True},
+        )
+    assert result.success is True
+    summary = json.loads(result.stdout)
+    assert summary["evicted"] == ["web-1", "web-2"]
+    assert summary["converged"] is True
+    assert watch.calls[0]["field_selector"] == "spec.nodeName=node-1"
+
+
+def test_delete_pod_by_label_selector_fans_out_over_one_list(monkeypatch):
+    executor = ActionExecutor()
+    _patch_incluster(monkeypatch)
+    mock_core = MagicMock()
+    mock_core.list_namespaced_pod.return_value = MagicMock(
+        items=[make_pod(f"web-{i}", namespace="prod") for i in range(3)]
+    )
+    with patch("kubernetes.client.CoreV1Api", return_value=mock_core):
+        result = executor.run_kube_action(
+            IN_CLUSTER_CONTROLLER,
+            {
+                "kube_action": "delete_pod",
+                "namespace": "{namespace}",
+                "label_selector": "app={app}",
+                "field_selector": "status.phase=Running",
+            },
+            {"namespace": "prod", "app": "web"},
+        )
+    assert result.success is True
+    mock_core.list_namespaced_pod.assert_called_once_with(
+        "prod", label_selector="app=web", field_selector="status.phase=Running"
+    )
+    deleted = {c.args for c in mock_core.delete_namespaced_pod.call_args_list}
+    assert deleted == {("web-0", "prod"), ("web-1", "prod"), ("web-2", "prod")}
+    summary = json.loads(result.stdout)
+    assert (summary["matched"], summary["succeeded"], summary["failed"]) == (3, 3, 0)
+    assert [t["target"] for t in summary["targets"]] == [
+        "prod/web-0",
+        "prod/web-1",
+        "prod/web-2",
+    ]
+
+
+def test_selector_matching_more_than_max_targets_changes_nothing(monkeypatch):
+    executor = ActionExecutor()
+    _patch_incluster(monkeypatch)
+    mock_core = MagicMock()
+    mock_core.list_pod_for_all_namespaces.return_value = MagicMock(
+        items=[make_pod(f"web-{i}") for i in range(4)]
+    )
+    with patch("kubernetes.client.CoreV1Api", return_value=mock_core):
+        result = executor.run_kube_action(
+            IN_CLUSTER_CONTROLLER,
+            {
+                "kube_action": "delete_pod",
+                "label_selector": "app=web",
+                "max_targets": 3,
+            },
+        )
+    assert result.success is False
+    assert "more than max_targets (3)" in result.error
+    mock_core.delete_namespaced_pod.assert_not_called()
+
+
+def test_selector_fan_out_reports_each_target(monkeypatch):
+    executor = ActionExecutor()
+    _patch_incluster(monkeypatch)
+    mock_apps = MagicMock()
+    mock_apps.list_deployment_for_all_namespaces.return_value = MagicMock(
+        items=[
+            MagicMock(
+                metadata=kubernetes.client.V1ObjectMeta(name="ingress", namespace=ns)
+            )
+            for ns in ("dc1", "dc2")
+        ]
+    )
+
+    def patch_deployment(name, namespace, body):
+        if namespace == "dc2":
+            raise ApiException(status=403, reason="Forbidden")
+
+    mock_apps.patch_namespaced_deployment.side_effect = patch_deployment
+    with patch("kubernetes.client.AppsV1Api", return_value=mock_apps):
+        result = executor.run_kube_action(
+            IN_CLUSTER_CONTROLLER,
+            {
+                "kube_action": "rollout_restart",
+                "resource": "deployment",
+                "label_selector": "app=ingress",
+            },
+        )
+    assert result.success is False
+    assert result.error == "rollout_restart failed for 1 of 2 matching object(s)"
+    targets = json.loads(result.stdout)["targets"]
+    assert targets[0]["target"] == "dc1/ingress"
+    assert targets[0]["success"] is True
+    assert targets[0]["result"]["namespace"] == "dc1"
+    assert targets[1] == {
+        "target": "dc2/ingress",
+        "success": False,
+        "error": "Forbidden",
+    }
+
+
+def test_selector_and_name_are_mutually_exclusive():
+    executor = ActionExecutor()
+    result = executor.run_kube_action(
+        IN_CLUSTER_CONTROLLER,
+        {"kube_action": "cordon_node", "node_name": "n1", "label_selector": "a=b"},
+    )
+    assert result.success is False
+    assert "not both" in result.error
+    dry_run = executor.run_kube_action(
+        IN_CLUSTER_CONTROLLER,
+        {"kube_action": "cordon_node", "label_selector": "pool=gpu"},
+        dry_run=True,
+    )
+    assert "cordon_node every node matching label_selector='pool=gpu'" in (
+        dry_run.stdout
+    )
 
 
 def test_run_kube_action_api_exception_maps_to_failure(monkeypatch):
@@ -969,3 +1441,264 @@ def test_run_kube_action_api_exception_maps_to_failure(monkeypatch):
     assert result.success is False
     assert result.exit_code == 404
     assert "Not Found" in result.error
+    assert result.error_class is None
+
+
+def test_kube_throttling_is_only_retryable_before_anything_changed(monkeypatch):
+    executor = ActionExecutor()
+    _patch_incluster(monkeypatch)
+    throttled = ApiException(status=429, reason="Too Many Requests")
+    mock_core = MagicMock()
+    mock_core.patch_node.side_effect = throttled
+    with patch("kubernetes.client.CoreV1Api", return_value=mock_core):
+        refused = executor.run_kube_action(
+            IN_CLUSTER_CONTROLLER, CORDON, {"node": "node-1"}
+        )
+        # drain_node cordoned the node before its pod LIST was throttled.
+        mock_core.patch_node.side_effect = None
+        mock_core.list_pod_for_all_namespaces.side_effect = throttled
+        cordoned = executor.run_kube_action(
+            IN_CLUSTER_CONTROLLER,
+            {"kube_action": "drain_node", "node_name": "{node}"},
+            {"node": "node-1"},
+        )
+    assert refused.error_class == KUBE_THROTTLED
+    assert (cordoned.exit_code, cordoned.error_class) == (429, None)
+
+
+CORDON = {"kube_action": "cordon_node", "node_name": "{node}"}
+
+
+def _counting_builds(monkeypatch, executor):
+    built = []
+    real = executor.controller_backend("kubeapi")._build_kube_configuration
+
+    def counting(controller):
+        built.append(controller)
+        return real(controller)
+
+    monkeypatch.setattr(
+        executor.controller_backend("kubeapi").kube_clients, "build", counting
+    )
+    return built
+
+
+def test_kube_client_is_reused_per_controller(monkeypatch):
+    executor = ActionExecutor()
+    _patch_incluster(monkeypatch)
+    built = _counting_builds(monkeypatch, executor)
+    with patch("kubernetes.client.CoreV1Api", return_value=MagicMock()) as core:
+        for node in ("node-1", "node-2", "node-3"):
+            result = executor.run_kube_action(
+                IN_CLUSTER_CONTROLLER, CORDON, {"node": node}, controller_name="k8s"
+            )
+            assert result.success is True
+    assert len(built) == 1
+    clients = {call.args[0] for call in core.call_args_list}
+    assert len(clients) == 1
+    assert executor.controller_backend("kubeapi").kube_clients.stats() == {
+        "clients": 1,
+        "built": 1,
+        "reused": 2,
+    }
+
+
+def test_kube_client_rebuilt_and_closed_when_controller_changes(monkeypatch, tmp_path):
+    executor = ActionExecutor()
+    token = tmp_path / "token"
+    token.write_text("t")
+    controller = {"type": "kubeapi", "api_server": "https://a", "token": str(token)}
+    built = _counting_builds(monkeypatch, executor)
+    closed = []
+    monkeypatch.setattr(
+        "kubernetes.client.ApiClient.close", lambda self: closed.append(self)
+    )
+    with patch("kubernetes.client.CoreV1Api", return_value=MagicMock()):
+        executor.run_kube_action(controller, CORDON, {"node": "n"}, controller_name="c")
+        assert closed == []
+        changed = {**controller, "api_server": "https://b"}
+        executor.run_kube_action(changed, CORDON, {"node": "n"}, controller_name="c")
+    assert [c["api_server"] for c in built] == ["https://a", "https://b"]
+    assert len(closed) == 1
+    executor.close()
+    assert len(closed) == 2
+
+
+def test_kube_client_rebuilt_after_401_and_call_retried(monkeypatch):
+    executor = ActionExecutor()
+    _patch_incluster(monkeypatch)
+    built = _counting_builds(monkeypatch, executor)
+    invalidated = []
+    monkeypatch.setattr(kubeapi_module, "invalidate_vault_ref", invalidated.append)
+    mock_core = MagicMock()
+    mock_core.patch_node.side_effect = [
+        ApiException(status=401, reason="Unauthorized"),
+        None,
+    ]
+    controller = {**IN_CLUSTER_CONTROLLER, "token": "vault:secret/data/k8s#token"}
+    with patch("kubernetes.client.CoreV1Api", return_value=mock_core):
+        result = executor.run_kube_action(
+            controller, CORDON, {"node": "n"}, controller_name="k8s"
+        )
+    assert result.success is True
+    assert len(built) == 2
+    assert "vault:secret/data/k8s#token" in invalidated
+    assert mock_core.patch_node.call_count == 2
+
+
+def test_kube_action_not_rerun_after_401_once_it_changed_something(monkeypatch):
+    executor = ActionExecutor()
+    _patch_incluster(monkeypatch)
+    built = _counting_builds(monkeypatch, executor)
+    monkeypatch.setattr(kubeapi_module, "invalidate_vault_ref", lambda ref: None)
+    mock_core = MagicMock()
+    # drain_node cordons the node, then its pod LIST is rejected.
+    mock_core.list_pod_for_all_namespaces.side_effect = ApiException(
+        status=401, reason="Unauthorized"
+    )
+    with patch("kubernetes.client.CoreV1Api", return_value=mock_core):
+        result = executor.run_kube_action(
+            IN_CLUSTER_CONTROLLER,
+            {"kube_action": "drain_node", "node_name": "{node}"},
+            {"node": "n"},
+            controller_name="k8s",
+        )
+        assert result.success is False
+        assert result.exit_code == 401
+        assert mock_core.patch_node.call_count == 1
+        assert len(built) == 1
+        # The rejected client was still dropped: the next run rebuilds it.
+        mock_core.list_pod_for_all_namespaces.side_effect = None
+        executor.run_kube_action(
+            IN_CLUSTER_CONTROLLER, CORDON, {"node": "n"}, controller_name="k8s"
+        )
+    assert len(built) == 2
+
+
+def test_kubeconfig_controllers_each_keep_their_own_client(monkeypatch):
+    import src.main as main
+
+    executor = ActionExecutor()
+    monkeypatch.setattr(main, "executor", executor)
+    kube_clients = executor.controller_backend("kubeapi").kube_clients
+    built = []
+
+    def build(controller):
+        built.append(controller["kubeconfig"])
+        return kubernetes.client.Configuration(), []
+
+    monkeypatch.setattr(kube_clients, "build", build)
+    closed = []
+    monkeypatch.setattr(
+        "kubernetes.client.ApiClient.close", lambda self: closed.append(self)
+    )
+    staging = {"type": "kubeapi", "kubeconfig": "/etc/kube/staging"}
+    prod = {"type": "kubeapi", "kubeconfig": "/etc/kube/prod"}
+    with patch("kubernetes.client.CoreV1Api", return_value=MagicMock()):
+        for name, controller in [("staging", staging), ("prod", prod)] * 2:
+            result = main.execute_action(CORDON, name, controller, {"node": "n"}, False)
+            assert result.success is True
+    # Neither evicted the other's client.
+    assert built == ["/etc/kube/staging", "/etc/kube/prod"]
+    assert closed == []
+    assert kube_clients.stats() == {"clients": 2, "built": 2, "reused": 2}
+
+
+def test_retired_kube_client_closes_only_once_released(monkeypatch):
+    _patch_incluster(monkeypatch)
+    executor = ActionExecutor()
+    closed = []
+    monkeypatch.setattr(
+        "kubernetes.client.ApiClient.close", lambda self: closed.append(self)
+    )
+    cached = executor.controller_backend("kubeapi").kube_clients.acquire(
+        IN_CLUSTER_CONTROLLER, "k8s"
+    )
+    executor.close()
+    assert closed == []
+    executor.controller_backend("kubeapi").kube_clients.release(cached)
+    assert closed == [cached.api_client]
+
+
+# ---------------------------------------------------------------------
+# asyncio process backend (executor.backend: asyncio)
+# ---------------------------------------------------------------------
+
+PY = sys.executable
+
+
+def _asyncio_executor(tmp_path):
+    config = tmp_path / "execution.yaml"
+    config.write_text("executor:\n  backend: asyncio\n  max_output_bytes: 4096\n")
+    return ActionExecutor(str(config))
+
+
+def test_executor_defaults_to_subprocess_backend():
+    assert ActionExecutor().backend == "subprocess"
+
+
+def test_executor_unknown_backend_falls_back_to_subprocess(tmp_path):
+    config = tmp_path / "execution.yaml"
+    config.write_text("executor:\n  backend: carrier-pigeon\n")
+    assert ActionExecutor(str(config)).backend == "subprocess"
+
+
+def test_asyncio_backend_keeps_action_execution_result_contract(tmp_path):
+    executor = _asyncio_executor(tmp_path)
+    result = executor.run_command(PY + " -c \"print('{word}')\"", {"word": "hi"})
+    assert result.success is True
+    assert result.stdout == "hi\n"
+    assert result.stderr == ""
+    assert result.exit_code == 0
+    assert result.error is None
+
+    failed = executor.run_command(PY + " -c 'import sys; sys.exit(2)'")
+    assert failed.success is False
+    assert failed.exit_code == 2
+
+
+def test_close_stops_the_asyncio_backend_loop_and_thread(tmp_path):
+    executor = _asyncio_executor(tmp_path)
+    assert executor.run_command("true").success is True
+    runner = executor._async_runner
+    loop, thread = runner._loop, runner._thread
+    executor.close()
+    assert loop.is_closed()
+    assert not thread.is_alive()
+
+
+def test_asyncio_backend_timeout_maps_to_failed_result(tmp_path, monkeypatch):
+    monkeypatch.setattr(executor_module, "PROCESS_TIMEOUT_SECONDS", 0.5)
+    executor = _asyncio_executor(tmp_path)
+    result = executor.run_command(PY + " -c 'import time; time.sleep(30)'")
+    assert result.success is False
+    assert "timed out" in result.error
+
+
+def test_asyncio_backend_feeds_output_sink_line_by_line(tmp_path):
+    executor = _asyncio_executor(tmp_path)
+    lines = []
+    token = output_sink.set(lambda stream, text: lines.append((stream, text)))
+    try:
+        executor.run_command(
+            PY + " -c \"import sys; print('one'); print('two'); "
+            "sys.stderr.write('oops\\n')\""
+        )
+    finally:
+        output_sink.reset(token)
+    assert [line for line in lines if line[0] == "stdout"] == [
+        ("stdout", "one"),
+        ("stdout", "two"),
+    ]
+    assert ("stderr", "oops") in lines
+
+
+def test_subprocess_backend_replays_output_to_sink_after_exit():
+    lines = []
+    token = output_sink.set(lambda stream, text: lines.append((stream, text)))
+    try:
+        ActionExecutor().run_command("echo hi")
+    finally:
+        output_sink.reset(token)
+    # subprocess.run is mocked suite-wide to print "mocked".
+    assert lines == [("stdout", "mocked")]
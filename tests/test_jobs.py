@@ -0,0 +1,295 @@
+import asyncio
+import json
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+import src.main as main
+from src.jobs import (
+    JobOutput,
+    JobStore,
+    MAX_OUTPUT_LINES,
+    QUEUED,
+    RUNNING,
+    FINISHED,
+    FAILED,
+)
+from src.process import output_sink
+from src.main import app
+
+client = TestClient(app)
+
+
+def get_headers(api_key="admin-key"):
+    return {"x-api-key": api_key}
+
+
+def wait_for_job(job_id, api_key="admin-key", timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/jobs/{job_id}", headers=get_headers(api_key)).json()
+        if job["status"] in (FINISHED, FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish in {timeout}s")
+
+
+# --- JobStore ------------------------------------------------------------
+
+
+def test_job_lifecycle():
+    store = JobStore()
+    job = store.create(action="health_check", requested_by="k")
+    assert job["status"] == QUEUED
+    store.mark_running(job["id"])
+    assert store.get(job["id"])["status"] == RUNNING
+    assert store.get(job["id"])["started_at"] is not None
+    store.mark_finished(job["id"], execution={"success": True})
+    finished = store.get(job["id"])
+    assert finished["status"] == FINISHED
+    assert finished["execution"] == {"success": True}
+    assert finished["finished_at"] is not None
+
+
+def test_job_without_result_is_failed():
+    store = JobStore()
+    job = store.create(action="x")
+    store.mark_finished(job["id"], error="boom")
+    assert store.get(job["id"])["status"] == FAILED
+    assert store.get(job["id"])["error"] == "boom"
+
+
+def test_finished_jobs_are_pruned_but_active_ones_kept():
+    store = JobStore(max_finished=2)
+    active = store.create(action="still-running")
+    for _ in range(5):
+        job = store.create(action="done")
+        store.mark_finished(job["id"], execution={"success": True})
+    assert store.get(active["id"]) is not None
+    assert len(store.list(status=FINISHED)) == 2
+
+
+def test_list_is_newest_first_and_filters_by_requester():
+    store = JobStore()
+    first = store.create(requested_by="a")
+    second = store.create(requested_by="b")
+    third = store.create(requested_by="a")
+    assert [j["id"] for j in store.list()] == [third["id"], second["id"], first["id"]]
+    assert [j["id"] for j in store.list(requested_by="a")] == [
+        third["id"],
+        first["id"],
+    ]
+
+
+# --- /webhook async_mode + /jobs ----------------------------------------
+
+
+def test_async_mode_returns_202_and_job_reports_result():
+    resp = client.post(
+        "/webhook",
+        json={"event_type": "cleanup_disk", "async_mode": True},
+        headers=get_headers(),
+    )
+    assert resp.status_code == 202
+    body = resp.json()
+    assert body["status"] == QUEUED
+    assert body["status_url"] == f"/jobs/{body['job_id']}"
+
+    job = wait_for_job(body["job_id"])
+    assert job["status"] == FINISHED
+    assert job["action"] == "cleanup_disk"
+    assert job["controller"] == "local"
+    assert job["execution"]["success"] is True
+    assert job["execution"]["stdout"] == "done"
+
+
+def test_async_mode_writes_audit_entry_on_completion():
+    resp = client.post(
+        "/webhook",
+        json={"event_type": "health_check", "async_mode": True},
+        headers=get_headers(),
+    )
+    wait_for_job(resp.json()["job_id"])
+    audit = client.get("/audit?action=health_check&limit=1", headers=get_headers())
+    assert audit.json()[0]["execution"]["success"] is True
+
+
+def test_async_mode_still_enforces_cooldown():
+    payload = {
+        "event_type": "restart_deployment",
+        "parameters": {"deployment": "web"},
+        "async_mode": True,
+    }
+    first = client.post("/webhook", json=payload, headers=get_headers())
+    assert first.status_code == 202
+    wait_for_job(first.json()["job_id"])
+    # The job recorded the cooldown on completion, so an identical
+    # request is rejected synchronously, before any job is created.
+    second = client.post("/webhook", json=payload, headers=get_headers())
+    assert second.status_code == 409
+    assert len(client.get("/jobs", headers=get_headers()).json()) == 1
+
+
+def test_async_mode_still_enforces_permissions():
+    resp = client.post(
+        "/webhook",
+        json={"event_type": "cleanup_disk", "async_mode": True},
+        headers=get_headers("readonly-key"),
+    )
+    assert resp.status_code == 403
+    assert main.job_store.list() == []
+
+
+def test_job_visible_to_owner_and_audit_readers_only(monkeypatch):
+    job = main.job_store.create(action="cleanup_disk", requested_by="operator-key")
+    assert (
+        client.get(
+            f"/jobs/{job['id']}", headers=get_headers("operator-key")
+        ).status_code
+        == 200
+    )
+    # admin has audit_read, so it can see anyone's job.
+    assert (
+        client.get(f"/jobs/{job['id']}", headers=get_headers("admin-key")).status_code
+        == 200
+    )
+
+    monkeypatch.setattr(
+        "src.auth._role_permission", lambda config, role, perm: perm != "audit_read"
+    )
+    other = client.get(f"/jobs/{job['id']}", headers=get_headers("admin-key"))
+    assert other.status_code == 404
+    assert client.get("/jobs", headers=get_headers("admin-key")).json() == []
+
+
+def test_unknown_job_is_404():
+    resp = client.get("/jobs/does-not-exist", headers=get_headers())
+    assert resp.status_code == 404
+
+
+# --- live output: JobOutput + /jobs/{id}/stream ---------------------------
+
+
+def parse_sse(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(
+            line.split(": ", 1) for line in block.splitlines() if ": " in line
+        )
+        if "event" in fields:
+            events.append((fields["event"], fields["data"]))
+    return events
+
+
+def test_job_output_readers_keep_their_own_position():
+    output = JobOutput()
+    output.append("stdout", "a")
+    output.append("stderr", "b")
+    lines, cursor, missed, closed = output.read(0)
+    assert lines == [("stdout", "a"), ("stderr", "b")]
+    assert (cursor, missed, closed) == (2, 0, False)
+    output.append("stdout", "c")
+    assert output.read(cursor)[0] == [("stdout", "c")]
+    # A second reader starting from scratch still sees everything.
+    assert len(output.read(0)[0]) == 3
+
+
+def test_job_output_is_bounded_and_reports_missed_lines():
+    output = JobOutput(max_lines=3)
+    for i in range(10):
+        output.append("stdout", str(i))
+    lines, cursor, missed, _ = output.read(0)
+    assert [text for _, text in lines] == ["7", "8", "9"]
+    assert missed == 7
+    assert cursor == 10
+
+
+def test_job_output_wait_wakes_on_append_from_another_thread():
+    output = JobOutput()
+
+    async def scenario():
+        threading.Timer(0.05, output.append, ("stdout", "late")).start()
+        return await output.wait(0, timeout=5)
+
+    assert asyncio.run(scenario()) is True
+    assert asyncio.run(output.wait(1, timeout=0.01)) is False
+    output.close()
+    assert asyncio.run(output.wait(1, timeout=5)) is True
+
+
+def test_job_output_is_closed_when_job_finishes_and_pruned_with_it():
+    store = JobStore(max_finished=1)
+    first = store.create(action="x")
+    store.mark_finished(first["id"], execution={"success": True})
+    assert store.output(first["id"]).closed is True
+    second = store.create(action="y")
+    store.mark_finished(second["id"], execution={"success": True})
+    assert store.output(first["id"]) is None
+
+
+def test_stream_forwards_job_output_then_final_job(monkeypatch):
+    class Result:
+        success = True
+
+        def as_dict(self):
+            return {
+                "success": True,
+                "stdout": "step 1\nstep 2\n",
+                "stderr": "",
+                "exit_code": 0,
+                "error": None,
+            }
+
+    def chatty_script(*a, **kw):
+        sink = output_sink.get()
+        sink("stdout", "step 1")
+        sink("stderr", "warning: slow disk")
+        sink("stdout", "step 2")
+        return Result()
+
+    monkeypatch.setattr("src.main.executor.run_script", chatty_script)
+    resp = client.post(
+        "/webhook",
+        json={"event_type": "cleanup_disk", "async_mode": True},
+        headers=get_headers(),
+    )
+    job_id = resp.json()["job_id"]
+
+    stream = client.get(f"/jobs/{job_id}/stream", headers=get_headers())
+    assert stream.status_code == 200
+    assert stream.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(stream.text)
+    assert events[:3] == [
+        ("stdout", "step 1"),
+        ("stderr", "warning: slow disk"),
+        ("stdout", "step 2"),
+    ]
+    assert events[-1][0] == "end"
+    final = json.loads(events[-1][1])
+    assert final["id"] == job_id
+    assert final["status"] == FINISHED
+
+
+def test_stream_reports_lines_a_slow_reader_missed():
+    job = main.job_store.create(action="x", requested_by="admin-key")
+    output = main.job_store.output(job["id"])
+    for i in range(MAX_OUTPUT_LINES + 5):
+        output.append("stdout", str(i))
+    main.job_store.mark_finished(job["id"], execution={"success": True})
+
+    events = parse_sse(
+        client.get(f"/jobs/{job['id']}/stream", headers=get_headers()).text
+    )
+    assert events[0] == ("dropped", json.dumps({"lines": 5}))
+    assert events[1] == ("stdout", "5")
+
+
+def test_stream_is_404_for_someone_elses_job(monkeypatch):
+    job = main.job_store.create(action="x", requested_by="operator-key")
+    monkeypatch.setattr(
+        "src.auth._role_permission", lambda config, role, perm: perm != "audit_read"
+    )
+    resp = client.get(f"/jobs/{job['id']}/stream", headers=get_headers("admin-key"))
+    assert resp.status_code == 404
+    assert client.get("/jobs/nope/stream", headers=get_headers()).status_code == 404
@@ -0,0 +1,493 @@
+import asyncio
+import contextvars
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+import src.main as main
+from src.pool import (
+    ExecutionPool,
+    DEFAULT_MAX_WORKERS,
+    PoolClosedError,
+    release_slot,
+    sleep_without_slot,
+)
+
+
+def make_pool(tmp_path, config_text=None):
+    config_path = tmp_path / "execution.yaml"
+    if config_text is not None:
+        config_path.write_text(config_text)
+    return ExecutionPool(str(config_path))
+
+
+def test_missing_config_file_uses_default_size(tmp_path):
+    pool = make_pool(tmp_path)
+    assert pool.max_workers == DEFAULT_MAX_WORKERS
+    pool.shutdown()
+
+
+def test_configured_size(tmp_path):
+    pool = make_pool(tmp_path, "pool:\n  max_workers: 3\n")
+    assert pool.max_workers == 3
+    assert pool.stats()["max_workers"] == 3
+    pool.shutdown()
+
+
+def test_submit_returns_result_and_updates_stats(tmp_path):
+    pool = make_pool(tmp_path)
+    assert pool.submit(lambda a, b: a + b, 2, 3).result(timeout=5) == 5
+    stats = pool.stats()
+    assert stats["submitted"] == 1
+    assert stats["completed"] == 1
+    assert stats["running"] == 0
+    assert stats["queued"] == 0
+    pool.shutdown()
+
+
+def test_work_beyond_max_workers_is_queued_and_reported(tmp_path):
+    pool = make_pool(tmp_path, "pool:\n  max_workers: 1\n")
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocker():
+        started.set()
+        release.wait(5)
+        return "done"
+
+    first = pool.submit(blocker)
+    started.wait(5)
+    second = pool.submit(lambda: "second")
+    stats = pool.stats()
+    assert stats["running"] == 1
+    assert stats["queued"] == 1
+    assert stats["saturated"] is True
+
+    time.sleep(0.01)
+    release.set()
+    assert first.result(timeout=5) == "done"
+    assert second.result(timeout=5) == "second"
+    assert pool.stats()["max_queue_wait_seconds"] > 0
+    pool.shutdown()
+
+
+def test_contextvars_carry_over_to_worker(tmp_path):
+    pool = make_pool(tmp_path)
+    var = contextvars.ContextVar("var", default=None)
+    var.set("from-caller")
+    assert pool.submit(var.get).result(timeout=5) == "from-caller"
+    pool.shutdown()
+
+
+def test_async_run_does_not_block_event_loop(tmp_path):
+    pool = make_pool(tmp_path)
+    release = threading.Event()
+
+    async def scenario():
+        slow = asyncio.ensure_future(pool.run(release.wait, 5))
+        # The loop keeps running other coroutines while the pool works.
+        await asyncio.sleep(0.01)
+        assert not slow.done()
+        release.set()
+        return await slow
+
+    assert asyncio.run(scenario()) is True
+    pool.shutdown()
+
+
+def test_probes_answer_while_webhook_execution_is_running(monkeypatch):
+    """
+    The point of the pool: a long-running action must not stall /live.
+    """
+    release = threading.Event()
+    started = threading.Event()
+
+    class Result:
+        success = True
+
+        def as_dict(self):
+            return {
+                "success": True,
+                "stdout": "done",
+                "stderr": "",
+                "exit_code": 0,
+                "error": None,
+            }
+
+    def slow_script(*a, **kw):
+        started.set()
+        release.wait(10)
+        return Result()
+
+    monkeypatch.setattr("src.main.executor.run_script", slow_script)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            webhook = asyncio.ensure_future(
+                client.post(
+                    "/webhook",
+                    json={"event_type": "cleanup_disk"},
+                    headers={"x-api-key": "admin-key"},
+                )
+            )
+            while not started.is_set():
+                await asyncio.sleep(0.01)
+            live = await client.get("/live")
+            stats = await client.get(
+                "/execution/stats", headers={"x-api-key": "admin-key"}
+            )
+            release.set()
+            return live, stats, await webhook
+
+    live, stats, webhook = asyncio.run(scenario())
+    assert live.status_code == 200
+    assert stats.status_code == 200
+    assert stats.json()["running"] >= 1
+    assert webhook.status_code == 200
+    assert webhook.json()["execution"]["stdout"] == "done"
+
+
+def test_execution_stats_requires_auth():
+    from fastapi.testclient import TestClient
+
+    resp = TestClient(main.app).get("/execution/stats")
+    assert resp.status_code == 401
+
+
+# --- per-controller bulkheads --------------------------------------------
+
+
+def _blocker(started, release, value):
+    def fn():
+        started.set()
+        release.wait(5)
+        return value
+
+    return fn
+
+
+def test_controller_limit_queues_excess_work_fifo(tmp_path):
+    pool = make_pool(tmp_path, "pool:\n  max_workers: 4\n")
+    release = threading.Event()
+    started = threading.Event()
+    order = []
+
+    first = pool.submit(
+        _blocker(started, release, "first"), controller="dc2-oc", max_concurrency=1
+    )
+    started.wait(5)
+    second = pool.submit(order.append, "second", controller="dc2-oc", max_concurrency=1)
+    third = pool.submit(order.append, "third", controller="dc2-oc", max_concurrency=1)
+
+    stats = pool.stats()["controllers"]["dc2-oc"]
+    assert stats == {
+        **stats,
+        "max_concurrency": 1,
+        "running": 1,
+        "queued": 2,
+    }
+    # Global capacity is free, the work is held back by the bulkhead alone.
+    assert pool.stats()["running"] == 1
+
+    time.sleep(0.01)
+    release.set()
+    assert first.result(timeout=5) == "first"
+    second.result(timeout=5)
+    third.result(timeout=5)
+    assert order == ["second", "third"]
+    assert pool.stats()["controllers"]["dc2-oc"]["max_queue_wait_seconds"] > 0
+    pool.shutdown()
+
+
+def test_saturated_controller_does_not_block_other_controllers(tmp_path):
+    pool = make_pool(tmp_path, "pool:\n  max_workers: 2\n")
+    release = threading.Event()
+    started = threading.Event()
+
+    slow = pool.submit(
+        _blocker(started, release, "slow"), controller="dc2-oc", max_concurrency=1
+    )
+    started.wait(5)
+    # Queued behind dc2-oc's own limit - must not take the last worker.
+    queued_slow = pool.submit(lambda: "slow-2", controller="dc2-oc", max_concurrency=1)
+    healthy = pool.submit(lambda: "healthy", controller="dc1-ansible")
+
+    assert healthy.result(timeout=5) == "healthy"
+    assert not queued_slow.done()
+    release.set()
+    assert slow.result(timeout=5) == "slow"
+    assert queued_slow.result(timeout=5) == "slow-2"
+    pool.shutdown()
+
+
+def test_default_controller_limit_applies_without_own_limit(tmp_path):
+    pool = make_pool(
+        tmp_path,
+        "pool:\n  max_workers: 4\n  default_controller_max_concurrency: 1\n",
+    )
+    release = threading.Event()
+    started = threading.Event()
+    pool.submit(_blocker(started, release, None), controller="dc1-ansible")
+    started.wait(5)
+    waiting = pool.submit(lambda: "next", controller="dc1-ansible")
+    assert pool.stats()["controllers"]["dc1-ansible"]["queued"] == 1
+    release.set()
+    assert waiting.result(timeout=5) == "next"
+    pool.shutdown()
+
+
+def test_global_cap_still_applies_across_controllers(tmp_path):
+    pool = make_pool(tmp_path, "pool:\n  max_workers: 1\n")
+    release = threading.Event()
+    started = threading.Event()
+    pool.submit(_blocker(started, release, None), controller="a")
+    started.wait(5)
+    waiting = pool.submit(lambda: "b", controller="b")
+    assert pool.stats()["queued"] == 1
+    release.set()
+    assert waiting.result(timeout=5) == "b"
+    pool.shutdown()
+
+
+def test_exception_is_propagated_and_slot_released(tmp_path):
+    pool = make_pool(tmp_path, "pool:\n  max_workers: 1\n")
+
+    def boom():
+        raise RuntimeError("boom")
+
+    future = pool.submit(boom, controller="a", max_concurrency=1)
+    try:
+        future.result(timeout=5)
+        raise AssertionError("expected RuntimeError")
+    except RuntimeError as e:
+        assert str(e) == "boom"
+    retry = pool.submit(lambda: "ok", controller="a", max_concurrency=1)
+    assert retry.result(timeout=5) == "ok"
+    pool.shutdown()
+
+
+def test_webhook_execution_counts_against_controller_bulkhead():
+    from fastapi.testclient import TestClient
+
+    client = TestClient(main.app)
+    resp = client.post(
+        "/webhook",
+        json={"event_type": "cleanup_disk"},
+        headers={"x-api-key": "admin-key"},
+    )
+    assert resp.status_code == 200
+    stats = client.get("/execution/stats", headers={"x-api-key": "admin-key"})
+    assert "local" in stats.json()["controllers"]
+
+
+# --- severity priority + aging -------------------------------------------
+
+
+def _hold_single_worker(pool):
+    release = threading.Event()
+    started = threading.Event()
+    pool.submit(_blocker(started, release, None))
+    started.wait(5)
+    return release
+
+
+def test_queued_work_starts_in_priority_order(tmp_path):
+    pool = make_pool(tmp_path, "pool:\n  max_workers: 1\n")
+    release = _hold_single_worker(pool)
+    order = []
+    futures = [
+        pool.submit(order.append, "info-1", priority="info"),
+        pool.submit(order.append, "no-severity", priority=None),
+        pool.submit(order.append, "warning", priority="warning"),
+        pool.submit(order.append, "critical", priority="critical"),
+        pool.submit(order.append, "info-2", priority="info"),
+    ]
+    release.set()
+    for future in futures:
+        future.result(timeout=5)
+    assert order == ["critical", "warning", "info-1", "no-severity", "info-2"]
+    pool.shutdown()
+
+
+def test_aging_lets_long_waiting_work_overtake(tmp_path, monkeypatch):
+    pool = make_pool(
+        tmp_path, "pool:\n  max_workers: 1\n  priority_aging_seconds: 10\n"
+    )
+    release = _hold_single_worker(pool)
+    now = [1000.0]
+    monkeypatch.setattr("src.pool.time", SimpleNamespace(monotonic=lambda: now[0]))
+    order = []
+    old_info = pool.submit(order.append, "old-info", priority="info")
+    now[0] += 25  # 2.5 classes of aging: now outranks a fresh critical
+    fresh_critical = pool.submit(order.append, "critical", priority="critical")
+    release.set()
+    old_info.result(timeout=5)
+    fresh_critical.result(timeout=5)
+    assert order == ["old-info", "critical"]
+    pool.shutdown()
+
+
+def test_no_aging_is_strict_priority(tmp_path, monkeypatch):
+    pool = make_pool(tmp_path, "pool:\n  max_workers: 1\n  priority_aging_seconds: 0\n")
+    release = _hold_single_worker(pool)
+    now = [1000.0]
+    monkeypatch.setattr("src.pool.time", SimpleNamespace(monotonic=lambda: now[0]))
+    order = []
+    old_info = pool.submit(order.append, "old-info", priority="info")
+    now[0] += 3600
+    critical = pool.submit(order.append, "critical", priority="critical")
+    release.set()
+    old_info.result(timeout=5)
+    critical.result(timeout=5)
+    assert order == ["critical", "old-info"]
+    pool.shutdown()
+
+
+def test_stats_report_queue_wait_per_priority_class(tmp_path):
+    pool = make_pool(tmp_path, "pool:\n  max_workers: 1\n")
+    release = _hold_single_worker(pool)
+    queued = pool.submit(lambda: None, priority="critical")
+    priorities = pool.stats()["priorities"]
+    assert set(priorities) == {"info", "warning", "critical"}
+    assert priorities["critical"]["queued"] == 1
+    time.sleep(0.01)
+    release.set()
+    queued.result(timeout=5)
+    critical = pool.stats()["priorities"]["critical"]
+    assert critical["queued"] == 0
+    assert critical["max_queue_wait_seconds"] > 0
+    pool.shutdown()
+
+
+# --- released slots ------------------------------------------------------
+
+
+def _waiter(released, release, returned):
+    """Releases its slot, then blocks like an execution on a watch stream."""
+
+    def fn():
+        returned.append(release_slot())
+        released.set()
+        release.wait(5)
+        return "waited"
+
+    return fn
+
+
+def test_released_slot_lets_queued_work_start(tmp_path):
+    pool = make_pool(tmp_path, "pool:\n  max_workers: 1\n")
+    released, release, returned = threading.Event(), threading.Event(), []
+    waiter = pool.submit(
+        _waiter(released, release, returned), controller="a", max_concurrency=1
+    )
+    released.wait(5)
+    # Both the global slot and the controller's are free again.
+    assert pool.submit(lambda: "next", controller="a").result(timeout=5) == "next"
+    assert returned == [True]
+    stats = pool.stats()
+    assert (stats["running"], stats["waiting"]) == (0, 1)
+    release.set()
+    assert waiter.result(timeout=5) == "waited"
+    assert pool.stats()["waiting"] == 0
+    pool.shutdown()
+
+
+def test_release_slot_is_refused_past_max_waiting(tmp_path):
+    pool = make_pool(tmp_path, "pool:\n  max_workers: 2\n  max_waiting: 1\n")
+    release, returned = threading.Event(), []
+    first_released, second_released = threading.Event(), threading.Event()
+    pool.submit(_waiter(first_released, release, returned))
+    first_released.wait(5)
+    pool.submit(_waiter(second_released, release, returned))
+    second_released.wait(5)
+    assert returned == [True, False]
+    assert (pool.stats()["running"], pool.stats()["waiting"]) == (1, 1)
+    assert release_slot() is False  # not running on a pool at all
+    release.set()
+    pool.shutdown()
+
+
+def test_drain_waits_for_work_that_released_its_slot(tmp_path):
+    pool = make_pool(tmp_path)
+    released, release = threading.Event(), threading.Event()
+    waiter = pool.submit(_waiter(released, release, []))
+    released.wait(5)
+    threading.Timer(0.1, release.set).start()
+    assert pool.drain(timeout=5) is True
+    assert waiter.done()
+    pool.shutdown()
+
+
+def test_sleep_without_slot_lets_queued_work_run_then_retakes_a_slot(tmp_path):
+    pool = make_pool(tmp_path, "pool:\n  max_workers: 1\n")
+    sleeping, order = threading.Event(), []
+
+    def sleeper():
+        sleeping.set()
+        resumed = sleep_without_slot(0.2)
+        order.append("sleeper resumed")
+        return resumed, pool.stats()["running"]
+
+    first = pool.submit(sleeper, controller="a", max_concurrency=1)
+    sleeping.wait(5)
+    # Runs while the sleeper sleeps, under the same single global and
+    # controller slot.
+    pool.submit(lambda: order.append("queued"), controller="a").result(timeout=5)
+    assert first.result(timeout=5) == (True, 1)
+    assert order == ["queued", "sleeper resumed"]
+    stats = pool.stats()
+    assert (stats["running"], stats["waiting"], stats["queued"]) == (0, 0, 0)
+    pool.shutdown()
+
+
+def test_sleep_without_slot_reports_a_drain_that_started_meanwhile(tmp_path):
+    pool = make_pool(tmp_path)
+    sleeping = threading.Event()
+
+    def sleeper():
+        sleeping.set()
+        return sleep_without_slot(0.2)
+
+    future = pool.submit(sleeper)
+    sleeping.wait(5)
+    assert pool.drain(timeout=5) is True
+    assert future.result(timeout=5) is False
+    assert pool.stats()["waiting"] == 0
+    pool.shutdown()
+
+
+# --- shutdown drain ------------------------------------------------------
+
+
+def test_drain_waits_for_running_work_and_never_starts_queued(tmp_path):
+    pool = make_pool(tmp_path, "pool:\n  max_workers: 1\n")
+    release = _hold_single_worker(pool)
+    queued = pool.submit(lambda: "queued", controller="c1", priority="critical")
+    threading.Timer(0.1, release.set).start()
+    assert pool.drain(timeout=5) is True
+    # Failed once the wait is over, rather than left pending forever.
+    with pytest.raises(PoolClosedError):
+        queued.result(timeout=0)
+    stats = pool.stats()
+    assert stats["draining"] is True
+    assert (stats["queued"], stats["completed"]) == (0, 1)
+    assert stats["controllers"]["c1"]["queued"] == 0
+    assert stats["priorities"]["critical"]["queued"] == 0
+    with pytest.raises(PoolClosedError):
+        pool.submit(lambda: None)
+    pool.shutdown(wait=False)
+
+
+def test_drain_gives_up_after_grace_period(tmp_path):
+    pool = make_pool(tmp_path, "pool:\n  shutdown_grace_seconds: 0.05\n")
+    release = _hold_single_worker(pool)
+    assert pool.shutdown_grace_seconds == 0.05
+    assert pool.drain() is False
+    release.set()
+    pool.shutdown()
@@ -0,0 +1,133 @@
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.process import AsyncProcessRunner, BoundedOutput, LineSplitter
+
+PY = sys.executable
+
+
+@pytest.fixture
+def runner():
+    r = AsyncProcessRunner(max_output_bytes=1024)
+    yield r
+    r.close()
+
+
+def test_bounded_output_keeps_everything_under_the_limit():
+    out = BoundedOutput(16)
+    out.write(b"hello ")
+    out.write(b"world")
+    assert out.getvalue() == "hello world"
+    assert out.dropped_bytes == 0
+
+
+def test_bounded_output_keeps_head_and_tail_past_the_limit():
+    out = BoundedOutput(8)
+    for chunk in (b"abcd", b"efgh", b"ijkl", b"mnop"):
+        out.write(chunk)
+    assert out.dropped_bytes == 8
+    value = out.getvalue()
+    assert value.startswith("abcd")
+    assert value.endswith("mnop")
+    assert "[truncated 8 bytes]" in value
+
+
+def test_run_captures_stdout_stderr_and_exit_code(runner):
+    proc = runner.run(
+        [
+            PY,
+            "-c",
+            "import sys; print('out'); print('err', file=sys.stderr); " "sys.exit(3)",
+        ],
+        timeout=30,
+    )
+    assert isinstance(proc, subprocess.CompletedProcess)
+    assert proc.returncode == 3
+    assert proc.stdout == "out\n"
+    assert proc.stderr == "err\n"
+
+
+def test_run_bounds_captured_output(runner):
+    proc = runner.run([PY, "-c", "print('x' * 100000)"], timeout=30)
+    assert proc.returncode == 0
+    assert len(proc.stdout) < 2048
+    assert "truncated" in proc.stdout
+
+
+def test_run_timeout_kills_process_and_raises(runner):
+    start = time.monotonic()
+    with pytest.raises(subprocess.TimeoutExpired) as excinfo:
+        runner.run(
+            [PY, "-c", "import time; print('started', flush=True); time.sleep(30)"],
+            timeout=0.5,
+        )
+    assert time.monotonic() - start < 10
+    assert excinfo.value.output == "started\n"
+
+
+def test_many_concurrent_processes_share_one_loop(runner):
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=20) as threads:
+        results = list(
+            threads.map(
+                lambda _: runner.run(
+                    [PY, "-c", "import time; time.sleep(0.5)"], timeout=30
+                ),
+                range(20),
+            )
+        )
+    assert all(r.returncode == 0 for r in results)
+    # Run side by side, not one after another.
+    assert time.monotonic() - start < 15
+
+
+def test_line_splitter_reassembles_lines_across_chunks():
+    lines = []
+    splitter = LineSplitter("stdout", lambda s, t: lines.append((s, t)))
+    splitter.feed(b"par")
+    splitter.feed(b"tial\r\nnext\nlast")
+    assert lines == [("stdout", "partial"), ("stdout", "next")]
+    splitter.flush()
+    assert lines[-1] == ("stdout", "last")
+
+
+def test_line_splitter_cuts_endless_lines():
+    lines = []
+    splitter = LineSplitter("stdout", lambda s, t: lines.append(t), max_line_bytes=4)
+    splitter.feed(b"abcdefghij")
+    assert lines == ["abcd", "efgh"]
+
+
+def test_line_splitter_survives_failing_callback():
+    def boom(stream, text):
+        raise RuntimeError("reader went away")
+
+    splitter = LineSplitter("stdout", boom)
+    splitter.feed(b"line\n")
+
+
+def test_run_delivers_lines_while_process_is_still_running(runner):
+    first_line = threading.Event()
+    lines = []
+
+    def on_line(stream, text):
+        lines.append((stream, text))
+        first_line.set()
+
+    waiter = ThreadPoolExecutor(max_workers=1)
+    future = waiter.submit(
+        runner.run,
+        [PY, "-c", "import time; print('step 1', flush=True); time.sleep(1)"],
+        30,
+        on_line,
+    )
+    assert first_line.wait(10)
+    assert not future.done()
+    assert future.result(timeout=30).returncode == 0
+    assert lines == [("stdout", "step 1")]
+    waiter.shutdown()
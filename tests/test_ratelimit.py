@@ -1,6 +1,7 @@
 import time
+from types import SimpleNamespace
 
-from src.ratelimit import RateLimiter
+from src.ratelimit import PreAuthGuard, RateLimiter
 
 
 def make_limiter(tmp_path, config_text=None):
@@ -85,3 +86,60 @@ def test_keys_are_independent(tmp_path):
     assert limiter.check("a", 1) is None
     assert limiter.check("a", 1) is not None
     assert limiter.check("b", 1) is None
+
+
+def test_check_many_admits_what_fits_and_counts_each_call(tmp_path):
+    limiter = make_limiter(tmp_path)
+    assert limiter.check_many("k", 5, 3) == (3, None)
+    admitted, retry_after = limiter.check_many("k", 5, 4)
+    assert admitted == 2
+    assert retry_after is not None
+    # The bucket is now full, for single checks too.
+    assert limiter.check("k", 5) is not None
+    assert limiter.check_many("k", 5, 1)[0] == 0
+
+
+def test_check_many_without_limit_admits_everything(tmp_path):
+    limiter = make_limiter(tmp_path)
+    assert limiter.check_many("k", None, 50) == (50, None)
+
+
+# --- PreAuthGuard ---------------------------------------------------------
+
+
+def make_guard(tmp_path, config_text):
+    config_path = tmp_path / "rate_limits.yaml"
+    config_path.write_text(config_text)
+    return PreAuthGuard(str(config_path))
+
+
+def test_pre_auth_limit_is_per_network(tmp_path):
+    guard = make_guard(
+        tmp_path, "pre_auth:\n  requests_per_minute: 2\n  ipv4_prefix: 24\n"
+    )
+    assert guard.check_client("10.0.0.1") is None
+    assert guard.check_client("10.0.0.2") is None
+    retry_after = guard.check_client("10.0.0.3")
+    assert retry_after is not None and 0 < retry_after <= 30
+    assert guard.check_client("10.0.1.1") is None
+    assert guard.client_network("2001:db8::1") == "2001:db8::/64"
+
+
+def test_pre_auth_limit_off_unless_configured(tmp_path):
+    guard = make_guard(tmp_path, "default:\n  requests_per_minute: 1\n")
+    for _ in range(100):
+        assert guard.check_client("10.0.0.1") is None
+
+
+def test_negative_cache_expires_and_follows_config_version(tmp_path, monkeypatch):
+    guard = make_guard(tmp_path, "pre_auth:\n  negative_cache_seconds: 30\n")
+    now = [1000.0]
+    monkeypatch.setattr("src.ratelimit.time", SimpleNamespace(monotonic=lambda: now[0]))
+    guard.record_rejected("bad-key", config_version=1)
+    assert guard.recently_rejected("bad-key", config_version=1)
+    assert not guard.recently_rejected("other-key", config_version=1)
+    # A config change may have made it valid.
+    assert not guard.recently_rejected("bad-key", config_version=2)
+    guard.record_rejected("bad-key", config_version=2)
+    now[0] += 31
+    assert not guard.recently_rejected("bad-key", config_version=2)
@@ -77,3 +77,35 @@ def test_unconfigured_action_has_no_action_level_limit(monkeypatch):
     for _ in range(20):
         resp = client.post("/webhook", json=payload, headers=get_headers("admin-key"))
         assert resp.status_code != 429
+
+
+def test_rejected_key_is_turned_away_before_auth_lookup(monkeypatch):
+    import src.auth as auth
+
+    calls = []
+    real = auth._load_auth_config
+
+    def counting():
+        calls.append(1)
+        return real()
+
+    monkeypatch.setattr(auth, "_load_auth_config", counting)
+    for _ in range(5):
+        resp = client.get("/protected", headers=get_headers("garbage-key"))
+        assert resp.status_code == 401
+    # Only the first attempt was actually looked up.
+    assert len(calls) == 1
+    assert client.get("/protected", headers=get_headers()).status_code == 200
+    # Remembered by hash only.
+    assert list(main.pre_auth_guard._rejected) == [auth.hash_api_key("garbage-key")]
+
+
+def test_client_network_flood_is_throttled_before_auth(monkeypatch):
+    monkeypatch.setattr(main.pre_auth_guard, "config", {"requests_per_minute": 3})
+    for _ in range(3):
+        assert client.get("/protected", headers=get_headers()).status_code == 200
+    resp = client.get("/protected", headers=get_headers("whatever"))
+    assert resp.status_code == 429
+    assert int(resp.headers["retry-after"]) >= 1
+    # Probes are never throttled.
+    assert client.get("/ready").status_code == 200
@@ -0,0 +1,113 @@
+import json
+
+from fastapi.testclient import TestClient
+
+import src.main as main
+import src.resultcache as resultcache
+from src.main import app
+from src.resultcache import ResultCache
+
+client = TestClient(app)
+
+
+def get_headers(api_key="admin-key"):
+    return {"x-api-key": api_key}
+
+
+class FakeResult:
+    def __init__(self, success=True, stdout="healthy"):
+        self.success = success
+        self.stdout = stdout
+
+    def as_dict(self):
+        return {
+            "success": self.success,
+            "stdout": self.stdout,
+            "stderr": "",
+            "exit_code": 0 if self.success else 1,
+        }
+
+
+def counting_run_script(monkeypatch, result):
+    runs = []
+
+    def run_script(script, args=None, dry_run=False):
+        runs.append(script)
+        return result
+
+    monkeypatch.setattr("src.main.executor.run_script", run_script)
+    return runs
+
+
+def last_audit_entries(n):
+    with open(main.AUDIT_LOG_PATH) as f:
+        return [json.loads(line) for line in f.read().splitlines()[-n:]]
+
+
+def test_entries_expire_after_their_ttl(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(resultcache.time, "monotonic", lambda: now[0])
+    cache = ResultCache(str(tmp_path / "missing.yaml"))
+    cache.put("k", "result", 10)
+    assert cache.get("k") == "result"
+    now[0] += 10
+    assert cache.get("k") is None
+    assert cache.stats() == {"entries": 0, "hits": 1, "misses": 1, "evictions": 0}
+
+
+def test_least_recently_used_is_evicted_first(tmp_path):
+    config = tmp_path / "execution.yaml"
+    config.write_text("result_cache:\n  max_entries: 2\n")
+    cache = ResultCache(str(config))
+    cache.put("a", 1, 60)
+    cache.put("b", 2, 60)
+    cache.get("a")
+    cache.put("c", 3, 60)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_repeat_request_is_answered_from_the_cache_and_audited(monkeypatch):
+    runs = counting_run_script(monkeypatch, FakeResult())
+    bodies = [
+        client.post(
+            "/webhook", json={"event_type": "health_check"}, headers=get_headers()
+        ).json()
+        for _ in range(3)
+    ]
+    assert len(runs) == 1
+    assert [b["cached"] for b in bodies] == [False, True, True]
+    assert all(b["execution"]["stdout"] == "healthy" for b in bodies)
+    assert [e["cached"] for e in last_audit_entries(3)] == [False, True, True]
+    assert main.result_cache.stats()["hits"] == 2
+
+
+def test_failures_dry_runs_and_other_parameters_are_not_served_cached(monkeypatch):
+    runs = counting_run_script(monkeypatch, FakeResult(success=False))
+    for _ in range(2):
+        client.post(
+            "/webhook", json={"event_type": "health_check"}, headers=get_headers()
+        )
+    assert len(runs) == 2
+
+    runs = counting_run_script(monkeypatch, FakeResult())
+    for payload in (
+        {"event_type": "health_check", "parameters": {"target": "a"}},
+        {"event_type": "health_check", "parameters": {"target": "b"}},
+        {"event_type": "health_check", "dry_run": True},
+        {"event_type": "health_check", "dry_run": True},
+    ):
+        body = client.post("/webhook", json=payload, headers=get_headers()).json()
+        assert body["cached"] is False
+    # Each ran - the dry runs included, in dry_run mode.
+    assert len(runs) == 4
+
+
+def test_actions_that_do_not_opt_in_are_never_cached(monkeypatch):
+    runs = counting_run_script(monkeypatch, FakeResult())
+    for _ in range(2):
+        client.post(
+            "/webhook", json={"event_type": "cleanup_disk"}, headers=get_headers()
+        )
+    assert len(runs) == 2
+    assert main.result_cache.stats()["entries"] == 0
@@ -0,0 +1,161 @@
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import src.main as main
+from src.executor import ActionExecutionResult, ActionExecutor
+from src.main import app
+from src.pool import ExecutionPool, release_slot
+from src.retry import KUBE_THROTTLED, SSH_CONNECTION, RetryPolicy, kube_api_error_class
+
+client = TestClient(app)
+
+NO_BACKOFF = {"max_attempts": 3, "initial_backoff_seconds": 0}
+
+
+def ssh_failure():
+    return ActionExecutionResult(
+        False, "", "", 255, error="SSH connection failed", error_class=SSH_CONNECTION
+    )
+
+
+def scripted(*results):
+    """An attempt_fn returning `results` in turn, counting its calls."""
+    remaining = list(results)
+    calls = []
+
+    def attempt():
+        calls.append(1)
+        return remaining.pop(0)
+
+    return attempt, calls
+
+
+def test_policy_layers_override_key_by_key():
+    policy = RetryPolicy.from_config(
+        {"max_attempts": 3, "jitter": 0.2},
+        {"max_attempts": 5},
+        {"retry_on": ["kube_throttled"]},
+    )
+    assert policy.max_attempts == 5
+    assert policy.jitter == 0.2
+    assert policy.retry_on == ("kube_throttled",)
+    assert RetryPolicy.from_config(None, None).max_attempts == 1
+
+
+def test_backoff_doubles_up_to_its_cap_less_jitter():
+    policy = RetryPolicy(initial_backoff_seconds=1, max_backoff_seconds=5, jitter=0.5)
+    for attempt, full in ((1, 1), (2, 2), (3, 4), (4, 5), (10, 5)):
+        assert full * 0.5 <= policy.backoff_seconds(attempt) <= full
+    assert RetryPolicy(initial_backoff_seconds=2, jitter=0).backoff_seconds(1) == 2
+
+
+def test_kube_api_error_classes():
+    assert kube_api_error_class(429, changed=False) == KUBE_THROTTLED
+    # Throttled after it changed something, or a 5xx that may have come
+    # after the change was applied: retrying could apply it twice.
+    assert kube_api_error_class(429, changed=True) is None
+    assert kube_api_error_class(503, changed=False) is None
+    assert kube_api_error_class(None, changed=False) is None
+
+
+def test_transient_failures_are_retried_and_every_attempt_recorded():
+    executor = ActionExecutor()
+    attempt, calls = scripted(
+        ssh_failure(), ssh_failure(), ActionExecutionResult(True, "ok", "", 0)
+    )
+    result = executor.run_with_retries({"retry": NO_BACKOFF}, {}, attempt)
+    assert len(calls) == 3
+    assert result.success is True
+    attempts = result.as_dict()["attempts"]
+    assert [a["attempt"] for a in attempts] == [1, 2, 3]
+    assert [a["error_class"] for a in attempts] == [SSH_CONNECTION] * 2 + [None]
+    assert "retry_in_seconds" in attempts[0]
+    assert "retry_in_seconds" not in attempts[2]
+
+
+@pytest.mark.parametrize(
+    "retry, results",
+    [
+        # A command that ran and failed isn't transient.
+        (NO_BACKOFF, [ActionExecutionResult(False, "", "", 2)]),
+        # Nor is anything outside retry_on.
+        ({**NO_BACKOFF, "retry_on": ["kube_throttled"]}, [ssh_failure()]),
+        # The last attempt's failure is final.
+        ({**NO_BACKOFF, "max_attempts": 2}, [ssh_failure()] * 2),
+    ],
+)
+def test_final_failures_are_returned_with_their_attempts(retry, results):
+    attempt, calls = scripted(*results)
+    result = ActionExecutor().run_with_retries({}, {"retry": retry}, attempt)
+    assert result.success is False
+    assert len(calls) == len(results)
+    assert len(result.attempts) == len(calls)
+
+
+def test_dry_runs_and_single_attempt_policies_run_once():
+    executor = ActionExecutor()
+    attempt, calls = scripted(ssh_failure())
+    result = executor.run_with_retries({"retry": NO_BACKOFF}, {}, attempt, True)
+    assert (len(calls), result.attempts) == (1, None)
+    attempt, calls = scripted(ssh_failure())
+    executor.run_with_retries({}, {}, attempt)
+    assert len(calls) == 1
+
+
+def test_backoff_gives_the_slot_to_queued_work_and_released_attempts_are_final(
+    tmp_path,
+):
+    pool = ExecutionPool(str(tmp_path / "missing.yaml"))
+    pool.max_workers = 1
+    executor = ActionExecutor()
+    backing_off = {"retry": {**NO_BACKOFF, "initial_backoff_seconds": 0.2}}
+    order = []
+
+    def attempt():
+        order.append("attempt")
+        return (
+            ssh_failure()
+            if len(order) == 1
+            else ActionExecutionResult(True, "ok", "", 0)
+        )
+
+    retrying = pool.submit(executor.run_with_retries, backing_off, {}, attempt)
+    while not order:
+        time.sleep(0.01)
+    # Starts during the backoff, on the one worker slot.
+    pool.submit(lambda: order.append("queued")).result(timeout=5)
+    assert retrying.result(timeout=5).success is True
+    assert order == ["attempt", "queued", "attempt"]
+
+    def released_attempt():
+        release_slot()
+        return ssh_failure()
+
+    result = pool.submit(
+        executor.run_with_retries, {"retry": NO_BACKOFF}, {}, released_attempt
+    ).result(timeout=5)
+    assert len(result.attempts) == 1
+    pool.shutdown()
+
+
+def test_webhook_retries_and_audits_one_entry_with_every_attempt(monkeypatch):
+    monkeypatch.setattr(main.executor, "retry_defaults", NO_BACKOFF)
+    attempt, calls = scripted(ssh_failure(), ActionExecutionResult(True, "ok", "", 0))
+    monkeypatch.setattr(
+        "src.main.executor.run_remote", lambda *args, **kwargs: attempt()
+    )
+    resp = client.post(
+        "/webhook",
+        json={"event_type": "cleanup_disk", "controller_override": "dc1-ansible"},
+        headers={"x-api-key": "admin-key"},
+    )
+    assert resp.status_code == 200
+    assert len(calls) == 2
+    assert resp.json()["execution"]["success"] is True
+    with open(main.AUDIT_LOG_PATH) as f:
+        entry = json.loads(f.read().splitlines()[-1])
+    assert entry["controller"] == "dc1-ansible"
+    assert [a["success"] for a in entry["execution"]["attempts"]] == [False, True]
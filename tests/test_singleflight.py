@@ -0,0 +1,173 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import Future
+
+import httpx
+
+import src.main as main
+from src.singleflight import SingleFlight
+
+
+def test_second_caller_gets_the_in_flight_future():
+    flight = SingleFlight()
+    started = []
+
+    def start():
+        started.append(1)
+        return Future()
+
+    first, first_started = flight.run("k", start)
+    second, second_started = flight.run("k", start)
+    assert (first_started, second_started) == (True, False)
+    assert second is first
+    assert len(started) == 1
+    assert flight.stats() == {"in_flight": 1, "coalesced": 1}
+
+    first.set_result("done")
+    assert second.result() == "done"
+
+
+def test_key_is_forgotten_once_the_work_completes():
+    flight = SingleFlight()
+    first, _ = flight.run("k", Future)
+    first.set_exception(RuntimeError("boom"))
+    assert flight.stats()["in_flight"] == 0
+    again, started = flight.run("k", Future)
+    assert started is True
+    assert again is not first
+
+
+def test_different_keys_run_independently():
+    flight = SingleFlight()
+    a, a_started = flight.run("a", Future)
+    b, b_started = flight.run("b", Future)
+    assert a is not b
+    assert a_started and b_started
+
+
+def test_single_flight_key_includes_parameters():
+    action = {"cooldown_key_param": None}
+    nginx = main.single_flight_key_for(
+        action, "restart_service", "ansible_local", {"service_name": "nginx"}
+    )
+    postgres = main.single_flight_key_for(
+        action, "restart_service", "ansible_local", {"service_name": "postgres"}
+    )
+    assert nginx != postgres
+
+
+# --- /webhook ------------------------------------------------------------
+
+
+class Result:
+    success = True
+
+    def as_dict(self):
+        return {
+            "success": True,
+            "stdout": "restarted",
+            "stderr": "",
+            "exit_code": 0,
+            "error": None,
+        }
+
+
+def concurrent_webhooks(monkeypatch, payloads):
+    """
+    Posts `payloads` concurrently while the (single) execution is held
+    open, so every request arrives while it's in flight. Returns the
+    responses and how many times the action actually executed.
+    """
+    release = threading.Event()
+    started = threading.Event()
+    calls = []
+
+    def slow_command(*args, **kwargs):
+        calls.append(args)
+        started.set()
+        release.wait(10)
+        return Result()
+
+    monkeypatch.setattr("src.main.executor.run_command", slow_command)
+    monkeypatch.setattr("src.main.executor.run_remote", slow_command)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            first = asyncio.ensure_future(
+                client.post(
+                    "/webhook", json=payloads[0], headers={"x-api-key": "admin-key"}
+                )
+            )
+            while not started.is_set():
+                await asyncio.sleep(0.01)
+            rest = [
+                asyncio.ensure_future(
+                    client.post(
+                        "/webhook", json=payload, headers={"x-api-key": "admin-key"}
+                    )
+                )
+                for payload in payloads[1:]
+            ]
+            while main.single_flight.stats()["coalesced"] - before < len(rest):
+                await asyncio.sleep(0.01)
+            release.set()
+            return [await first] + [await r for r in rest]
+
+    before = main.single_flight.stats()["coalesced"]
+    responses = asyncio.run(scenario())
+    assert main.single_flight.stats()["coalesced"] - before == len(payloads) - 1
+    return responses, len(calls)
+
+
+def test_identical_concurrent_requests_share_one_execution(monkeypatch):
+    payload = {"event_type": "restart_deployment", "parameters": {"deployment": "web"}}
+    responses, executions = concurrent_webhooks(monkeypatch, [payload] * 3)
+    assert executions == 1
+    assert [r.status_code for r in responses] == [200, 200, 200]
+    bodies = [r.json() for r in responses]
+    assert [b["coalesced"] for b in bodies] == [False, True, True]
+    assert all(b["execution"]["stdout"] == "restarted" for b in bodies)
+
+    # Every request is audited, the coalesced ones marked as such.
+    with open(main.AUDIT_LOG_PATH) as f:
+        tail = [json.loads(line) for line in f.read().splitlines()[-3:]]
+    assert sorted(entry["coalesced"] for entry in tail) == [False, True, True]
+
+
+def test_async_mode_job_can_attach_to_an_in_flight_execution(monkeypatch):
+    payload = {"event_type": "restart_deployment", "parameters": {"deployment": "api"}}
+    responses, executions = concurrent_webhooks(
+        monkeypatch, [payload, {**payload, "async_mode": True}]
+    )
+    assert executions == 1
+    assert responses[1].status_code == 202
+    job_id = responses[1].json()["job_id"]
+    deadline = time.time() + 5
+    while main.job_store.get(job_id)["status"] != "finished":
+        assert time.time() < deadline
+        time.sleep(0.01)
+    job = main.job_store.get(job_id)
+    assert job["status"] == "finished"
+    assert job["coalesced"] is True
+    assert job["execution"]["stdout"] == "restarted"
+
+
+def test_dry_runs_are_never_coalesced():
+    flight_before = main.single_flight.stats()
+    for _ in range(2):
+        resp = main.submit_execution(
+            "cleanup_disk",
+            main.get_action_config("cleanup_disk"),
+            "local",
+            main.get_controller_config("local"),
+            {},
+            True,
+        )
+        assert resp[1] is False
+        resp[0].result(timeout=5)
+    assert main.single_flight.stats() == flight_before
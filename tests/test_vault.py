@@ -124,6 +124,31 @@ def test_cache_expires_after_ttl(monkeypatch):
     assert mock_get.call_count == 2
 
 
+def test_derived_value_is_built_once_per_fetch(monkeypatch):
+    client = make_client(cache_ttl_seconds=10)
+    mock_resp = MagicMock()
+    mock_resp.status_code = 200
+    mock_resp.json.return_value = {"data": {"data": {"k": "v"}}}
+    derived = []
+
+    def derive(data):
+        derived.append(data)
+        return sorted(data)
+
+    base = time.time()
+    monkeypatch.setattr(time, "time", lambda: base)
+    with patch("requests.get", return_value=mock_resp):
+        assert client.get_derived("secret/data/x", derive) == ["k"]
+        assert client.get_derived("secret/data/x", derive) == ["k"]
+        assert len(derived) == 1
+        client.invalidate("secret/data/x")
+        client.get_derived("secret/data/x", derive)
+        monkeypatch.setattr(time, "time", lambda: base + 11)
+        client.get_derived("secret/data/x", derive)
+    # Rebuilt with the secret: once after the invalidate, once after expiry.
+    assert len(derived) == 3
+
+
 def test_different_paths_cached_independently():
     client = make_client()
     mock_resp = MagicMock()
@@ -0,0 +1,154 @@
+from fastapi.testclient import TestClient
+
+import src.auth as auth
+import src.main as main
+from src.main import app
+
+client = TestClient(app)
+
+
+def get_headers(api_key="admin-key"):
+    return {"x-api-key": api_key}
+
+
+def post_batch(events, api_key="admin-key"):
+    return client.post("/webhook/batch", json=events, headers=get_headers(api_key))
+
+
+def test_batch_returns_one_result_per_event_in_order():
+    resp = post_batch(
+        [
+            {"event_type": "cleanup_disk"},
+            {"event_type": "does_not_exist"},
+            {"parameters": {"missing": "event_type"}},
+            {"event_type": "health_check", "dry_run": True},
+        ]
+    )
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert [r["index"] for r in results] == [0, 1, 2, 3]
+    assert [r["status_code"] for r in results] == [200, 400, 400, 200]
+    assert results[0]["body"]["execution"]["stdout"] == "done"
+    assert results[1]["body"]["detail"] == "Unknown action/event_type"
+    assert results[2]["body"]["detail"] == "Invalid payload"
+    assert results[3]["body"]["dry_run"] is True
+
+
+def test_batch_rejects_bad_envelopes():
+    assert post_batch({"event_type": "cleanup_disk"}).status_code == 400
+    assert post_batch([]).status_code == 400
+    too_many = [{"event_type": "health_check"}] * (main.MAX_BATCH_EVENTS + 1)
+    assert post_batch(too_many).status_code == 400
+
+
+def test_batch_requires_auth():
+    resp = client.post("/webhook/batch", json=[{"event_type": "cleanup_disk"}])
+    assert resp.status_code == 401
+
+
+def test_batch_resolves_caller_once(monkeypatch):
+    calls = []
+    real = auth._load_auth_config
+
+    def counting():
+        calls.append(1)
+        return real()
+
+    monkeypatch.setattr(auth, "_load_auth_config", counting)
+    post_batch([{"event_type": "health_check"}] * 5)
+    assert len(calls) == 1
+
+
+def test_batch_applies_permissions_per_event():
+    results = post_batch(
+        [{"event_type": "cleanup_disk"}, {"event_type": "health_check"}],
+        api_key="readonly-key",
+    ).json()["results"]
+    assert [r["status_code"] for r in results] == [403, 403]
+
+    results = post_batch(
+        [
+            {"event_type": "cleanup_disk", "controller_override": "local"},
+            {"event_type": "cleanup_disk"},
+        ],
+        api_key="operator-key",
+    ).json()["results"]
+    assert [r["status_code"] for r in results] == [403, 200]
+
+
+def test_batch_counts_each_event_against_rate_limits(monkeypatch):
+    monkeypatch.setattr(
+        main.rate_limiter,
+        "config",
+        {
+            "per_role": {"admin": {"requests_per_minute": 3}},
+            "per_action": {"health_check": {"requests_per_minute": 1}},
+        },
+    )
+    results = post_batch(
+        [
+            {"event_type": "health_check"},
+            {"event_type": "health_check"},
+            {"event_type": "cleanup_disk"},
+            {"event_type": "cleanup_disk"},
+        ]
+    ).json()["results"]
+    # 3 fit the caller's budget; of those, health_check's own limit is 1.
+    assert [r["status_code"] for r in results] == [200, 429, 200, 429]
+    assert "retry_after_seconds" in results[1]["body"]
+    # The batch used up the caller's budget for single requests too.
+    single = client.post(
+        "/webhook", json={"event_type": "cleanup_disk"}, headers=get_headers()
+    )
+    assert single.status_code == 429
+
+
+def test_batch_applies_cooldown_between_its_own_events():
+    event = {
+        "event_type": "restart_deployment",
+        "parameters": {"deployment": "web"},
+    }
+    other = {
+        "event_type": "restart_deployment",
+        "parameters": {"deployment": "api"},
+    }
+    results = post_batch([event, event, other]).json()["results"]
+    assert [r["status_code"] for r in results] == [200, 409, 200]
+
+
+def test_batch_writes_audit_entries_in_one_grouped_append(monkeypatch):
+    groups = []
+    real = main.audit_chain.append_many
+
+    def recording(entries):
+        groups.append([e["action"] for e in entries])
+        return real(entries)
+
+    monkeypatch.setattr(main.audit_chain, "append_many", recording)
+
+    def ungrouped(entry):
+        raise AssertionError(f"ungrouped audit write: {entry['action']}")
+
+    monkeypatch.setattr(main.audit_chain, "append", ungrouped)
+    post_batch(
+        [
+            {"event_type": "cleanup_disk"},
+            {"event_type": "health_check"},
+            {"event_type": "cleanup_disk", "dry_run": True},
+        ]
+    )
+    assert len(groups) == 1
+    assert sorted(groups[0]) == ["cleanup_disk", "cleanup_disk", "health_check"]
+
+
+def test_batch_supports_approval_and_async_mode_events():
+    results = post_batch(
+        [
+            {"event_type": "cleanup_disk", "approval_required": True},
+            {"event_type": "health_check", "async_mode": True},
+        ]
+    ).json()["results"]
+    assert results[0]["status_code"] == 200
+    assert results[0]["body"]["status"] == "pending"
+    assert results[1]["status_code"] == 202
+    assert main.job_store.get(results[1]["body"]["job_id"]) is not None
@@ -0,0 +1,144 @@
+import threading
+
+from fastapi.testclient import TestClient
+
+import src.auth as auth
+import src.main as main
+from src.config import config_registry
+from src.main import app
+
+client = TestClient(app)
+
+FLEET = ["dc1-ansible", "dc2-ansible"]
+
+
+def get_headers(api_key="admin-key"):
+    return {"x-api-key": api_key}
+
+
+def post_webhook(payload, api_key="admin-key"):
+    return client.post("/webhook", json=payload, headers=get_headers(api_key))
+
+
+class FakeResult:
+    def __init__(self, stdout):
+        self.success = True
+        self.stdout = stdout
+
+    def as_dict(self):
+        return {"success": True, "stdout": self.stdout, "stderr": "", "exit_code": 0}
+
+
+def test_controllers_run_concurrently_with_one_audit_entry_each(monkeypatch):
+    # Both executions must be running at the same time to get past this.
+    barrier = threading.Barrier(2, timeout=5)
+
+    def run_remote(controller, action, params, dry_run=False):
+        barrier.wait()
+        return FakeResult(controller["host"])
+
+    monkeypatch.setattr("src.main.executor.run_remote", run_remote)
+    groups = []
+    real = main.audit_chain.append_many
+    monkeypatch.setattr(
+        main.audit_chain,
+        "append_many",
+        lambda entries: groups.append(entries) or real(entries),
+    )
+
+    resp = post_webhook({"event_type": "cleanup_disk", "controllers": FLEET})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["success"] is True
+    assert [r["controller"] for r in body["results"]] == FLEET
+    assert [r["body"]["execution"]["stdout"] for r in body["results"]] == [
+        "ansible.dc1.example.com",
+        "ansible.dc2.example.com",
+    ]
+    assert [e["controller"] for e in groups[0]] == FLEET
+
+
+def test_controller_group_expands_to_its_members(monkeypatch):
+    groups = {"ansible-fleet": ("dc1-ansible", "dc2-ansible")}
+    monkeypatch.setattr(main, "get_controller_group", groups.get)
+    resp = post_webhook(
+        {"event_type": "cleanup_disk", "controllers": ["ansible-fleet", "local"]}
+    )
+    assert [r["controller"] for r in resp.json()["results"]] == FLEET + ["local"]
+
+
+def test_fan_out_needs_every_controller_permitted(monkeypatch):
+    assert (
+        post_webhook(
+            {"event_type": "cleanup_disk", "controllers": FLEET}, "operator-key"
+        ).status_code
+        == 403
+    )
+    config = {
+        **config_registry.snapshot().auth,
+        "api_keys": {
+            "dc1-key": {"role": "admin", "allowed_controllers": ["dc1-ansible"]}
+        },
+    }
+    monkeypatch.setattr(auth, "_load_auth_config", lambda: config)
+    executed = []
+    monkeypatch.setattr(
+        "src.main.executor.run_remote",
+        lambda *a, **kw: executed.append(a) or FakeResult("remote"),
+    )
+    resp = post_webhook({"event_type": "cleanup_disk", "controllers": FLEET}, "dc1-key")
+    assert resp.status_code == 403
+    assert "dc2-ansible" in resp.json()["detail"]
+    assert executed == []
+
+
+def test_fan_out_queues_one_approval_per_controller():
+    body = post_webhook(
+        {"event_type": "cleanup_disk", "controllers": FLEET, "approval_required": True}
+    ).json()
+    ids = [r["body"]["approval_id"] for r in body["results"]]
+    entries = [main.get_approval_entry(i) for i in ids]
+    assert [e["controller"] for e in entries] == FLEET
+    assert [e["payload"]["controller_override"] for e in entries] == FLEET
+    assert all("controllers" not in e["payload"] for e in entries)
+
+
+def test_fan_out_events_are_refused_in_a_batch():
+    resp = client.post(
+        "/webhook/batch",
+        json=[{"event_type": "cleanup_disk", "controllers": FLEET}],
+        headers=get_headers(),
+    )
+    assert resp.json()["results"][0]["status_code"] == 400
+
+
+def test_approved_single_target_event_runs_on_the_controller_it_was_queued_for(
+    tmp_path, monkeypatch
+):
+    monkeypatch.setattr(main, "approval_queue", [])
+    monkeypatch.setattr(main, "APPROVALS_STATE_PATH", str(tmp_path / "a.json"))
+    ran_on = []
+
+    def run_remote(controller, action, params, dry_run=False):
+        ran_on.append(controller["host"])
+        return FakeResult("ok")
+
+    monkeypatch.setattr("src.main.executor.run_remote", run_remote)
+    resp = post_webhook(
+        {
+            "event_type": "cleanup_disk",
+            "controllers": ["dc2-ansible"],
+            "approval_required": True,
+        }
+    )
+    [entry] = main.approval_queue
+    assert entry["controller"] == "dc2-ansible"
+    assert entry["payload"]["controller_override"] == "dc2-ansible"
+    assert "controllers" not in entry["payload"]
+
+    resp = client.post(
+        f"/approvals/{resp.json()['approval_id']}/approve",
+        headers=get_headers("operator-key"),
+    )
+    assert resp.status_code == 200
+    assert ran_on == ["ansible.dc2.example.com"]